@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for list endpoints.
+
+Compares FastAPI's response_model=List[Clash] path (validate every dict,
+then jsonable_encoder + json.dumps) against the orjson path used by the
+list handlers in server.py. Both routes serve the same in-memory clash
+documents, so the numbers isolate serialization from Mongo.
+
+    python bench_serialization.py [--docs 1000] [--requests 200]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import List
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench")
+
+import httpx
+from fastapi import FastAPI, Response
+
+from server import Clash, MatchScore, dump_docs, json_response
+
+
+def make_clashes(count: int) -> List[dict]:
+    clashes = []
+    for i in range(count):
+        scores = [
+            MatchScore(
+                match_number=n + 1,
+                team1_player1_id=f"p{i}-{n}-a", team1_player2_id=f"p{i}-{n}-b",
+                team2_player1_id=f"p{i}-{n}-c", team2_player2_id=f"p{i}-{n}-d",
+                team1_set1=21, team2_set1=15 + n, completed=True
+            )
+            for n in range(5)
+        ]
+        clash = Clash(
+            clash_name=f"X{i % 7 + 1} vs Y{i % 7 + 1}",
+            team1_id=f"team-{i}-1",
+            team2_id=f"team-{i}-2",
+            stage="league",
+            status="completed",
+            scores=scores
+        )
+        clashes.append(clash.model_dump())
+    return clashes
+
+
+def build_app(clashes: List[dict]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/before", response_model=List[Clash])
+    async def before():
+        return clashes
+
+    @app.get("/after", response_model=List[Clash])
+    async def after(response: Response):
+        return json_response(dump_docs(clashes, Clash), response)
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int) -> float:
+    await client.get(path)
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get(path)
+        response.raise_for_status()
+    return requests / (time.perf_counter() - started)
+
+
+async def main():
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    clashes = make_clashes(args.docs)
+    transport = httpx.ASGITransport(app=build_app(clashes))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        before = await client.get("/before")
+        after = await client.get("/after")
+        assert before.json() == after.json(), "fast path changed the payload"
+
+        print(f"{args.docs} clashes per response, {args.requests} sequential requests")
+        before_rps = await measure(client, "/before", args.requests)
+        print(f"  response_model path: {before_rps:8.1f} req/s")
+        after_rps = await measure(client, "/after", args.requests)
+        print(f"  orjson fast path:    {after_rps:8.1f} req/s")
+        print(f"  speedup:             {after_rps / before_rps:8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Tournament-day load test.
+
+Seeds a 14-team tournament (pools X and Y, 8 players per team, league
+fixtures), then replays spectator traffic while scorers submit live
+scores, and reports throughput and p50/p95/p99 latency per route.
+
+By default the app runs in-process on the memory storage backend, so no
+Mongo server is needed; pass --base-url to load a running deployment instead.
+Spectators poll the same endpoints the pages do (revalidating with
+If-None-Match like a browser cache), scorers PATCH each rally to
+/api/clashes/{id}/matches/{n} and PUT the full score to
+/api/clashes/{id}/score with expected_version as each match completes.
+
+    python loadtest.py [--spectators 200] [--scorers 4] [--duration 30]
+                       [--max-p95-ms 250] [--max-p99-ms 500]
+
+Exits non-zero when any request fails or a route breaks a latency budget.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "loadtest")
+
+import httpx
+
+POOLS = ["X", "Y"]
+TEAMS_PER_POOL = 7
+PLAYERS_PER_TEAM = 8
+LEAGUE_POINTS = 21
+
+# (page, weight) - the requests each page issues together on load/poll
+SPECTATOR_PAGES = [
+    ("home", 30),
+    ("clashes", 20),
+    ("clash_detail", 25),
+    ("leaderboard", 15),
+    ("knockouts", 5),
+    ("teams", 5),
+]
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.not_modified: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, route: str, method: str, url: str,
+                      etags: Optional[dict] = None, **kwargs) -> Optional[httpx.Response]:
+        headers = kwargs.pop("headers", {})
+        if etags is not None and url in etags:
+            headers["If-None-Match"] = etags[url]
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError:
+            self.errors[route] += 1
+            return None
+        self.samples[route].append((time.perf_counter() - started) * 1000)
+        if response.status_code == 304:
+            self.not_modified[route] += 1
+        elif response.status_code >= 400:
+            self.errors[route] += 1
+        elif etags is not None and "etag" in response.headers:
+            etags[url] = response.headers["etag"]
+        return response
+
+
+async def pause(mean: float, deadline: float):
+    """Exponential think time, cut short at the end of the run"""
+    await asyncio.sleep(max(0.0, min(random.expovariate(1 / mean), deadline - time.perf_counter())))
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples))) - 1))
+    return samples[rank]
+
+
+async def seed_tournament(client: httpx.AsyncClient) -> List[dict]:
+    for pool in POOLS:
+        for number in range(1, TEAMS_PER_POOL + 1):
+            team = (await client.post("/api/teams", json={
+                "name": f"Load {pool}{number}", "pool": pool, "pool_number": number
+            })).json()
+            for n in range(PLAYERS_PER_TEAM):
+                await client.post("/api/players", json={
+                    "name": f"{pool}{number} Player {n + 1}", "team_id": team["id"]
+                })
+    (await client.post("/api/generate-fixtures")).raise_for_status()
+    return (await client.get("/api/clashes", params={"stage": "league"})).json()
+
+
+async def spectator(client: httpx.AsyncClient, recorder: LatencyRecorder, clashes: List[dict],
+                    deadline: float, think: float):
+    pages = [page for page, _ in SPECTATOR_PAGES]
+    weights = [weight for _, weight in SPECTATOR_PAGES]
+    etags = {}
+    # Stagger start so spectators do not all poll in lock-step
+    await asyncio.sleep(min(random.uniform(0, think), max(0.0, deadline - time.perf_counter())))
+    while time.perf_counter() < deadline:
+        page = random.choices(pages, weights)[0]
+        if page == "home":
+            await recorder.request(client, "GET /api/views/home", "GET", "/api/views/home", etags)
+        elif page == "clashes":
+            await asyncio.gather(
+                recorder.request(client, "GET /api/clashes", "GET", "/api/clashes", etags),
+                recorder.request(client, "GET /api/teams", "GET", "/api/teams", etags)
+            )
+        elif page == "clash_detail":
+            clash_id = random.choice(clashes)["id"]
+            await recorder.request(client, "GET /api/clashes/{id}?expand", "GET",
+                                   f"/api/clashes/{clash_id}?expand=teams,players", etags)
+        elif page == "leaderboard":
+            await asyncio.gather(*(
+                recorder.request(client, "GET /api/leaderboard?pool", "GET",
+                                 f"/api/leaderboard?pool={pool}", etags)
+                for pool in POOLS
+            ), *(
+                recorder.request(client, "GET /api/pool-status/{pool}", "GET",
+                                 f"/api/pool-status/{pool}", etags)
+                for pool in POOLS
+            ))
+        elif page == "knockouts":
+            await recorder.request(client, "GET /api/views/knockouts", "GET", "/api/views/knockouts", etags)
+        else:
+            await asyncio.gather(
+                recorder.request(client, "GET /api/teams", "GET", "/api/teams", etags),
+                recorder.request(client, "GET /api/players", "GET", "/api/players", etags)
+            )
+        await pause(think, deadline)
+
+
+async def scorer(client: httpx.AsyncClient, recorder: LatencyRecorder, queue: asyncio.Queue,
+                 players: Dict[str, List[str]], deadline: float, think: float):
+    """Score queued clashes rally by rally, committing the full score as each match completes"""
+    while time.perf_counter() < deadline and not queue.empty():
+        clash = queue.get_nowait()
+        team1, team2 = players[clash["team1_id"]], players[clash["team2_id"]]
+        scores = [{"match_number": n + 1} for n in range(5)]
+        version = clash.get("version", 0)
+        for match in scores:
+            match.update({
+                "team1_player1_id": team1[0], "team1_player2_id": team1[1],
+                "team2_player1_id": team2[0], "team2_player2_id": team2[1],
+                "team1_set1": 0, "team2_set1": 0
+            })
+            favourite = random.random()
+            while max(match["team1_set1"], match["team2_set1"]) < LEAGUE_POINTS:
+                if time.perf_counter() >= deadline:
+                    return
+                team = 1 if random.random() < favourite else 2
+                match[f"team{team}_set1"] += 1
+                response = await recorder.request(
+                    client, "PATCH /api/clashes/{id}/matches/{n}", "PATCH",
+                    f"/api/clashes/{clash['id']}/matches/{match['match_number']}",
+                    headers={"Idempotency-Key": uuid.uuid4().hex}, json={"team": team}
+                )
+                if response is not None and response.status_code == 200:
+                    version = response.json()["version"]
+                await pause(think, deadline)
+            # The completed match goes through the full commit, which credits players and locks the clash
+            match["completed"] = True
+            response = await recorder.request(
+                client, "PUT /api/clashes/{id}/score", "PUT", f"/api/clashes/{clash['id']}/score",
+                headers={"Idempotency-Key": uuid.uuid4().hex},
+                json={
+                    "clash_id": clash["id"], "scores": scores, "status": "live",
+                    "team1_games_won": 0, "team2_games_won": 0, "expected_version": version
+                }
+            )
+            if response is not None and response.status_code == 200:
+                version = response.json()["version"]
+            if response is not None and response.status_code == 200 and response.json()["is_locked"]:
+                break
+
+
+def report(recorder: LatencyRecorder, elapsed: float, max_p95: Optional[float],
+           max_p99: Optional[float]) -> bool:
+    print(f"{'route':36} {'reqs':>7} {'err':>5} {'304':>6} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    ok = True
+    total = 0
+    for route in sorted(recorder.samples):
+        samples = sorted(recorder.samples[route])
+        total += len(samples)
+        p50, p95, p99 = (percentile(samples, pct) for pct in (50, 95, 99))
+        flags = []
+        if recorder.errors[route]:
+            flags.append("errors")
+        if max_p95 is not None and p95 > max_p95:
+            flags.append("p95")
+        if max_p99 is not None and p99 > max_p99:
+            flags.append("p99")
+        ok = ok and not flags
+        print(f"{route:36} {len(samples):7d} {recorder.errors[route]:5d} "
+              f"{recorder.not_modified[route]:6d} {len(samples) / elapsed:8.1f} "
+              f"{p50:8.1f} {p95:8.1f} {p99:8.1f}" + (f"  FAIL ({', '.join(flags)})" if flags else ""))
+    print(f"{total} requests in {elapsed:.1f}s, {total / elapsed:.1f} req/s")
+    return ok
+
+
+async def main() -> int:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--base-url", help="load a running server instead of the in-process stand-in")
+    parser.add_argument("--spectators", type=int, default=200)
+    parser.add_argument("--scorers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of traffic")
+    parser.add_argument("--think", type=float, default=2.0, help="mean seconds between spectator polls")
+    parser.add_argument("--score-think", type=float, default=0.5, help="mean seconds between rallies")
+    parser.add_argument("--max-p95-ms", type=float)
+    parser.add_argument("--max-p99-ms", type=float)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    if args.base_url:
+        transport = httpx.AsyncHTTPTransport(retries=0)
+        base_url = args.base_url.rstrip("/")
+    else:
+        os.environ["STORAGE_BACKEND"] = "memory"
+        import server
+
+        logging.getLogger("server").setLevel(logging.WARNING)
+        await server.ensure_indexes()
+        transport = httpx.ASGITransport(app=server.app)
+        base_url = "http://loadtest"
+
+    limits = httpx.Limits(max_connections=args.spectators + args.scorers)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits,
+                                 timeout=30.0) as client:
+        clashes = await seed_tournament(client)
+        team_players = defaultdict(list)
+        for player in (await client.get("/api/players", params={"limit": 1000})).json():
+            team_players[player["team_id"]].append(player["id"])
+        print(f"seeded {len(team_players)} teams, {len(clashes)} league clashes; "
+              f"{args.spectators} spectators, {args.scorers} scorers for {args.duration:.0f}s")
+
+        queue = asyncio.Queue()
+        for clash in random.sample(clashes, len(clashes)):
+            queue.put_nowait(clash)
+        recorder = LatencyRecorder()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(spectator(client, recorder, clashes, deadline, args.think) for _ in range(args.spectators)),
+            *(scorer(client, recorder, queue, team_players, deadline, args.score_think)
+              for _ in range(args.scorers))
+        )
+        elapsed = time.perf_counter() - started
+
+    return 0 if report(recorder, elapsed, args.max_p95_ms, args.max_p99_ms) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,24 @@
+"""
+Photo rendition rendering, run in server.py's photo worker processes.
+
+Kept apart from server.py so a worker only imports Pillow, not the app, its
+database client or the memory store's directory lock.
+"""
+import io
+from typing import Dict
+
+
+def render_photo_renditions(path: str, renditions: Dict[str, int]) -> Dict[str, bytes]:
+    """Downscale an image to a JPEG per rendition name, fitting its longest edge"""
+    from PIL import Image, ImageOps
+
+    rendered = {}
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for size, edge in renditions.items():
+            rendition = image.copy()
+            rendition.thumbnail((edge, edge))
+            buffer = io.BytesIO()
+            rendition.save(buffer, "JPEG", quality=82, optimize=True, progressive=True)
+            rendered[size] = buffer.getvalue()
+    return rendered
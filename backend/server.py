@@ -1,38 +1,265 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Request, Response, BackgroundTasks, Query, Header, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.datastructures import MutableHeaders
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from pymongo import UpdateOne, IndexModel, ReturnDocument, ASCENDING, DESCENDING, monitoring
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+from bson import ObjectId
+from gridfs.errors import NoFile
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, ConfigDict, create_model
+from typing import List, Optional, Dict, Set
 import uuid
-from datetime import datetime, timezone
+import asyncio
+import json
+import re
+import orjson
+import time
+from email.utils import formatdate
+from datetime import datetime, timedelta, timezone
 import bcrypt
 import base64
+import functools
+import hashlib
+import tempfile
+import threading
+from contextvars import ContextVar
+from bisect import bisect_left
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from photos import render_photo_renditions
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+class Counter:
+    """Monotonic counter per label set, rendered in Prometheus text format"""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.series: Dict[tuple, float] = {}
+        # Mongo command events arrive on driver threads
+        self.lock = threading.Lock()
+
+    def inc(self, values: tuple = (), amount: float = 1):
+        with self.lock:
+            self.series[values] = self.series.get(values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            series = sorted(self.series.items())
+        for values, count in series:
+            lines.append(f"{self.name}{format_labels(self.labels, values)} {count:g}")
+        return lines
+
+class Gauge:
+    """Single value that goes up and down"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+    def dec(self, amount: int = 1):
+        self.value -= amount
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.value}"]
+
+class Histogram:
+    """Latency histogram per label set with cumulative le buckets, in seconds"""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [count per bucket..., count above the last bucket, sum, count]
+        self.series: Dict[tuple, list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, values: tuple, seconds: float):
+        with self.lock:
+            series = self.series.get(values)
+            if series is None:
+                series = self.series[values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[bisect_left(self.buckets, seconds)] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = sorted((values, list(counts)) for values, counts in self.series.items())
+        for values, counts in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(self.labels + ('le',), values + (bound,))} {cumulative}")
+            labels = format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {counts[-2]:.6f}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+http_requests = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+)
+http_in_flight = Gauge("http_requests_in_flight", "Requests currently being served.")
+# Server-sent event streams stay open for the whole visit; live_subscribers counts them instead
+STREAMING_PATHS = {"/api/live"}
+mongo_commands = Counter(
+    "mongodb_commands_total", "MongoDB commands by collection and outcome.", ("collection", "command", "outcome")
+)
+mongo_command_duration = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by collection.", ("collection", "command")
+)
+
+def query_shape(command_name: str, collection: str, spec) -> str:
+    """Query shape without values, e.g. 'find teams {id}', so repeated per-item queries group together"""
+    keys = ",".join(sorted(spec)) if isinstance(spec, dict) else ""
+    return f"{command_name} {collection} {{{keys}}}"
+
+def command_shape(command_name: str, collection: str, command) -> str:
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        spec = statements[0].get("q", {})
+    else:
+        spec = command.get("filter", command.get("query", {}))
+    return query_shape(command_name, collection, spec)
+
+class RequestDbTrace:
+    """Mongo commands issued while serving one request"""
+
+    def __init__(self):
+        # (shape, duration ms, outcome) in completion order
+        self.calls: List[tuple] = []
+
+    def total_ms(self) -> float:
+        return sum(call[1] for call in self.calls)
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for shape, _, _ in self.calls:
+            counts[shape] = counts.get(shape, 0) + 1
+        return {shape: count for shape, count in counts.items() if count >= threshold}
+
+# Motor copies the caller's context onto its executor threads, so listener events see the request's trace
+db_trace: ContextVar[Optional[RequestDbTrace]] = ContextVar("db_trace", default=None)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Counts and times every command the driver sends, labelled by collection"""
+
+    def __init__(self):
+        self.pending: Dict[tuple, tuple] = {}
+
+    def started(self, event):
+        target = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        collection = target if isinstance(target, str) else ""
+        trace = db_trace.get()
+        shape = command_shape(event.command_name, collection, event.command) if trace is not None else None
+        self.pending[(event.connection_id, event.request_id)] = (collection, trace, shape)
+
+    def succeeded(self, event):
+        self.finish(event, "ok")
+
+    def failed(self, event):
+        self.finish(event, "error")
+
+    def finish(self, event, outcome: str):
+        collection, trace, shape = self.pending.pop((event.connection_id, event.request_id), ("", None, None))
+        record_db_command(collection, event.command_name, shape, event.duration_micros / 1e6, outcome, trace)
+
+def record_db_command(collection: str, command_name: str, shape: Optional[str], seconds: float,
+                      outcome: str, trace: Optional[RequestDbTrace]):
+    mongo_commands.inc((collection, command_name, outcome))
+    mongo_command_duration.observe((collection, command_name), seconds)
+    # GridFS writes one insert per chunk, so a file's chunk count says nothing about the query plan
+    if trace is not None and not (command_name == "insert" and collection.endswith(".chunks")):
+        trace.calls.append((shape, seconds * 1000, outcome))
+
+def record_memory_command(collection: str, command_name: str, spec, seconds: float, outcome: str):
+    """Memory backend counterpart of the Mongo listener, called on the event loop"""
+    trace = db_trace.get()
+    shape = query_shape(command_name, collection, spec) if trace is not None else None
+    record_db_command(collection, command_name, shape, seconds, outcome, trace)
+
+mongo_command_metrics = MongoCommandMetrics()
+
+# "mongo" (default) or "memory": the embedded engine in storage.py, for small events and tests;
+# memory needs requirements-memory.txt
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mongo')
+
+if STORAGE_BACKEND == "memory":
+    from storage import MemoryDatabase, MemoryGridFSBucket
+
+    client = None
+    db = MemoryDatabase(
+        os.environ.get('MEMORY_SNAPSHOT_DIR'),
+        snapshot_seconds=float(os.environ.get('MEMORY_SNAPSHOT_SECONDS', 60)),
+        listener=record_memory_command
+    )
+    photo_bucket = MemoryGridFSBucket(db, bucket_name="photos")
+else:
+    mongo_url = os.environ['MONGO_URL']
+    client = AsyncIOMotorClient(mongo_url, event_listeners=[mongo_command_metrics])
+    db = client[os.environ['DB_NAME']]
+    photo_bucket = AsyncIOMotorGridFSBucket(db, bucket_name="photos")
 
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
 ADMIN_PASSWORD_HASH = "$2b$12$NogneEZ8/An7G7LvhaTgReLNC69DqZFh0zd8Cp9YK6mBWA5p.ZP66"
+MATCHES_PER_CLASH = 5
+# A badminton set is capped at 30 points, so no single correction needs more
+MAX_POINT_STEP = 30
+# Data written before tournaments existed is backfilled into this one, and requests
+# that do not name a tournament act on it
+DEFAULT_TOURNAMENT_ID = "default"
+TOURNAMENT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+class Tournament(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+class TournamentCreate(BaseModel):
+    name: str
+    id: Optional[str] = Field(None, pattern=TOURNAMENT_ID_PATTERN.pattern)
 
 class Player(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tournament_id: str = DEFAULT_TOURNAMENT_ID
     name: str
     team_id: str
     matches_played: int = 0
     pairs_history: List[str] = Field(default_factory=list)
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    change_seq: int = 0
+    updated_at: Optional[str] = None
 
 class PlayerCreate(BaseModel):
     name: str
@@ -41,6 +268,7 @@ class PlayerCreate(BaseModel):
 class Team(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tournament_id: str = DEFAULT_TOURNAMENT_ID
     name: str
     pool: Optional[str] = "X"
     pool_number: Optional[int] = 1
@@ -53,6 +281,8 @@ class Team(BaseModel):
     total_games_lost: int = 0
     point_difference: int = 0
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    change_seq: int = 0
+    updated_at: Optional[str] = None
 
 class TeamCreate(BaseModel):
     name: str
@@ -78,6 +308,7 @@ class MatchScore(BaseModel):
 class Clash(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tournament_id: str = DEFAULT_TOURNAMENT_ID
     clash_name: str
     team1_id: str
     team2_id: str
@@ -93,7 +324,12 @@ class Clash(BaseModel):
     winner_id: Optional[str] = None
     is_locked: bool = False
     photo_url: Optional[str] = None
+    photo_thumb_url: Optional[str] = None
+    # Incremented by every score commit; scorers send it back as expected_version
+    version: int = 0
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    change_seq: int = 0
+    updated_at: Optional[str] = None
 
 class ClashCreate(BaseModel):
     clash_name: str
@@ -111,6 +347,13 @@ class ClashScoreUpdate(BaseModel):
     status: str
     start_time: Optional[str] = None
     end_time: Optional[str] = None
+    expected_version: Optional[int] = None
+
+class MatchPointUpdate(BaseModel):
+    team: int = Field(ge=1, le=2)
+    set_number: int = Field(1, ge=1, le=3)
+    # Negative to take points back after a scoring mistake
+    points: int = Field(1, ge=-MAX_POINT_STEP, le=MAX_POINT_STEP)
 
 class AdminLogin(BaseModel):
     password: str
@@ -118,110 +361,1182 @@ class AdminLogin(BaseModel):
 class Notification(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tournament_id: str = DEFAULT_TOURNAMENT_ID
     title: str
     message: str
     clash_id: Optional[str] = None
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    change_seq: int = 0
+    updated_at: Optional[str] = None
 
 class NotificationCreate(BaseModel):
     title: str
     message: str
     clash_id: Optional[str] = None
 
+# Tournaments are never deleted, so once seen an id stays valid for the process lifetime
+known_tournaments: Set[str] = {DEFAULT_TOURNAMENT_ID}
+
+async def tournament_scope(
+    x_tournament_id: Optional[str] = Header(None),
+    tournament_id: Optional[str] = Query(None, description="Used when the X-Tournament-Id header cannot be sent")
+) -> str:
+    """The tournament a request acts on; every query and cache below is partitioned by it"""
+    scope = x_tournament_id or tournament_id or DEFAULT_TOURNAMENT_ID
+    if scope not in known_tournaments:
+        if not TOURNAMENT_ID_PATTERN.match(scope) or not await db.tournaments.find_one({"id": scope}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Tournament not found")
+        await change_versions.load(scope)
+        known_tournaments.add(scope)
+    return scope
+
+LIVE_QUEUE_SIZE = 100
+LIVE_HEARTBEAT_SECONDS = 15
+
+def tournament_topic(tournament_id: str) -> str:
+    return f"tournament:{tournament_id}"
+
+def clash_topic(clash_id: str) -> str:
+    return f"clash:{clash_id}"
+
+class LiveHub:
+    """In-process fan-out of live updates to server-sent event subscribers"""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, topics: List[str]) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        for topic in topics:
+            self.subscribers.setdefault(topic, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, topics: List[str]):
+        for topic in topics:
+            queues = self.subscribers.get(topic)
+            if queues is None:
+                continue
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[topic]
+
+    def publish(self, topics: List[str], event: str, data: dict):
+        """Deliver to this worker's subscribers and relay to the other workers"""
+        message = format_sse(event, data)
+        self.deliver(topics, message)
+        cluster_bus.forward(topics, message)
+
+    def deliver(self, topics: List[str], message: str):
+        queues = set()
+        for topic in topics:
+            queues.update(self.subscribers.get(topic, ()))
+        for queue in queues:
+            # A slow client loses its oldest pending update rather than blocking the writer
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+live_hub = LiveHub()
+
+class ChangeVersions:
+    """Per-tournament, per-collection change counters backing ETag/Last-Modified on read endpoints.
+
+    The counters live in one versions document per tournament, so every worker,
+    and the next process after a restart, gives the same data the same ETag.
+    Each worker serves from the copy it last saw: its own bumps return the new
+    counters, and the cluster bus brings in other workers' bumps. A document's
+    generation is fixed when it is created, so a database that was reset does
+    not hand out a validator from before the reset.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.generations: Dict[str, str] = {}
+        self.versions: Dict[tuple, int] = {}
+        self.modified: Dict[tuple, float] = {}
+        self.started = time.time()
+
+    async def bump(self, tournament_id: str, *collections: str):
+        """Count a write that has landed; call it after the write, never before"""
+        now = time.time()
+        doc = await self.database.versions.find_one_and_update(
+            {"_id": tournament_id},
+            {
+                "$inc": {f"versions.{name}": 1 for name in collections},
+                "$set": {"tournament_id": tournament_id, **{f"modified.{name}": now for name in collections}},
+                "$setOnInsert": {"generation": uuid.uuid4().hex[:8]}
+            },
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        self.observe(doc)
+
+    def observe(self, doc: dict):
+        """Take in a versions document; counters only move forward, so a late or echoed copy is ignored"""
+        self.generations[doc["tournament_id"]] = doc["generation"]
+        modified = doc.get("modified", {})
+        for name, version in doc.get("versions", {}).items():
+            key = (doc["tournament_id"], name)
+            if version > self.versions.get(key, 0):
+                self.versions[key] = version
+                self.modified[key] = modified.get(name, self.started)
+
+    async def load(self, *tournament_ids: str):
+        """Read the stored counters, for tournaments seen for the first time or whose changes were missed"""
+        ids = list(tournament_ids)
+        for doc in await self.database.versions.find({"_id": {"$in": ids}}).to_list(len(ids)):
+            self.observe(doc)
+
+    async def reload(self):
+        """Read the counters of every tournament this worker may have cached"""
+        await self.load(*known_tournaments, *{tournament_id for tournament_id, _ in self.versions})
+
+    def version(self, tournament_id: str, collection: str) -> int:
+        return self.versions.get((tournament_id, collection), 0)
+
+    def etag(self, tournament_id: str, collections: List[str]) -> str:
+        parts = "-".join(f"{name}.{self.version(tournament_id, name)}" for name in collections)
+        return f'W/"{self.generations.get(tournament_id, "0")}-{tournament_id}-{parts}"'
+
+    def last_modified(self, tournament_id: str, collections: List[str]) -> str:
+        latest = max(
+            (self.modified.get((tournament_id, name), self.started) for name in collections),
+            default=self.started
+        )
+        return formatdate(latest, usegmt=True)
+
+change_versions = ChangeVersions(db)
+
+# Version bumps invalidate cached reads; live_events carries live updates
+CLUSTER_WATCHED = ["versions", "live_events"]
+CLUSTER_BUS_ENABLED = os.environ.get('CLUSTER_BUS', '1').lower() not in ("0", "false", "no")
+CLUSTER_OUTBOX_SIZE = 1000
+CLUSTER_RETRY_SECONDS = 2
+# How long one change stream poll waits for a change before returning empty
+CLUSTER_AWAIT_MS = 1000
+LIVE_EVENT_TTL_SECONDS = 300
+# Raised by $changeStream on a standalone mongod
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+class ClusterBus:
+    """Keeps caches and live streams consistent across workers through one Mongo change stream.
+
+    Every write to a cached collection bumps its tournament's versions document;
+    each worker takes the new counters into change_versions, which invalidates
+    ETags, standings and coalesced reads. Live updates are relayed by inserting
+    them into live_events. Change streams need a replica set; a single-node one
+    is enough. Without one, or on the memory backend, each worker only sees its
+    own writes.
+
+    A worker has already delivered its own live updates, so their echoes are
+    skipped by origin. Echoed versions documents are harmless, as counters
+    only move forward.
+    """
+
+    def __init__(self, database, versions: ChangeVersions, hub: LiveHub):
+        self.database = database
+        self.versions = versions
+        self.hub = hub
+        self.origin = uuid.uuid4().hex
+        self.outbox: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+        self.resume_token = None
+        self.connected = False
+        self.changes = 0
+        self.relayed = 0
+        self.dropped = 0
+        self.restarts = 0
+        self.echoes = 0
+
+    def start(self):
+        self.outbox = asyncio.Queue(maxsize=CLUSTER_OUTBOX_SIZE)
+        self.tasks = [asyncio.ensure_future(self._watch()), asyncio.ensure_future(self._flush())]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.outbox = None
+
+    def forward(self, topics: List[str], message: str):
+        if self.outbox is None:
+            return
+        if self.outbox.full():
+            # Live updates are best-effort; clients catch up from the next one or a refetch
+            self.outbox.get_nowait()
+            self.dropped += 1
+        self.outbox.put_nowait({
+            "origin": self.origin, "topics": topics, "message": message,
+            "created_at": datetime.now(timezone.utc)
+        })
+
+    async def _flush(self):
+        """Write queued live updates in batches, off the request path"""
+        while True:
+            batch = [await self.outbox.get()]
+            while not self.outbox.empty():
+                batch.append(self.outbox.get_nowait())
+            try:
+                await self.database.live_events.insert_many(batch, ordered=False)
+            except PyMongoError as e:
+                self.dropped += len(batch)
+                logger.warning(f"Could not relay {len(batch)} live updates: {e}")
+
+    async def _watch(self):
+        pipeline = [
+            {"$match": {"ns.coll": {"$in": CLUSTER_WATCHED}}},
+            {"$project": {
+                "operationType": 1, "ns": 1, "fullDocument.tournament_id": 1, "fullDocument.generation": 1,
+                "fullDocument.versions": 1, "fullDocument.modified": 1, "fullDocument.origin": 1,
+                "fullDocument.topics": 1, "fullDocument.message": 1
+            }}
+        ]
+        while True:
+            try:
+                async with self.database.watch(
+                    pipeline, full_document="updateLookup", resume_after=self.resume_token,
+                    max_await_time_ms=CLUSTER_AWAIT_MS
+                ) as stream:
+                    replayable = self.resume_token is not None
+                    while stream.alive:
+                        # try_next opens the stream, then returns None after each empty await
+                        change = await stream.try_next()
+                        if not self.connected:
+                            self.connected = True
+                            if not replayable:
+                                # Bumps made while no stream was open cannot be replayed
+                                await self.versions.reload()
+                        if change is not None:
+                            self.apply(change)
+                        self.resume_token = stream.resume_token
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning("Change streams need a replica set; caches and live updates stay per-worker")
+                    # Nothing would read live_events, so stop writing to it
+                    self.outbox = None
+                    self.tasks[1].cancel()
+                    self.tasks = []
+                    return
+                # Usually a resume token that fell off the oplog; start over from now
+                self.resume_token = None
+                logger.warning(f"Cluster change stream failed: {e}")
+            except PyMongoError as e:
+                logger.warning(f"Cluster change stream interrupted: {e}")
+            self.connected = False
+            self.restarts += 1
+            await asyncio.sleep(CLUSTER_RETRY_SECONDS)
+
+    def apply(self, change: dict):
+        collection = change["ns"]["coll"]
+        doc = change.get("fullDocument") or {}
+        if collection == "live_events":
+            if change["operationType"] == "insert":
+                if doc.get("origin") == self.origin:
+                    self.echoes += 1
+                else:
+                    self.hub.deliver(doc["topics"], doc["message"])
+                    self.relayed += 1
+            return
+        if change["operationType"] not in ("insert", "update", "replace") or not doc:
+            return
+        self.changes += 1
+        self.versions.observe(doc)
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "changes": self.changes,
+            "relayed": self.relayed,
+            "dropped": self.dropped,
+            "restarts": self.restarts,
+            "echoes": self.echoes
+        }
+
+cluster_bus = ClusterBus(db, change_versions, live_hub)
+
+def check_not_modified(request: Request, response: Response, tournament_id: str,
+                       collections: List[str]) -> Optional[Response]:
+    """Return a 304 if the client's ETag is current, otherwise stamp validators on the response"""
+    headers = {
+        "ETag": change_versions.etag(tournament_id, collections),
+        "Last-Modified": change_versions.last_modified(tournament_id, collections),
+        "Cache-Control": "no-cache",
+        "Vary": "X-Tournament-Id"
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        client_tags = [tag.strip() for tag in if_none_match.split(",")]
+        if headers["ETag"] in client_tags or "*" in client_tags:
+            return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+# Documents served by /api/changes, each stamped with a change_seq by every write
+CHANGE_FEED_MODELS = {"teams": Team, "players": Player, "clashes": Clash, "notifications": Notification}
+# Sequence numbers are reserved before the write lands, so a later seq can become visible
+# first; the feed cursor never moves past a change younger than this
+CHANGE_SETTLE_SECONDS = 5
+# Sequence cursors are stored as BSON int64
+SEQ_MAX = 2**63 - 1
+
+def change_counter_id(tournament_id: str) -> str:
+    return f"changes:{tournament_id}"
+
+async def change_stamps(tournament_id: str, count: int) -> List[dict]:
+    """Reserve count consecutive change sequence numbers in a tournament, as fields to $set on written documents.
+
+    Each tournament has its own counter, so tournaments never contend on one document.
+    """
+    if count == 0:
+        return []
+    counter = await db.counters.find_one_and_update(
+        {"_id": change_counter_id(tournament_id)}, {"$inc": {"seq": count}},
+        upsert=True, return_document=ReturnDocument.AFTER
+    )
+    updated_at = datetime.now(timezone.utc).isoformat()
+    stamps = [
+        {"change_seq": seq, "updated_at": updated_at}
+        for seq in range(counter["seq"] - count + 1, counter["seq"] + 1)
+    ]
+    return stamps
+
+async def change_stamp(tournament_id: str) -> dict:
+    return (await change_stamps(tournament_id, 1))[0]
+
+def tombstone_docs(tournament_id: str, collection: str, ids: List[str], stamps: List[dict]) -> List[dict]:
+    return [
+        {"tournament_id": tournament_id, "collection": collection, "id": doc_id, **stamp}
+        for doc_id, stamp in zip(ids, stamps)
+    ]
+
+def standings_sort_key(team: dict):
+    # Points, then fewer clash losses, then point difference
+    return (
+        -team.get("points", 0),
+        team.get("matches_lost", 0),
+        -team.get("point_difference", 0)
+    )
+
+class StandingsCache:
+    """Sorted leaderboards per tournament and pool, rebuilt lazily after a write to that tournament's teams.
+
+    Entries are stamped with the teams change version they were read at, so
+    every handler that bumps "teams" invalidates them without extra calls.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, tournament_id: str, pool: Optional[str] = None) -> List[dict]:
+        key = (tournament_id, pool or "*")
+        version = change_versions.version(tournament_id, "teams")
+        entry = self.entries.get(key)
+        if entry and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        query = {"tournament_id": tournament_id}
+        if pool:
+            query["pool"] = pool
+        teams = await db.teams.find(query, {"_id": 0}).to_list(1000)
+        standings = sorted(teams, key=standings_sort_key)
+        self.entries[key] = (version, standings)
+        return standings
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.entries)
+        }
+
+standings_cache = StandingsCache()
+
+COALESCE_TTL_SECONDS = float(os.environ.get('COALESCE_TTL_SECONDS', 1.0))
+COALESCE_MAX_ENTRIES = 512
+
+class SingleFlight:
+    """Concurrent identical reads share one in-flight query and its serialized result.
+
+    Keys include the collection ETag, so a write switches readers to a new
+    key immediately; the TTL only bounds how long idle entries are kept.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.inflight: Dict[tuple, asyncio.Future] = {}
+        self.results: Dict[tuple, tuple] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.hits = 0
+
+    async def run(self, key: tuple, load):
+        now = time.monotonic()
+        cached = self.results.get(key)
+        if cached and cached[0] > now:
+            self.hits += 1
+            return cached[1]
+        
+        future = self.inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # The leader's request went away, not this one; the first waiter back leads the retry
+                return await self.run(key, load)
+        
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        self.executed += 1
+        try:
+            value = await load()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark retrieved so a herd of zero doesn't log an unhandled-exception warning
+                future.exception()
+            raise
+        finally:
+            del self.inflight[key]
+        
+        future.set_result(value)
+        if self.ttl > 0:
+            if len(self.results) >= COALESCE_MAX_ENTRIES:
+                self.results = {k: v for k, v in self.results.items() if v[0] > now}
+            self.results[key] = (now + self.ttl, value)
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "hits": self.hits,
+            "entries": len(self.results)
+        }
+
+single_flight = SingleFlight(COALESCE_TTL_SECONDS)
+
+class BatchLoader:
+    """DataLoader-style batcher: id lookups made in the same event-loop tick share one $in query.
+
+    Documents are not cached between batches, and a document may be handed
+    to several callers, so callers must not mutate what they receive.
+    """
+
+    def __init__(self, collection: str):
+        self.collection = collection
+        self.pending: Dict[str, List[asyncio.Future]] = {}
+        self.tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.loads = 0
+
+    def load(self, doc_id: str) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if not self.pending:
+            loop.call_soon(self._schedule_dispatch)
+        future = loop.create_future()
+        self.pending.setdefault(doc_id, []).append(future)
+        self.loads += 1
+        return future
+
+    async def load_many(self, ids: List[str]) -> Dict[str, dict]:
+        docs = await asyncio.gather(*(self.load(doc_id) for doc_id in ids))
+        return {doc_id: doc for doc_id, doc in zip(ids, docs) if doc is not None}
+
+    def _schedule_dispatch(self):
+        task = asyncio.ensure_future(self._dispatch())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _dispatch(self):
+        pending, self.pending = self.pending, {}
+        self.batches += 1
+        try:
+            docs = await db[self.collection].find(
+                {"id": {"$in": list(pending)}}, {"_id": 0}
+            ).to_list(len(pending))
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        found = {doc["id"]: doc for doc in docs}
+        for doc_id, futures in pending.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(found.get(doc_id))
+
+    def stats(self) -> dict:
+        return {"loads": self.loads, "batches": self.batches}
+
+team_loader = BatchLoader("teams")
+player_loader = BatchLoader("players")
+
+def parse_ids(ids: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated ids= parameter, dropping blanks and duplicates"""
+    if ids is None:
+        return None
+    parsed = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if len(parsed) > PAGE_LIMIT_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {PAGE_LIMIT_MAX} ids per request")
+    return parsed
+
+async def load_in_tournament(loader: BatchLoader, ids: List[str], tournament_id: str) -> List[dict]:
+    """Documents for an ids= lookup in request order; ids from another tournament are treated as unknown"""
+    found = await loader.load_many(ids)
+    return [found[doc_id] for doc_id in ids if doc_id in found and found[doc_id]["tournament_id"] == tournament_id]
+
+async def coalesced_response(request: Request, response: Response, route: str, load) -> Response:
+    """Serve a read through single_flight; load(page) returns JSON bytes and may set X-Next-Cursor on page"""
+    key = (route, str(request.query_params), response.headers.get("etag"))
+    
+    async def run():
+        page = Response()
+        body = await load(page)
+        return body, page.headers.get("x-next-cursor")
+    
+    body, next_cursor = await single_flight.run(key, run)
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return Response(body, media_type="application/json", headers=headers)
+
+PAGE_LIMIT_MAX = 1000
+POOLS = ["X", "Y"]
+
+def parse_fields(fields: Optional[str], model) -> Optional[tuple]:
+    """Validate a comma-separated fields= parameter against a model; id is always included"""
+    if not fields:
+        return None
+    names = ["id"]
+    for name in (f.strip() for f in fields.split(",")):
+        if not name or name in names:
+            continue
+        if name not in model.model_fields:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+        names.append(name)
+    return tuple(names)
+
+def fields_projection(selected: Optional[tuple]) -> dict:
+    if not selected:
+        return {"_id": 0}
+    # created_at and id are always read so pagination cursors can be built
+    return {"_id": 0, "created_at": 1, **{name: 1 for name in selected}}
+
+@functools.lru_cache(maxsize=256)
+def sparse_model(model, selected: tuple):
+    """Response model holding only the selected fields of model"""
+    return create_model(
+        f"{model.__name__}Fields",
+        __config__=ConfigDict(extra="ignore"),
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in selected}
+    )
+
+def shape_doc(doc: dict, model) -> dict:
+    """Restrict a stored document to model's fields without re-validating it.
+
+    Documents are written from model_dump(), so only fields added to a model
+    after the document was stored need filling in from their defaults.
+    """
+    fields = model.model_fields
+    if doc.keys() == fields.keys():
+        return doc
+    return {
+        name: doc[name] if name in doc else field.get_default(call_default_factory=True)
+        for name, field in fields.items()
+    }
+
+def dump_docs(docs, model) -> bytes:
+    """orjson-encode a list of documents, or a single document, in model's shape"""
+    if isinstance(docs, list):
+        return orjson.dumps([shape_doc(doc, model) for doc in docs])
+    return orjson.dumps(shape_doc(docs, model))
+
+def json_response(body: bytes, response: Response) -> Response:
+    """Wrap pre-serialized JSON, keeping headers already set on the injected response"""
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return Response(body, media_type="application/json", headers=headers)
+
+def sparse_response(docs, model, selected: tuple, response: Response) -> Response:
+    return json_response(dump_docs(docs, sparse_model(model, selected)), response)
+
+def encode_cursor(doc: dict) -> str:
+    raw = json.dumps([doc["created_at"], doc["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Both keys are strings; anything else would be spliced into the query as an operator or a type mismatch
+    if not isinstance(values, list) or len(values) != 2 or not all(isinstance(value, str) for value in values):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    created_at, doc_id = values
+    return created_at, doc_id
+
+async def fetch_page(collection, query: dict, response: Response, limit: int,
+                     after: Optional[str] = None, descending: bool = True,
+                     projection: Optional[dict] = None) -> List[dict]:
+    """Keyset-paginate on (created_at, id); the next cursor is returned in X-Next-Cursor"""
+    direction = DESCENDING if descending else ASCENDING
+    if after:
+        created_at, doc_id = decode_cursor(after)
+        beyond = "$lt" if descending else "$gt"
+        keyset = {"$or": [
+            {"created_at": {beyond: created_at}},
+            {"created_at": created_at, "id": {beyond: doc_id}}
+        ]}
+        query = {"$and": [query, keyset]} if query else keyset
+    docs = await collection.find(query, projection or {"_id": 0}).sort(
+        [("created_at", direction), ("id", direction)]
+    ).limit(limit + 1).to_list(limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(docs[-1])
+    return docs
+
+IDEMPOTENCY_TTL_SECONDS = 24 * 60 * 60
+# A claimed key whose request died (client gone, worker restarted) can be retaken after this
+IDEMPOTENCY_PENDING_SECONDS = 30
+
+# Clash fields a score event can change; snapshots store exactly these
+SCORE_STATE_FIELDS = (
+    "scores", "team1_games_won", "team2_games_won", "winner_id", "status",
+    "is_locked", "start_time", "end_time", "duration_minutes"
+)
+TEAM_STAT_FIELDS = (
+    "matches_played", "matches_won", "matches_lost", "points",
+    "total_games_won", "total_games_lost", "point_difference"
+)
+SCORE_SNAPSHOT_INTERVAL = int(os.environ.get('SCORE_SNAPSHOT_INTERVAL', 50))
+# Events are appended after the clash write, so seq N+1 can land before N; the feed
+# waits this long for a missing seq before treating it as lost and skipping past it
+SCORE_EVENT_GAP_SECONDS = 5
+
+# Every per-tournament query leads with tournament_id, so each index is prefixed with it
+INDEXES = {
+    "tournaments": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+    ],
+    "teams": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel(
+            [("tournament_id", ASCENDING), ("pool", ASCENDING), ("pool_number", ASCENDING)],
+            name="tournament_pool_number"
+        ),
+        IndexModel([("tournament_id", ASCENDING), ("change_seq", ASCENDING)], name="tournament_change_seq"),
+    ],
+    "players": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("team_id", ASCENDING)], name="team_id"),
+        IndexModel(
+            [("tournament_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+            name="tournament_created_at_id"
+        ),
+        IndexModel(
+            [("tournament_id", ASCENDING), ("team_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+            name="tournament_team_id_created_at_id"
+        ),
+        IndexModel([("tournament_id", ASCENDING), ("change_seq", ASCENDING)], name="tournament_change_seq"),
+    ],
+    "clashes": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel(
+            [("tournament_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="tournament_created_at_id"
+        ),
+        IndexModel(
+            [("tournament_id", ASCENDING), ("stage", ASCENDING), ("status", ASCENDING),
+             ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="tournament_stage_status_created_at_id"
+        ),
+        IndexModel(
+            [("tournament_id", ASCENDING), ("stage", ASCENDING), ("team1_id", ASCENDING), ("team2_id", ASCENDING)],
+            name="tournament_stage_teams"
+        ),
+        IndexModel([("tournament_id", ASCENDING), ("team1_id", ASCENDING)], name="tournament_team1_id"),
+        IndexModel([("tournament_id", ASCENDING), ("team2_id", ASCENDING)], name="tournament_team2_id"),
+        IndexModel([("tournament_id", ASCENDING), ("scheduled_time", ASCENDING)], name="tournament_scheduled_time"),
+        IndexModel([("tournament_id", ASCENDING), ("change_seq", ASCENDING)], name="tournament_change_seq"),
+    ],
+    "notifications": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel(
+            [("tournament_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="tournament_created_at_id"
+        ),
+        IndexModel([("tournament_id", ASCENDING), ("change_seq", ASCENDING)], name="tournament_change_seq"),
+    ],
+    "score_commits": [
+        IndexModel([("key", ASCENDING)], unique=True, name="key_unique"),
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS, name="created_at_ttl"),
+    ],
+    "tombstones": [
+        IndexModel([("tournament_id", ASCENDING), ("change_seq", ASCENDING)], name="tournament_change_seq"),
+    ],
+    "live_events": [
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=LIVE_EVENT_TTL_SECONDS, name="created_at_ttl"),
+    ],
+    "score_events": [
+        IndexModel([("clash_id", ASCENDING), ("seq", ASCENDING)], unique=True, name="clash_id_seq_unique"),
+    ],
+    "score_snapshots": [
+        IndexModel([("clash_id", ASCENDING), ("seq", ASCENDING)], unique=True, name="clash_id_seq_unique"),
+    ],
+}
+
+# Representative query shapes issued by each route, explained by /admin/index-report
+ROUTE_QUERIES = [
+    ("GET /teams/{team_id}", "teams", {"id": "sample", "tournament_id": "sample"}, None),
+    ("GET /leaderboard?pool=", "teams", {"tournament_id": "sample", "pool": "X"}, None),
+    ("GET /players", "players", {"tournament_id": "sample"}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("GET /players?team_id=", "players", {"tournament_id": "sample", "team_id": "sample"},
+     [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("GET /players/{player_id}", "players", {"id": "sample", "tournament_id": "sample"}, None),
+    ("GET /clashes", "clashes", {"tournament_id": "sample"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("GET /clashes?stage=", "clashes", {"tournament_id": "sample", "stage": "league"},
+     [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("GET /clashes?stage=&status=", "clashes", {"tournament_id": "sample", "stage": "league", "status": "live"},
+     [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("GET /clashes?team_id=", "clashes",
+     {"tournament_id": "sample", "$or": [{"team1_id": "sample"}, {"team2_id": "sample"}]},
+     [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("GET /clashes/{clash_id}", "clashes", {"id": "sample", "tournament_id": "sample"}, None),
+    ("GET /pool-status", "clashes", {"tournament_id": "sample", "stage": "league"}, None),
+    ("POST /knockouts/generate-finals", "clashes",
+     {"tournament_id": "sample", "stage": {"$in": ["final", "third_place"]}}, None),
+    ("GET /notifications", "notifications", {"tournament_id": "sample"},
+     [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("GET /changes", "clashes", {"tournament_id": "sample", "change_seq": {"$gt": 0}}, [("change_seq", ASCENDING)]),
+    ("GET /changes", "tombstones", {"tournament_id": "sample", "change_seq": {"$gt": 0}},
+     [("change_seq", ASCENDING)]),
+    ("GET /clashes/{clash_id}/events", "score_events", {"clash_id": "sample", "seq": {"$gt": 0}},
+     [("seq", ASCENDING)]),
+    ("GET /clashes/{clash_id}/replay", "score_snapshots", {"clash_id": "sample"}, [("seq", DESCENDING)]),
+]
+
+PHOTO_CHUNK_SIZE = 256 * 1024
+PHOTO_MAX_BYTES = int(os.environ.get('PHOTO_MAX_BYTES', 12 * 1024 * 1024))
+# Allowance for the multipart boundaries and part headers around the photo
+PHOTO_FORM_OVERHEAD = 64 * 1024
+PHOTO_UPLOAD_PATH = re.compile(r"^/api/clashes/[^/]+/photo$")
+PHOTO_WORKERS = int(os.environ.get('PHOTO_WORKERS', 2))
+# Longest edge in pixels for each downscaled rendition
+PHOTO_RENDITIONS = {"thumb": 320, "display": 1280}
+
+photo_pool: Optional[ProcessPoolExecutor] = None
+
+def start_photo_pool():
+    """Start the rendition workers. forkserver children start from a clean
+    interpreter rather than a copy of this process's loop, sockets and locks."""
+    global photo_pool
+    photo_pool = ProcessPoolExecutor(
+        max_workers=PHOTO_WORKERS, mp_context=multiprocessing.get_context("forkserver")
+    )
+
+async def stop_photo_pool():
+    global photo_pool
+    if photo_pool is not None:
+        pool, photo_pool = photo_pool, None
+        await asyncio.to_thread(pool.shutdown, cancel_futures=True)
+
+def clash_photo_url(clash_id: str, file_id, size: str = "display") -> str:
+    # The file id changes on every upload, so the URL itself can be cached forever
+    return f"/api/clashes/{clash_id}/photo?size={size}&v={file_id}"
+
+def photo_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Photo exceeds {PHOTO_MAX_BYTES // (1024 * 1024)} MB limit")
+
+async def spool_upload(upload: UploadFile) -> str:
+    """Stream an upload to a temporary file, enforcing PHOTO_MAX_BYTES"""
+    received = 0
+    with tempfile.NamedTemporaryFile(prefix="clash-photo-", delete=False) as spool:
+        try:
+            while True:
+                chunk = await upload.read(PHOTO_CHUNK_SIZE)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if received > PHOTO_MAX_BYTES:
+                    raise photo_too_large()
+                spool.write(chunk)
+        except BaseException:
+            os.unlink(spool.name)
+            raise
+    return spool.name
+
+async def store_clash_photo(clash_id: str, source, content_type: Optional[str], size: str = "original") -> ObjectId:
+    """Write a file object or bytes into GridFS and return the new file id"""
+    return await photo_bucket.upload_from_stream(
+        f"clash-{clash_id}-{size}",
+        source,
+        chunk_size_bytes=PHOTO_CHUNK_SIZE,
+        metadata={"clash_id": clash_id, "size": size, "content_type": content_type or "application/octet-stream"}
+    )
+
+async def delete_photo_file(file_id: Optional[str]):
+    if not file_id:
+        return
+    try:
+        await photo_bucket.delete(ObjectId(file_id))
+    except NoFile:
+        pass
+
+async def delete_clash_photos(clash: dict):
+    file_ids = [clash.get("photo_file_id"), *(clash.get("photo_renditions") or {}).values()]
+    await asyncio.gather(*(delete_photo_file(file_id) for file_id in file_ids))
+
+async def build_photo_renditions(tournament_id: str, clash_id: str, original_id: ObjectId, path: str):
+    """Background task: render thumbnails off the event loop and attach them to the clash"""
+    try:
+        if photo_pool is None:
+            logger.warning(f"Photo workers are not running; clash {clash_id} keeps only its original photo")
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            rendered = await loop.run_in_executor(photo_pool, render_photo_renditions, path, PHOTO_RENDITIONS)
+        except Exception as e:
+            logger.warning(f"Could not render photo renditions for clash {clash_id}: {e}")
+            return
+        
+        file_ids = {}
+        for size, data in rendered.items():
+            file_ids[size] = str(await store_clash_photo(clash_id, data, "image/jpeg", size))
+        
+        # Only attach if this upload is still the clash's current photo
+        result = await db.clashes.update_one(
+            {"id": clash_id, "photo_file_id": str(original_id)},
+            {"$set": {
+                "photo_renditions": file_ids,
+                "photo_url": clash_photo_url(clash_id, file_ids["display"], "display"),
+                "photo_thumb_url": clash_photo_url(clash_id, file_ids["thumb"], "thumb"),
+                **await change_stamp(tournament_id)
+            }}
+        )
+        if result.matched_count == 0:
+            await delete_clash_photos({"photo_renditions": file_ids})
+            return
+        await change_versions.bump(tournament_id, "clashes")
+    finally:
+        os.unlink(path)
+
+async def migrate_inline_photos():
+    """Move legacy base64 data-URL photos out of clash documents into GridFS"""
+    cursor = db.clashes.find(
+        {"photo_url": {"$regex": "^data:"}}, {"_id": 0, "id": 1, "photo_url": 1, "tournament_id": 1}
+    )
+    async for clash in cursor:
+        header, _, encoded = clash["photo_url"].partition(",")
+        content_type = header[len("data:"):].split(";")[0] or None
+        tournament_id = clash.get("tournament_id", DEFAULT_TOURNAMENT_ID)
+        file_id = await store_clash_photo(clash["id"], base64.b64decode(encoded), content_type)
+        await db.clashes.update_one(
+            {"id": clash["id"]},
+            {"$set": {
+                "photo_url": clash_photo_url(clash["id"], file_id, "original"),
+                "photo_file_id": str(file_id),
+                **await change_stamp(tournament_id)
+            }}
+        )
+        logger.info(f"Moved inline photo for clash {clash['id']} to GridFS")
+        await change_versions.bump(tournament_id, "clashes")
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple]:
+    """Parse a single-range "bytes=" header into an inclusive (start, end) pair"""
+    if not header or not header.startswith("bytes="):
+        return None
+    start_text, _, end_text = header[len("bytes="):].split(",")[0].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            start = max(size - int(end_text), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size - 1)
+
+TENANT_COLLECTIONS = ["teams", "players", "clashes", "notifications", "tombstones"]
+
+async def assign_default_tournament():
+    """Register the default tournament and move documents written before tenancy into it"""
+    try:
+        await db.tournaments.insert_one(
+            Tournament(id=DEFAULT_TOURNAMENT_ID, name="Default tournament").model_dump()
+        )
+    except DuplicateKeyError:
+        pass
+    # Sequence numbers from the single pre-tenancy counter carry on in the default tournament's
+    legacy = await db.counters.find_one({"_id": "changes"})
+    if legacy is not None:
+        if await db.counters.find_one({"_id": change_counter_id(DEFAULT_TOURNAMENT_ID)}) is None:
+            try:
+                await db.counters.insert_one({"_id": change_counter_id(DEFAULT_TOURNAMENT_ID), "seq": legacy["seq"]})
+            except DuplicateKeyError:
+                pass
+        await db.counters.delete_one({"_id": "changes"})
+    results = await asyncio.gather(*(
+        db[collection].update_many(
+            {"tournament_id": {"$exists": False}}, {"$set": {"tournament_id": DEFAULT_TOURNAMENT_ID}}
+        )
+        for collection in TENANT_COLLECTIONS
+    ))
+    for collection, result in zip(TENANT_COLLECTIONS, results):
+        if result.modified_count:
+            logger.info(f"Assigned {result.modified_count} {collection} to the default tournament")
+
+async def ensure_indexes():
+    for collection, indexes in INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except Exception as e:
+            # Duplicate ids in legacy data block the unique index; keep serving and report it
+            logger.error(f"Failed to create indexes on {collection}: {e}")
+
+def plan_stages(plan: dict) -> List[dict]:
+    """Flatten an explain winningPlan into its stages, outermost first"""
+    stages = [{"stage": plan.get("stage"), "index": plan.get("indexName")}]
+    children = plan.get("inputStages", [])
+    if "inputStage" in plan:
+        children = [plan["inputStage"]] + children
+    for child in children:
+        stages.extend(plan_stages(child))
+    return stages
+
 @api_router.post("/admin/login")
 async def admin_login(data: AdminLogin):
     if bcrypt.checkpw(data.password.encode('utf-8'), ADMIN_PASSWORD_HASH.encode('utf-8')):
         return {"success": True, "message": "Login successful"}
     raise HTTPException(status_code=401, detail="Invalid password")
 
+@api_router.get("/live")
+async def live_updates(request: Request, clash_id: Optional[str] = None, tournament_id: str = Depends(tournament_scope)):
+    """Stream score, standings and notification updates as server-sent events"""
+    topics = [tournament_topic(tournament_id)]
+    if clash_id:
+        topics.append(clash_topic(clash_id))
+    queue = live_hub.subscribe(topics)
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield message
+        finally:
+            live_hub.unsubscribe(queue, topics)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.post("/tournaments", response_model=Tournament)
+async def create_tournament(tournament: TournamentCreate):
+    data = tournament.model_dump(exclude_none=True)
+    tournament_obj = Tournament(**data)
+    try:
+        await db.tournaments.insert_one(tournament_obj.model_dump())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Tournament already exists")
+    known_tournaments.add(tournament_obj.id)
+    return tournament_obj
+
+@api_router.get("/tournaments", response_model=List[Tournament])
+async def get_tournaments(response: Response):
+    tournaments = await db.tournaments.find({}, {"_id": 0}).sort(
+        [("created_at", ASCENDING), ("id", ASCENDING)]
+    ).to_list(PAGE_LIMIT_MAX)
+    return json_response(dump_docs(tournaments, Tournament), response)
+
 @api_router.post("/teams", response_model=Team)
-async def create_team(team: TeamCreate):
-    team_obj = Team(**team.model_dump())
+async def create_team(team: TeamCreate, tournament_id: str = Depends(tournament_scope)):
+    team_obj = Team(**team.model_dump(), tournament_id=tournament_id, **await change_stamp(tournament_id))
     doc = team_obj.model_dump()
     await db.teams.insert_one(doc)
+    await change_versions.bump(tournament_id, "teams")
     return team_obj
 
 @api_router.get("/teams", response_model=List[Team])
-async def get_teams():
-    teams = await db.teams.find({}, {"_id": 0}).to_list(1000)
-    return teams
+async def get_teams(request: Request, response: Response, fields: Optional[str] = None, ids: Optional[str] = None,
+                    tournament_id: str = Depends(tournament_scope)):
+    not_modified = check_not_modified(request, response, tournament_id, ["teams"])
+    if not_modified:
+        return not_modified
+    selected = parse_fields(fields, Team)
+    team_ids = parse_ids(ids)
+    if team_ids is not None:
+        teams = await load_in_tournament(team_loader, team_ids, tournament_id)
+    else:
+        teams = await db.teams.find({"tournament_id": tournament_id}, fields_projection(selected)).to_list(1000)
+    model = sparse_model(Team, selected) if selected else Team
+    return json_response(dump_docs(teams, model), response)
 
 @api_router.get("/teams/{team_id}", response_model=Team)
-async def get_team(team_id: str):
-    team = await db.teams.find_one({"id": team_id}, {"_id": 0})
+async def get_team(team_id: str, request: Request, response: Response, fields: Optional[str] = None,
+                   tournament_id: str = Depends(tournament_scope)):
+    not_modified = check_not_modified(request, response, tournament_id, ["teams"])
+    if not_modified:
+        return not_modified
+    selected = parse_fields(fields, Team)
+    team = await db.teams.find_one({"id": team_id, "tournament_id": tournament_id}, fields_projection(selected))
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
+    if selected:
+        return sparse_response(team, Team, selected, response)
     return team
 
 @api_router.put("/teams/{team_id}", response_model=Team)
-async def update_team(team_id: str, team: TeamCreate):
+async def update_team(team_id: str, team: TeamCreate, tournament_id: str = Depends(tournament_scope)):
     result = await db.teams.update_one(
-        {"id": team_id},
-        {"$set": team.model_dump()}
+        {"id": team_id, "tournament_id": tournament_id},
+        {"$set": {**team.model_dump(), **await change_stamp(tournament_id)}}
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Team not found")
+    await change_versions.bump(tournament_id, "teams")
     updated_team = await db.teams.find_one({"id": team_id}, {"_id": 0})
     return updated_team
 
 @api_router.delete("/teams/{team_id}")
-async def delete_team(team_id: str):
-    result = await db.teams.delete_one({"id": team_id})
+async def delete_team(team_id: str, tournament_id: str = Depends(tournament_scope)):
+    result = await db.teams.delete_one({"id": team_id, "tournament_id": tournament_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Team not found")
-    await db.players.delete_many({"team_id": team_id})
+    team_players = {"tournament_id": tournament_id, "team_id": team_id}
+    player_ids = [p["id"] for p in await db.players.find(team_players, {"_id": 0, "id": 1}).to_list(None)]
+    stamps = await change_stamps(tournament_id, 1 + len(player_ids))
+    await asyncio.gather(
+        db.players.delete_many(team_players),
+        db.tombstones.insert_many(
+            tombstone_docs(tournament_id, "teams", [team_id], stamps[:1])
+            + tombstone_docs(tournament_id, "players", player_ids, stamps[1:])
+        )
+    )
+    await change_versions.bump(tournament_id, "teams", "players")
     return {"success": True}
 
 @api_router.post("/players", response_model=Player)
-async def create_player(player: PlayerCreate):
-    player_obj = Player(**player.model_dump())
+async def create_player(player: PlayerCreate, tournament_id: str = Depends(tournament_scope)):
+    player_stamp, team_stamp = await change_stamps(tournament_id, 2)
+    player_obj = Player(**player.model_dump(), tournament_id=tournament_id, **player_stamp)
     doc = player_obj.model_dump()
     await db.players.insert_one(doc)
     await db.teams.update_one(
-        {"id": player.team_id},
-        {"$push": {"players": player_obj.id}}
+        {"id": player.team_id, "tournament_id": tournament_id},
+        {"$push": {"players": player_obj.id}, "$set": team_stamp}
     )
+    await change_versions.bump(tournament_id, "players", "teams")
     return player_obj
 
 @api_router.get("/players", response_model=List[Player])
-async def get_players(team_id: Optional[str] = None):
-    query = {"team_id": team_id} if team_id else {}
-    players = await db.players.find(query, {"_id": 0}).to_list(1000)
-    return players
+async def get_players(
+    request: Request,
+    response: Response,
+    team_id: Optional[str] = None,
+    limit: int = Query(PAGE_LIMIT_MAX, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    ids: Optional[str] = None,
+    tournament_id: str = Depends(tournament_scope)
+):
+    not_modified = check_not_modified(request, response, tournament_id, ["players"])
+    if not_modified:
+        return not_modified
+    selected = parse_fields(fields, Player)
+    player_ids = parse_ids(ids)
+    if player_ids is not None:
+        players = [
+            player for player in await load_in_tournament(player_loader, player_ids, tournament_id)
+            if not team_id or player["team_id"] == team_id
+        ]
+    else:
+        query = {"tournament_id": tournament_id}
+        if team_id:
+            query["team_id"] = team_id
+        players = await fetch_page(
+            db.players, query, response, limit, after, descending=False, projection=fields_projection(selected)
+        )
+    model = sparse_model(Player, selected) if selected else Player
+    return json_response(dump_docs(players, model), response)
 
 @api_router.get("/players/{player_id}", response_model=Player)
-async def get_player(player_id: str):
-    player = await db.players.find_one({"id": player_id}, {"_id": 0})
+async def get_player(
+    player_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    tournament_id: str = Depends(tournament_scope)
+):
+    not_modified = check_not_modified(request, response, tournament_id, ["players"])
+    if not_modified:
+        return not_modified
+    selected = parse_fields(fields, Player)
+    player = await db.players.find_one({"id": player_id, "tournament_id": tournament_id}, fields_projection(selected))
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
+    if selected:
+        return sparse_response(player, Player, selected, response)
     return player
 
 @api_router.put("/players/{player_id}", response_model=Player)
-async def update_player(player_id: str, player: PlayerCreate):
+async def update_player(player_id: str, player: PlayerCreate, tournament_id: str = Depends(tournament_scope)):
     result = await db.players.update_one(
-        {"id": player_id},
-        {"$set": player.model_dump()}
+        {"id": player_id, "tournament_id": tournament_id},
+        {"$set": {**player.model_dump(), **await change_stamp(tournament_id)}}
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Player not found")
+    await change_versions.bump(tournament_id, "players")
     updated_player = await db.players.find_one({"id": player_id}, {"_id": 0})
     return updated_player
 
 @api_router.delete("/players/{player_id}")
-async def delete_player(player_id: str):
-    player = await db.players.find_one({"id": player_id}, {"_id": 0})
+async def delete_player(player_id: str, tournament_id: str = Depends(tournament_scope)):
+    player = await db.players.find_one({"id": player_id, "tournament_id": tournament_id}, {"_id": 0})
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
     
+    player_stamp, team_stamp = await change_stamps(tournament_id, 2)
     result = await db.players.delete_one({"id": player_id})
-    await db.teams.update_one(
-        {"id": player["team_id"]},
-        {"$pull": {"players": player_id}}
+    await asyncio.gather(
+        db.teams.update_one(
+            {"id": player["team_id"]},
+            {"$pull": {"players": player_id}, "$set": team_stamp}
+        ),
+        db.tombstones.insert_one(tombstone_docs(tournament_id, "players", [player_id], [player_stamp])[0])
     )
+    await change_versions.bump(tournament_id, "players", "teams")
     return {"success": True}
 
 @api_router.post("/generate-fixtures")
-async def generate_fixtures():
+async def generate_fixtures(tournament_id: str = Depends(tournament_scope)):
     pool_x_fixtures = [
         ("X1", ["X2", "X3", "X6", "X7"]),
         ("X2", ["X1", "X3", "X4", "X7"]),
@@ -242,10 +1557,11 @@ async def generate_fixtures():
         ("Y7", ["Y1", "Y2", "Y5", "Y6"])
     ]
     
-    teams = await db.teams.find({}, {"_id": 0}).to_list(1000)
+    teams = await db.teams.find({"tournament_id": tournament_id}, {"_id": 0}).to_list(1000)
     team_map = {f"{t['pool']}{t['pool_number']}": t['id'] for t in teams}
     
     created_clashes = []
+    docs = []
     processed_pairs = set()
     
     for pool_fixtures in [pool_x_fixtures, pool_y_fixtures]:
@@ -272,56 +1588,189 @@ async def generate_fixtures():
                     team1_id=team1_id,
                     team2_id=team2_id,
                     stage="league",
-                    scores=[s.model_dump() for s in default_scores]
+                    scores=[s.model_dump() for s in default_scores],
+                    tournament_id=tournament_id
                 )
-                doc = clash_obj.model_dump()
-                await db.clashes.insert_one(doc)
+                docs.append(clash_obj.model_dump())
                 created_clashes.append(clash_name)
     
+    if docs:
+        for doc, stamp in zip(docs, await change_stamps(tournament_id, len(docs))):
+            doc.update(stamp)
+        await db.clashes.insert_many(docs)
+        await record_initial_snapshots(docs)
+    await change_versions.bump(tournament_id, "clashes")
     return {"success": True, "created": len(created_clashes), "clashes": created_clashes}
 
 @api_router.post("/clashes", response_model=Clash)
-async def create_clash(clash: ClashCreate):
+async def create_clash(clash: ClashCreate, tournament_id: str = Depends(tournament_scope)):
     num_matches = 5
     default_scores = [MatchScore(match_number=i+1) for i in range(num_matches)]
     clash_data = clash.model_dump()
     clash_data["scores"] = [s.model_dump() for s in default_scores]
-    clash_obj = Clash(**clash_data)
+    clash_obj = Clash(**clash_data, tournament_id=tournament_id, **await change_stamp(tournament_id))
     doc = clash_obj.model_dump()
     await db.clashes.insert_one(doc)
+    await record_initial_snapshots([doc])
+    await change_versions.bump(tournament_id, "clashes")
     return clash_obj
 
 @api_router.get("/clashes", response_model=List[Clash])
-async def get_clashes(stage: Optional[str] = None, status: Optional[str] = None):
-    query = {}
+async def get_clashes(
+    request: Request,
+    response: Response,
+    stage: Optional[str] = None,
+    status: Optional[str] = None,
+    team_id: Optional[str] = None,
+    scheduled_from: Optional[str] = None,
+    scheduled_to: Optional[str] = None,
+    limit: int = Query(PAGE_LIMIT_MAX, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    tournament_id: str = Depends(tournament_scope)
+):
+    not_modified = check_not_modified(request, response, tournament_id, ["clashes"])
+    if not_modified:
+        return not_modified
+    query = {"tournament_id": tournament_id}
     if stage:
         query["stage"] = stage
     if status:
         query["status"] = status
-    clashes = await db.clashes.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    return clashes
+    if team_id:
+        query["$or"] = [{"team1_id": team_id}, {"team2_id": team_id}]
+    if scheduled_from or scheduled_to:
+        # scheduled_time is stored as an ISO-8601 string, so ranges compare lexically
+        query["scheduled_time"] = {}
+        if scheduled_from:
+            query["scheduled_time"]["$gte"] = scheduled_from
+        if scheduled_to:
+            query["scheduled_time"]["$lte"] = scheduled_to
+    selected = parse_fields(fields, Clash)
+    model = sparse_model(Clash, selected) if selected else Clash
+    
+    async def load(page: Response) -> bytes:
+        clashes = await fetch_page(db.clashes, query, page, limit, after, projection=fields_projection(selected))
+        return dump_docs(clashes, model)
+    
+    return await coalesced_response(request, response, "clashes", load)
 
 @api_router.get("/clashes/{clash_id}", response_model=Clash)
-async def get_clash(clash_id: str):
-    clash = await db.clashes.find_one({"id": clash_id}, {"_id": 0})
+async def get_clash(clash_id: str, request: Request, response: Response,
+                    fields: Optional[str] = None, expand: Optional[str] = None,
+                    tournament_id: str = Depends(tournament_scope)):
+    expansions = parse_expand(expand)
+    not_modified = check_not_modified(request, response, tournament_id, ["clashes", *sorted(expansions)])
+    if not_modified:
+        return not_modified
+    selected = parse_fields(fields, Clash)
+    projection = fields_projection(selected)
+    if selected and expansions:
+        # Expansion needs the references even when they were not requested
+        projection.update({"team1_id": 1, "team2_id": 1, "scores": 1})
+    clash = await db.clashes.find_one({"id": clash_id, "tournament_id": tournament_id}, projection)
     if not clash:
         raise HTTPException(status_code=404, detail="Clash not found")
-    return clash
+    if not expansions:
+        if selected:
+            return sparse_response(clash, Clash, selected, response)
+        return clash
+    
+    body = dict(shape_doc(clash, sparse_model(Clash, selected) if selected else Clash))
+    body.update(await expand_clash(clash, expansions))
+    return json_response(orjson.dumps(body), response)
 
-@api_router.put("/clashes/{clash_id}/score")
-async def update_clash_score(clash_id: str, score_update: ClashScoreUpdate):
-    clash = await db.clashes.find_one({"id": clash_id}, {"_id": 0})
-    if not clash:
-        raise HTTPException(status_code=404, detail="Clash not found")
+CLASH_EXPANSIONS = {"teams", "players"}
+EXPANDED_PLAYER_FIELDS = ["id", "name", "team_id", "matches_played"]
+
+def parse_expand(expand: Optional[str]) -> set:
+    if not expand:
+        return set()
+    expansions = {name.strip() for name in expand.split(",") if name.strip()}
+    unknown = expansions - CLASH_EXPANSIONS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown expansion: {', '.join(sorted(unknown))}")
+    return expansions
+
+async def expand_clash(clash: dict, expansions: set) -> dict:
+    """Resolve a clash's team and player references with one $in query per collection"""
+    lookups = {}
+    if "teams" in expansions:
+        lookups["teams"] = team_loader.load_many([clash["team1_id"], clash["team2_id"]])
+    if "players" in expansions:
+        player_ids = {
+            pid
+            for score in clash.get("scores", [])
+            for pid in (score.get("team1_player1_id"), score.get("team1_player2_id"),
+                        score.get("team2_player1_id"), score.get("team2_player2_id"))
+            if pid
+        }
+        lookups["players"] = player_loader.load_many(sorted(player_ids))
+    results = dict(zip(lookups, await asyncio.gather(*lookups.values())))
     
-    if clash.get("is_locked"):
-        raise HTTPException(status_code=400, detail="Clash is locked")
+    expanded = {}
+    if "teams" in results:
+        expanded["team1"] = results["teams"].get(clash["team1_id"])
+        expanded["team2"] = results["teams"].get(clash["team2_id"])
+    if "players" in results:
+        expanded["players"] = [
+            {name: player.get(name) for name in EXPANDED_PLAYER_FIELDS}
+            for player in results["players"].values()
+        ]
+    return expanded
+
+def team_stats_pipeline(stamp: dict, **increments) -> List[dict]:
+    """Update pipeline applying stat increments and recomputing point_difference in one write"""
+    def added(name: str, amount: int) -> dict:
+        return {"$add": [{"$ifNull": [f"${name}", 0]}, amount]}
     
+    fields = {name: added(name, amount) for name, amount in increments.items()}
+    fields["point_difference"] = {"$subtract": [
+        added("total_games_won", increments.get("total_games_won", 0)),
+        added("total_games_lost", increments.get("total_games_lost", 0))
+    ]}
+    fields.update(stamp)
+    return [{"$set": fields}]
+
+def player_match_credits(scores: List[MatchScore]) -> tuple:
+    """Matches played and pair keys per player across the completed matches in scores"""
+    matches_played: Dict[str, int] = {}
+    pairs: Dict[str, List[str]] = {}
+    for score in scores:
+        if not score.completed:
+            continue
+        for pid in (score.team1_player1_id, score.team1_player2_id,
+                    score.team2_player1_id, score.team2_player2_id):
+            if pid:
+                matches_played[pid] = matches_played.get(pid, 0) + 1
+        for first, second in ((score.team1_player1_id, score.team1_player2_id),
+                              (score.team2_player1_id, score.team2_player2_id)):
+            if first and second:
+                pair_key = "-".join(sorted([first, second]))
+                for pid in (first, second):
+                    if pair_key not in pairs.setdefault(pid, []):
+                        pairs[pid].append(pair_key)
+    return matches_played, pairs
+
+def player_stats_updates(matches_played: Dict[str, int], pairs: Dict[str, List[str]],
+                         stamps: List[dict]) -> List[UpdateOne]:
+    """One update per player covering every completed match they appeared in"""
+    updates = []
+    for (pid, count), stamp in zip(matches_played.items(), stamps):
+        update = {"$inc": {"matches_played": count}, "$set": stamp}
+        if pid in pairs:
+            update["$addToSet"] = {"pairs_history": {"$each": pairs[pid]}}
+        updates.append(UpdateOne({"id": pid}, update))
+    return updates
+
+def derive_clash_state(clash: dict, scores: List[MatchScore], status: str,
+                       start_time: Optional[str], end_time: Optional[str]) -> dict:
+    """Clash score fields implied by a full score submission: games won, winner and lock"""
     is_league = clash["stage"] == "league"
     team1_wins = 0
     team2_wins = 0
     
-    for score in score_update.scores:
+    for score in scores:
         if score.completed:
             if is_league:
                 if score.team1_set1 > score.team2_set1:
@@ -355,167 +1804,517 @@ async def update_clash_score(clash_id: str, score_update: ClashScoreUpdate):
     winner_id = None
     if is_locked:
         winner_id = clash["team1_id"] if team1_wins >= 3 else clash["team2_id"]
-        score_update.status = "completed"
+        status = "completed"
     
     duration_minutes = None
-    if score_update.start_time and score_update.end_time:
+    if start_time and end_time:
         try:
-            start = datetime.fromisoformat(score_update.start_time.replace('Z', '+00:00'))
-            end = datetime.fromisoformat(score_update.end_time.replace('Z', '+00:00'))
+            start = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+            end = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
             duration_minutes = int((end - start).total_seconds() / 60)
         except:
             pass
     
-    update_data = {
-        "scores": [s.model_dump() for s in score_update.scores],
+    return {
+        "scores": [s.model_dump() for s in scores],
         "team1_games_won": team1_wins,
         "team2_games_won": team2_wins,
         "winner_id": winner_id,
-        "status": score_update.status,
+        "status": status,
         "is_locked": is_locked,
-        "start_time": score_update.start_time,
-        "end_time": score_update.end_time,
+        "start_time": start_time,
+        "end_time": end_time,
         "duration_minutes": duration_minutes
     }
+
+def clash_state(doc: dict) -> dict:
+    return {field: doc.get(field) for field in SCORE_STATE_FIELDS}
+
+async def record_initial_snapshots(docs: List[dict]):
+    """Seq 0 snapshot of newly created clashes, the base every replay starts from"""
+    await db.score_snapshots.insert_many([
+        {"clash_id": doc["id"], "seq": 0, "state": clash_state(doc), "at": time.time()}
+        for doc in docs
+    ])
+
+async def record_score_event(clash_id: str, seq: int, kind: str, data: dict, state: dict):
+    """Append the event that moved a clash to version seq, snapshotting every SCORE_SNAPSHOT_INTERVAL"""
+    writes = [db.score_events.insert_one({
+        "clash_id": clash_id, "seq": seq, "type": kind, "data": data, "at": time.time()
+    })]
+    if seq % SCORE_SNAPSHOT_INTERVAL == 0:
+        writes.append(db.score_snapshots.insert_one({
+            "clash_id": clash_id, "seq": seq, "state": state, "at": time.time()
+        }))
+    await asyncio.gather(*writes)
+
+def apply_score_event(clash: dict, state: dict, event: dict):
+    data = event["data"]
+    if event["type"] == "points":
+        match = next((s for s in state["scores"] if s["match_number"] == data["match_number"]), None)
+        if match is None:
+            match = MatchScore(match_number=data["match_number"]).model_dump()
+            state["scores"].append(match)
+        match[data["field"]] += data["points"]
+        state["status"] = "live"
+    else:
+        state.update(derive_clash_state(
+            clash, [MatchScore(**s) for s in data["scores"]], data["status"], data["start_time"], data["end_time"]
+        ))
+
+def clone_state(state: dict) -> dict:
+    return {**state, "scores": [dict(s) for s in state.get("scores") or []]}
+
+def replay_clash(clash: dict, snapshots: List[dict], events: List[dict], seq: Optional[int] = None) -> tuple:
+    """Fold a clash's events onto its latest snapshot at or before seq; returns (state, seq reached)"""
+    snapshot = max(
+        (s for s in snapshots if seq is None or s["seq"] <= seq), key=lambda s: s["seq"], default=None
+    )
+    if snapshot is None:
+        raise ValueError("no snapshot to replay from (clash predates the score log)")
+    state = clone_state(snapshot["state"])
+    reached = snapshot["seq"]
+    for event in sorted(events, key=lambda e: e["seq"]):
+        if event["seq"] <= reached or (seq is not None and event["seq"] > seq):
+            continue
+        if event["seq"] != reached + 1:
+            raise ValueError(f"score event {reached + 1} is missing")
+        apply_score_event(clash, state, event)
+        reached = event["seq"]
+    return state, reached
+
+async def request_fingerprint(request: Request) -> dict:
+    """What an Idempotency-Key is bound to: a retry must resend the same method, path and body"""
+    return {
+        "method": request.method,
+        "path": request.url.path,
+        "body_sha256": hashlib.sha256(await request.body()).hexdigest()
+    }
+
+async def claim_idempotency_key(key: str, fingerprint: dict) -> Optional[dict]:
+    """Reserve an Idempotency-Key for this submission; returns the stored response if it already committed"""
+    try:
+        await db.score_commits.insert_one({
+            "key": key,
+            "request": fingerprint,
+            "status": "pending",
+            "claimed_at": time.time(),
+            "created_at": datetime.now(timezone.utc)
+        })
+        return None
+    except DuplicateKeyError:
+        pass
+    
+    existing = await db.score_commits.find_one({"key": key}, {"_id": 0})
+    if existing is None or (
+        existing["status"] == "pending" and time.time() - existing["claimed_at"] < IDEMPOTENCY_PENDING_SECONDS
+    ):
+        raise HTTPException(status_code=409, detail="A submission with this Idempotency-Key is in progress")
+    if existing.get("request") != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    if existing["status"] == "done":
+        return existing["response"]
     
+    # The request holding the key died before finishing; take it over
+    result = await db.score_commits.update_one(
+        {"key": key, "status": "pending", "claimed_at": existing["claimed_at"]},
+        {"$set": {"claimed_at": time.time()}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="A submission with this Idempotency-Key is in progress")
+    return None
+
+async def commit_once(request: Request, response: Response, commit) -> dict:
+    """Run commit() at most once per Idempotency-Key, replaying its response on retries"""
+    idempotency_key = request.headers.get("idempotency-key")
+    if not idempotency_key:
+        return await commit()
+    
+    stored = await claim_idempotency_key(idempotency_key, await request_fingerprint(request))
+    if stored is not None:
+        response.headers["Idempotency-Replayed"] = "true"
+        return stored
+    try:
+        result = await commit()
+    except Exception:
+        # A failed commit changed nothing, so the same key may be retried
+        await db.score_commits.delete_one({"key": idempotency_key, "status": "pending"})
+        raise
+    await db.score_commits.update_one(
+        {"key": idempotency_key},
+        {"$set": {"status": "done", "response": result}}
+    )
+    return result
+
+@api_router.put("/clashes/{clash_id}/score")
+async def update_clash_score(clash_id: str, score_update: ClashScoreUpdate, request: Request, response: Response,
+                             tournament_id: str = Depends(tournament_scope)):
+    return await commit_once(request, response,
+                             lambda: commit_clash_score(tournament_id, clash_id, score_update))
+
+async def commit_clash_score(tournament_id: str, clash_id: str, score_update: ClashScoreUpdate) -> dict:
+    clash = await db.clashes.find_one({"id": clash_id, "tournament_id": tournament_id}, {"_id": 0})
+    if not clash:
+        raise HTTPException(status_code=404, detail="Clash not found")
+    
+    version = clash.get("version", 0)
+    if score_update.expected_version is not None and score_update.expected_version != version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Clash was updated by another scorer (now version {version}); reload and try again"
+        )
+    
+    if clash.get("is_locked"):
+        raise HTTPException(status_code=400, detail="Clash is locked")
+    
+    update_data = derive_clash_state(
+        clash, score_update.scores, score_update.status, score_update.start_time, score_update.end_time
+    )
+    is_league = clash["stage"] == "league"
+    completed = update_data["status"] == "completed"
+    is_locked = update_data["is_locked"]
+    winner_id = update_data["winner_id"]
+    team1_wins = update_data["team1_games_won"]
+    team2_wins = update_data["team2_games_won"]
+    credit_teams = completed and winner_id and is_league
+    
+    # Players are credited when a match first completes, not again on every resubmission
+    previously_completed = {s.get("match_number") for s in clash.get("scores", []) if s.get("completed")}
+    matches_played, pairs = player_match_credits(
+        [s for s in score_update.scores if s.match_number not in previously_completed]
+    )
+    clash_stamp, *stamps = await change_stamps(
+        tournament_id, 1 + (2 if credit_teams else 0) + len(matches_played)
+    )
+    
+    # Compare-and-set on the version read above: of two concurrent commits only one matches,
+    # so the stat increments below run once per accepted score change
     result = await db.clashes.update_one(
-        {"id": clash_id},
-        {"$set": update_data}
+        {"id": clash_id, "version": version if "version" in clash else {"$exists": False}},
+        {"$set": {**update_data, **clash_stamp}, "$inc": {"version": 1}}
     )
     
     if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Clash not found")
+        raise HTTPException(status_code=409, detail="Clash was updated by another scorer; reload and try again")
     
-    if score_update.status == "completed" and winner_id and is_league:
+    writes = [record_score_event(clash_id, version + 1, "commit", {
+        "scores": update_data["scores"],
+        "status": score_update.status,
+        "start_time": score_update.start_time,
+        "end_time": score_update.end_time
+    }, update_data)]
+    if credit_teams:
         loser_id = clash["team1_id"] if winner_id == clash["team2_id"] else clash["team2_id"]
+        games_won = {clash["team1_id"]: team1_wins, clash["team2_id"]: team2_wins}
+        winner_stamp, loser_stamp = stamps[:2]
+        stamps = stamps[2:]
         
-        team1_games_lost = team2_wins
-        team2_games_lost = team1_wins
-        
-        await db.teams.update_one(
-            {"id": winner_id},
-            {"$inc": {
-                "matches_won": 1,
-                "matches_played": 1,
-                "points": 2,
-                "total_games_won": team1_wins if winner_id == clash["team1_id"] else team2_wins,
-                "total_games_lost": team1_games_lost if winner_id == clash["team1_id"] else team2_games_lost
-            }}
-        )
-        await db.teams.update_one(
-            {"id": loser_id},
-            {"$inc": {
-                "matches_lost": 1,
-                "matches_played": 1,
-                "total_games_won": team2_wins if loser_id == clash["team2_id"] else team1_wins,
-                "total_games_lost": team2_games_lost if loser_id == clash["team2_id"] else team1_games_lost
-            }}
-        )
-        
-        winner_team = await db.teams.find_one({"id": winner_id}, {"_id": 0})
-        loser_team = await db.teams.find_one({"id": loser_id}, {"_id": 0})
-        
-        if winner_team:
-            point_diff = winner_team["total_games_won"] - winner_team["total_games_lost"]
-            await db.teams.update_one({"id": winner_id}, {"$set": {"point_difference": point_diff}})
-        
-        if loser_team:
-            point_diff = loser_team["total_games_won"] - loser_team["total_games_lost"]
-            await db.teams.update_one({"id": loser_id}, {"$set": {"point_difference": point_diff}})
+        team_updates = [
+            UpdateOne({"id": winner_id}, team_stats_pipeline(
+                winner_stamp, matches_won=1, matches_played=1, points=2,
+                total_games_won=games_won[winner_id], total_games_lost=games_won[loser_id]
+            )),
+            UpdateOne({"id": loser_id}, team_stats_pipeline(
+                loser_stamp, matches_lost=1, matches_played=1,
+                total_games_won=games_won[loser_id], total_games_lost=games_won[winner_id]
+            ))
+        ]
+        writes.append(db.teams.bulk_write(team_updates, ordered=False))
     
-    for score in score_update.scores:
-        if score.completed:
-            player_ids = [
-                score.team1_player1_id, score.team1_player2_id,
-                score.team2_player1_id, score.team2_player2_id
-            ]
-            for pid in player_ids:
-                if pid:
-                    await db.players.update_one(
-                        {"id": pid},
-                        {"$inc": {"matches_played": 1}}
-                    )
-            
-            if score.team1_player1_id and score.team1_player2_id:
-                pair_key = "-".join(sorted([score.team1_player1_id, score.team1_player2_id]))
-                await db.players.update_one(
-                    {"id": score.team1_player1_id},
-                    {"$addToSet": {"pairs_history": pair_key}}
-                )
-                await db.players.update_one(
-                    {"id": score.team1_player2_id},
-                    {"$addToSet": {"pairs_history": pair_key}}
-                )
-            
-            if score.team2_player1_id and score.team2_player2_id:
-                pair_key = "-".join(sorted([score.team2_player1_id, score.team2_player2_id]))
-                await db.players.update_one(
-                    {"id": score.team2_player1_id},
-                    {"$addToSet": {"pairs_history": pair_key}}
-                )
-                await db.players.update_one(
-                    {"id": score.team2_player2_id},
-                    {"$addToSet": {"pairs_history": pair_key}}
-                )
+    player_updates = player_stats_updates(matches_played, pairs, stamps)
+    if player_updates:
+        writes.append(db.players.bulk_write(player_updates, ordered=False))
+    
+    await asyncio.gather(*writes)
     
-    return {"success": True, "is_locked": is_locked, "winner_id": winner_id}
+    await change_versions.bump(tournament_id, "clashes", "teams", "players")
+    clash_diff = {"clash_id": clash_id, "version": version + 1, **update_data}
+    live_hub.publish([tournament_topic(tournament_id), clash_topic(clash_id)], "clash_score", clash_diff)
+    if credit_teams:
+        live_hub.publish([tournament_topic(tournament_id)], "standings", {
+            "clash_id": clash_id,
+            "team_ids": [clash["team1_id"], clash["team2_id"]]
+        })
+    
+    return {"success": True, "is_locked": is_locked, "winner_id": winner_id, "version": version + 1}
 
-@api_router.put("/clashes/{clash_id}/photo")
-async def upload_clash_photo(clash_id: str, photo: UploadFile = File(...)):
-    contents = await photo.read()
-    base64_photo = base64.b64encode(contents).decode('utf-8')
-    photo_url = f"data:{photo.content_type};base64,{base64_photo}"
+@api_router.patch("/clashes/{clash_id}/matches/{match_number}")
+async def update_match_points(clash_id: str, match_number: int, point: MatchPointUpdate,
+                              request: Request, response: Response,
+                              tournament_id: str = Depends(tournament_scope)):
+    """Add points to one set of one match without resubmitting the clash.
     
-    result = await db.clashes.update_one(
-        {"id": clash_id},
-        {"$set": {"photo_url": photo_url}}
+    Completing a match, and the win and stat bookkeeping that goes with it,
+    still goes through PUT /clashes/{id}/score.
+    """
+    return await commit_once(request, response,
+                             lambda: commit_match_points(tournament_id, clash_id, match_number, point))
+
+async def commit_match_points(tournament_id: str, clash_id: str, match_number: int,
+                              point: MatchPointUpdate) -> dict:
+    if not 1 <= match_number <= MATCHES_PER_CLASH:
+        raise HTTPException(status_code=404, detail="Match not found")
+    if point.points == 0:
+        raise HTTPException(status_code=400, detail="points must be non-zero")
+    
+    field = f"team{point.team}_set{point.set_number}"
+    guards = {"id": clash_id, "tournament_id": tournament_id, "is_locked": {"$ne": True}}
+    if point.set_number > 1:
+        guards["stage"] = {"$ne": "league"}
+    element = {"match_number": match_number, "completed": {"$ne": True}}
+    if point.points < 0:
+        element[field] = {"$gte": -point.points}
+    stamp = await change_stamp(tournament_id)
+    projection = {"_id": 0, "version": 1, **{name: 1 for name in SCORE_STATE_FIELDS}}
+    
+    # One guarded write; the clash is only read when it matches nothing, to say why
+    updated = await db.clashes.find_one_and_update(
+        {**guards, "scores": {"$elemMatch": element}},
+        {"$inc": {f"scores.$[match].{field}": point.points, "version": 1}, "$set": {"status": "live", **stamp}},
+        projection=projection, array_filters=[{"match.match_number": match_number}],
+        return_document=ReturnDocument.AFTER
     )
+    if updated is None and point.points > 0:
+        # The first point of a match adds its score entry
+        updated = await db.clashes.find_one_and_update(
+            {**guards, "scores.match_number": {"$ne": match_number}},
+            {
+                "$push": {"scores": MatchScore(match_number=match_number, **{field: point.points}).model_dump()},
+                "$inc": {"version": 1},
+                "$set": {"status": "live", **stamp}
+            },
+            projection=projection, return_document=ReturnDocument.AFTER
+        )
+    if updated is None:
+        raise await match_point_rejection(tournament_id, clash_id, match_number, field, point)
+    await record_score_event(clash_id, updated["version"], "points", {
+        "match_number": match_number, "field": field, "points": point.points
+    }, clash_state(updated))
     
-    if result.matched_count == 0:
+    await change_versions.bump(tournament_id, "clashes")
+    score = next(score for score in updated["scores"] if score["match_number"] == match_number)
+    live_hub.publish([tournament_topic(tournament_id), clash_topic(clash_id)], "match_score", {
+        "clash_id": clash_id, "version": updated["version"], "status": "live", "score": score
+    })
+    return {"success": True, "version": updated["version"], "score": score}
+
+async def match_point_rejection(tournament_id: str, clash_id: str, match_number: int, field: str,
+                                point: MatchPointUpdate) -> HTTPException:
+    """Explain why a point update's guarded write matched nothing"""
+    clash = await db.clashes.find_one(
+        {"id": clash_id, "tournament_id": tournament_id}, {"_id": 0, "stage": 1, "is_locked": 1, "scores": 1}
+    )
+    if not clash:
+        return HTTPException(status_code=404, detail="Clash not found")
+    if clash.get("is_locked"):
+        return HTTPException(status_code=400, detail="Clash is locked")
+    if clash["stage"] == "league" and point.set_number > 1:
+        return HTTPException(status_code=400, detail="League matches are a single set")
+    score = next((s for s in clash.get("scores", []) if s.get("match_number") == match_number), None)
+    if score and score.get("completed"):
+        return HTTPException(status_code=409, detail="Match is already completed")
+    if point.points < 0 and (score or {}).get(field, 0) < -point.points:
+        return HTTPException(status_code=409, detail="Score cannot go below zero")
+    return HTTPException(status_code=409, detail="Match changed while the points were applied; try again")
+
+@api_router.get("/clashes/{clash_id}/events")
+async def get_score_events(clash_id: str, response: Response, since: int = Query(0, ge=0, le=SEQ_MAX),
+                           limit: int = Query(PAGE_LIMIT_MAX, ge=1, le=PAGE_LIMIT_MAX),
+                           tournament_id: str = Depends(tournament_scope)):
+    """Score events after seq `since`, oldest first; clients resume from the last seq they applied"""
+    if not await db.clashes.find_one({"id": clash_id, "tournament_id": tournament_id}, {"_id": 0, "id": 1}):
         raise HTTPException(status_code=404, detail="Clash not found")
+    events = await db.score_events.find(
+        {"clash_id": clash_id, "seq": {"$gt": since}}, {"_id": 0}
+    ).sort("seq", ASCENDING).limit(limit).to_list(limit)
     
-    return {"success": True, "photo_url": photo_url}
+    # Stop before a hole an in-flight commit may still fill, so a client never skips an event
+    feed = []
+    expected = since + 1
+    for event in events:
+        if event["seq"] != expected and time.time() - event["at"] < SCORE_EVENT_GAP_SECONDS:
+            break
+        feed.append(event)
+        expected = event["seq"] + 1
+    return json_response(orjson.dumps(feed), response)
 
-@api_router.delete("/clashes/{clash_id}")
-async def delete_clash(clash_id: str):
-    result = await db.clashes.delete_one({"id": clash_id})
-    if result.deleted_count == 0:
+@api_router.get("/clashes/{clash_id}/replay")
+async def get_clash_replay(clash_id: str, seq: Optional[int] = Query(None, ge=0, le=SEQ_MAX),
+                           tournament_id: str = Depends(tournament_scope)):
+    """Clash score state rebuilt from its latest snapshot and the events after it, as of seq"""
+    clash = await db.clashes.find_one(
+        {"id": clash_id, "tournament_id": tournament_id}, {"_id": 0, "id": 1, "stage": 1, "team1_id": 1, "team2_id": 1, "version": 1}
+    )
+    if not clash:
         raise HTTPException(status_code=404, detail="Clash not found")
-    return {"success": True}
+    
+    snapshot_query = {"clash_id": clash_id}
+    if seq is not None:
+        snapshot_query["seq"] = {"$lte": seq}
+    snapshots = await db.score_snapshots.find(snapshot_query, {"_id": 0}).sort("seq", DESCENDING).limit(1).to_list(1)
+    event_query = {"clash_id": clash_id, "seq": {"$gt": snapshots[0]["seq"] if snapshots else 0}}
+    if seq is not None:
+        event_query["seq"]["$lte"] = seq
+    events = await db.score_events.find(event_query, {"_id": 0}).sort("seq", ASCENDING).to_list(None)
+    
+    try:
+        state, reached = replay_clash(clash, snapshots, events, seq)
+    except ValueError as error:
+        raise HTTPException(status_code=409, detail=f"Cannot replay clash: {error}")
+    if seq is not None and reached != seq:
+        raise HTTPException(status_code=404, detail=f"Clash has no score event {seq}")
+    return {"clash_id": clash_id, "seq": reached, "version": clash.get("version", 0), **state}
 
-@api_router.get("/leaderboard")
-async def get_leaderboard(pool: Optional[str] = None):
-    query = {"pool": pool} if pool else {}
-    teams = await db.teams.find(query, {"_id": 0}).to_list(1000)
-    
-    sorted_teams = sorted(teams, key=lambda t: (
-        -t.get("points", 0),
-        t.get("matches_lost", 0),
-        -t.get("point_difference", 0)
-    ))
+@api_router.put("/clashes/{clash_id}/photo")
+async def upload_clash_photo(clash_id: str, background_tasks: BackgroundTasks, photo: UploadFile = File(...),
+                             tournament_id: str = Depends(tournament_scope)):
+    clash = await db.clashes.find_one({"id": clash_id, "tournament_id": tournament_id}, {"_id": 0, "id": 1, "photo_file_id": 1, "photo_renditions": 1})
+    if not clash:
+        raise HTTPException(status_code=404, detail="Clash not found")
+    
+    path = await spool_upload(photo)
+    try:
+        with open(path, "rb") as spooled:
+            file_id = await store_clash_photo(clash_id, spooled, photo.content_type)
+        photo_url = clash_photo_url(clash_id, file_id, "original")
+        
+        result = await db.clashes.update_one(
+            {"id": clash_id},
+            {
+                "$set": {
+                    "photo_url": photo_url, "photo_file_id": str(file_id), "photo_thumb_url": None,
+                    **await change_stamp(tournament_id)
+                },
+                "$unset": {"photo_renditions": ""}
+            }
+        )
+        if result.matched_count == 0:
+            await delete_photo_file(str(file_id))
+            raise HTTPException(status_code=404, detail="Clash not found")
+    except BaseException:
+        os.unlink(path)
+        raise
     
-    return sorted_teams
+    await delete_clash_photos(clash)
+    await change_versions.bump(tournament_id, "clashes")
+    background_tasks.add_task(build_photo_renditions, tournament_id, clash_id, file_id, path)
+    return {"success": True, "photo_url": photo_url}
 
-@api_router.get("/pool-status/{pool}")
-async def get_pool_status(pool: str):
-    """Check if all matches in a pool are completed"""
-    # Get all teams in this pool
-    teams = await db.teams.find({"pool": pool}, {"_id": 0, "id": 1}).to_list(100)
-    team_ids = [t["id"] for t in teams]
+@api_router.get("/clashes/{clash_id}/photo")
+async def get_clash_photo(clash_id: str, request: Request, size: str = "display", v: Optional[str] = None):
+    if size != "original" and size not in PHOTO_RENDITIONS:
+        raise HTTPException(status_code=400, detail="Unknown photo size")
+    clash = await db.clashes.find_one({"id": clash_id}, {"_id": 0, "photo_file_id": 1, "photo_renditions": 1})
+    if not clash or not clash.get("photo_file_id"):
+        raise HTTPException(status_code=404, detail="Photo not found")
+    
+    # Renditions appear shortly after upload; until then every size serves the original
+    file_id = (clash.get("photo_renditions") or {}).get(size, clash["photo_file_id"])
+    try:
+        grid_out = await photo_bucket.open_download_stream(ObjectId(file_id))
+    except NoFile:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    
+    length = grid_out.length
+    headers = {
+        "ETag": f'"{file_id}"',
+        "Last-Modified": formatdate(grid_out.upload_date.replace(tzinfo=timezone.utc).timestamp(), usegmt=True),
+        # Only a URL naming this exact file can be cached forever; a bare or stale
+        # URL must revalidate so a replaced photo or a new rendition shows up
+        "Cache-Control": "public, max-age=31536000, immutable" if v == file_id else "no-cache",
+        "Accept-Ranges": "bytes"
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    
+    byte_range = parse_range(request.headers.get("range"), length)
+    status_code = 200
+    start, end = 0, length - 1
+    if byte_range:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+    headers["Content-Length"] = str(end - start + 1)
     
-    if len(team_ids) == 0:
-        return {"pool": pool, "total_clashes": 0, "completed_clashes": 0, "is_complete": False}
+    async def photo_stream():
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(PHOTO_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
     
-    # Get all league clashes for this pool (both teams must be from this pool)
-    all_clashes = await db.clashes.find({
-        "stage": "league",
-        "team1_id": {"$in": team_ids},
-        "team2_id": {"$in": team_ids}
-    }, {"_id": 0}).to_list(1000)
+    return StreamingResponse(
+        photo_stream(),
+        status_code=status_code,
+        media_type=(grid_out.metadata or {}).get("content_type", "application/octet-stream"),
+        headers=headers
+    )
+
+@api_router.delete("/clashes/{clash_id}")
+async def delete_clash(clash_id: str, tournament_id: str = Depends(tournament_scope)):
+    clash = await db.clashes.find_one_and_delete(
+        {"id": clash_id, "tournament_id": tournament_id}, {"_id": 0, "photo_file_id": 1, "photo_renditions": 1}
+    )
+    if clash is None:
+        raise HTTPException(status_code=404, detail="Clash not found")
+    await asyncio.gather(
+        delete_clash_photos(clash),
+        db.tombstones.insert_one(
+            tombstone_docs(tournament_id, "clashes", [clash_id], [await change_stamp(tournament_id)])[0]
+        ),
+        db.score_events.delete_many({"clash_id": clash_id}),
+        db.score_snapshots.delete_many({"clash_id": clash_id})
+    )
+    await change_versions.bump(tournament_id, "clashes")
+    return {"success": True}
+
+@api_router.get("/leaderboard")
+async def get_leaderboard(request: Request, response: Response, pool: Optional[str] = None,
+                          fields: Optional[str] = None, tournament_id: str = Depends(tournament_scope)):
+    not_modified = check_not_modified(request, response, tournament_id, ["teams"])
+    if not_modified:
+        return not_modified
+    selected = parse_fields(fields, Team)
     
-    total_clashes = len(all_clashes)
-    completed_clashes = len([c for c in all_clashes if c.get("is_locked", False)])
+    async def load(page: Response) -> bytes:
+        standings = await standings_cache.get(tournament_id, pool)
+        return dump_docs(standings, sparse_model(Team, selected) if selected else Team)
     
+    return await coalesced_response(request, response, "leaderboard", load)
+
+@api_router.get("/cache-stats")
+async def get_cache_stats():
+    return {
+        "standings": standings_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "team_loader": team_loader.stats(),
+        "player_loader": player_loader.stats(),
+        "cluster_bus": cluster_bus.stats()
+    }
+
+# League clashes grouped by the pool both teams belong to, counted server-side;
+# compute_pool_statuses prepends the $match on tournament and stage
+POOL_STATUS_PIPELINE = [
+    {"$lookup": {"from": "teams", "localField": "team1_id", "foreignField": "id", "as": "team1"}},
+    {"$lookup": {"from": "teams", "localField": "team2_id", "foreignField": "id", "as": "team2"}},
+    {"$project": {
+        "_id": 0,
+        "is_locked": 1,
+        "pool1": {"$arrayElemAt": ["$team1.pool", 0]},
+        "pool2": {"$arrayElemAt": ["$team2.pool", 0]}
+    }},
+    {"$match": {"pool1": {"$ne": None}, "$expr": {"$eq": ["$pool1", "$pool2"]}}},
+    {"$group": {
+        "_id": "$pool1",
+        "total_clashes": {"$sum": 1},
+        "completed_clashes": {"$sum": {"$cond": [{"$eq": ["$is_locked", True]}, 1, 0]}}
+    }}
+]
+
+def pool_status(pool: str, total_clashes: int = 0, completed_clashes: int = 0) -> dict:
     return {
         "pool": pool,
         "total_clashes": total_clashes,
@@ -523,60 +2322,149 @@ async def get_pool_status(pool: str):
         "is_complete": total_clashes > 0 and completed_clashes == total_clashes
     }
 
+async def compute_pool_statuses(tournament_id: str) -> Dict[str, dict]:
+    """Completion counts for every pool from a single aggregation"""
+    statuses = {pool: pool_status(pool) for pool in POOLS}
+    pipeline = [{"$match": {"tournament_id": tournament_id, "stage": "league"}}, *POOL_STATUS_PIPELINE]
+    async for row in db.clashes.aggregate(pipeline):
+        statuses[row["_id"]] = pool_status(row["_id"], row["total_clashes"], row["completed_clashes"])
+    return statuses
+
+async def compute_pool_status(tournament_id: str, pool: str) -> dict:
+    statuses = await compute_pool_statuses(tournament_id)
+    return statuses.get(pool, pool_status(pool))
+
+@api_router.get("/pool-status")
+async def get_pool_statuses(request: Request, response: Response, tournament_id: str = Depends(tournament_scope)):
+    """Completion status of every pool"""
+    not_modified = check_not_modified(request, response, tournament_id, ["teams", "clashes"])
+    if not_modified:
+        return not_modified
+    return await compute_pool_statuses(tournament_id)
+
+@api_router.get("/pool-status/{pool}")
+async def get_pool_status(pool: str, request: Request, response: Response, tournament_id: str = Depends(tournament_scope)):
+    """Check if all matches in a pool are completed"""
+    not_modified = check_not_modified(request, response, tournament_id, ["teams", "clashes"])
+    if not_modified:
+        return not_modified
+    return await compute_pool_status(tournament_id, pool)
+
+KNOCKOUT_STAGES = ["semifinal", "final", "third_place"]
+
+async def find_clashes(tournament_id: str, query: dict, limit: int = PAGE_LIMIT_MAX) -> List[dict]:
+    return await db.clashes.find({"tournament_id": tournament_id, **query}, {"_id": 0}).sort(
+        [("created_at", DESCENDING), ("id", DESCENDING)]
+    ).limit(limit).to_list(limit)
+
+@api_router.get("/views/home")
+async def get_home_view(request: Request, response: Response, tournament_id: str = Depends(tournament_scope)):
+    """Everything the home page renders, gathered concurrently in one request"""
+    not_modified = check_not_modified(request, response, tournament_id, ["clashes", "teams", "notifications"])
+    if not_modified:
+        return not_modified
+    
+    async def load(page: Response) -> bytes:
+        live_clashes, upcoming_clashes, standings, notifications = await asyncio.gather(
+            find_clashes(tournament_id, {"status": "live"}),
+            find_clashes(tournament_id, {"status": "upcoming"}, limit=3),
+            standings_cache.get(tournament_id),
+            db.notifications.find({"tournament_id": tournament_id}, {"_id": 0}).sort(
+                [("created_at", DESCENDING), ("id", DESCENDING)]
+            ).limit(5).to_list(5)
+        )
+        return orjson.dumps({
+            "live_clashes": [shape_doc(c, Clash) for c in live_clashes],
+            "upcoming_clashes": [shape_doc(c, Clash) for c in upcoming_clashes],
+            "top_teams": standings[:4],
+            "notifications": notifications
+        })
+    
+    return await coalesced_response(request, response, "views/home", load)
+
+async def gather_knockouts_view(tournament_id: str, include_players: bool) -> dict:
+    scope = {"tournament_id": tournament_id}
+    lookups = [
+        compute_pool_statuses(tournament_id),
+        *(standings_cache.get(tournament_id, pool) for pool in POOLS),
+        find_clashes(tournament_id, {"stage": {"$in": KNOCKOUT_STAGES}}),
+        db.teams.find(scope, {"_id": 0}).to_list(1000)
+    ]
+    if include_players:
+        lookups.append(db.players.find(scope, {"_id": 0}).sort(
+            [("created_at", ASCENDING), ("id", ASCENDING)]
+        ).to_list(PAGE_LIMIT_MAX))
+    results = await asyncio.gather(*lookups)
+    
+    view = {
+        "pool_status": results[0],
+        "standings": dict(zip(POOLS, results[1:len(POOLS) + 1])),
+        "knockout_clashes": [shape_doc(c, Clash) for c in results[len(POOLS) + 1]],
+        "teams": results[len(POOLS) + 2]
+    }
+    if include_players:
+        view["players"] = results[-1]
+    return view
+
+@api_router.get("/views/knockouts")
+async def get_knockouts_view(request: Request, response: Response, tournament_id: str = Depends(tournament_scope)):
+    not_modified = check_not_modified(request, response, tournament_id, ["clashes", "teams"])
+    if not_modified:
+        return not_modified
+    
+    async def load(page: Response) -> bytes:
+        return orjson.dumps(await gather_knockouts_view(tournament_id, include_players=False))
+    
+    return await coalesced_response(request, response, "views/knockouts", load)
+
+@api_router.get("/views/admin/knockouts")
+async def get_admin_knockouts_view(request: Request, response: Response, tournament_id: str = Depends(tournament_scope)):
+    not_modified = check_not_modified(request, response, tournament_id, ["clashes", "teams", "players"])
+    if not_modified:
+        return not_modified
+    
+    async def load(page: Response) -> bytes:
+        return orjson.dumps(await gather_knockouts_view(tournament_id, include_players=True))
+    
+    return await coalesced_response(request, response, "views/admin/knockouts", load)
+
 @api_router.post("/knockouts/generate-semifinals")
-async def generate_knockout_semifinals():
+async def generate_knockout_semifinals(tournament_id: str = Depends(tournament_scope)):
     """Generate semi-final fixtures based on leaderboard standings"""
+    # Get leaderboard for both pools
+    pool_x_sorted = await standings_cache.get(tournament_id, "X")
+    pool_y_sorted = await standings_cache.get(tournament_id, "Y")
+    
     # Check if both pools are complete
-    for pool in ['X', 'Y']:
-        teams = await db.teams.find({"pool": pool}, {"_id": 0, "id": 1}).to_list(100)
-        team_ids = [t["id"] for t in teams]
-        if len(team_ids) == 0:
+    statuses = await compute_pool_statuses(tournament_id)
+    for pool, standings in (("X", pool_x_sorted), ("Y", pool_y_sorted)):
+        if len(standings) == 0:
             raise HTTPException(status_code=400, detail=f"No teams in pool {pool}")
-        
-        all_clashes = await db.clashes.find({
-            "stage": "league",
-            "team1_id": {"$in": team_ids},
-            "team2_id": {"$in": team_ids}
-        }, {"_id": 0}).to_list(1000)
-        
-        completed = len([c for c in all_clashes if c.get("is_locked", False)])
-        if len(all_clashes) == 0 or completed < len(all_clashes):
+        if not statuses[pool]["is_complete"]:
             raise HTTPException(status_code=400, detail=f"Pool {pool} league stage not complete yet")
     
     # Check if semifinals already exist
-    existing_semis = await db.clashes.find({"stage": "semifinal"}, {"_id": 0}).to_list(10)
-    if len(existing_semis) >= 2:
+    existing_semis = await db.clashes.count_documents({"tournament_id": tournament_id, "stage": "semifinal"})
+    if existing_semis >= 2:
         raise HTTPException(status_code=400, detail="Semi-finals already generated")
     
-    # Get leaderboard for both pools
-    pool_x_teams = await db.teams.find({"pool": "X"}, {"_id": 0}).to_list(100)
-    pool_y_teams = await db.teams.find({"pool": "Y"}, {"_id": 0}).to_list(100)
-    
-    # Sort by points, then fewer losses, then point difference
-    pool_x_sorted = sorted(pool_x_teams, key=lambda t: (
-        -t.get("points", 0),
-        t.get("matches_lost", 0),
-        -t.get("point_difference", 0)
-    ))
-    pool_y_sorted = sorted(pool_y_teams, key=lambda t: (
-        -t.get("points", 0),
-        t.get("matches_lost", 0),
-        -t.get("point_difference", 0)
-    ))
-    
     if len(pool_x_sorted) < 2 or len(pool_y_sorted) < 2:
         raise HTTPException(status_code=400, detail="Not enough teams in pools")
     
     x1, x2 = pool_x_sorted[0], pool_x_sorted[1]
     y1, y2 = pool_y_sorted[0], pool_y_sorted[1]
     
+    sf1_stamp, sf2_stamp = await change_stamps(tournament_id, 2)
+    
     # Create Semi-Final 1: X1 vs Y2
     sf1 = Clash(
         clash_name=f"{x1['name']} vs {y2['name']}",
         team1_id=x1['id'],
         team2_id=y2['id'],
         stage="semifinal",
-        status="upcoming"
+        status="upcoming",
+        tournament_id=tournament_id,
+        **sf1_stamp
     )
     
     # Create Semi-Final 2: X2 vs Y1
@@ -585,19 +2473,27 @@ async def generate_knockout_semifinals():
         team1_id=x2['id'],
         team2_id=y1['id'],
         stage="semifinal",
-        status="upcoming"
+        status="upcoming",
+        tournament_id=tournament_id,
+        **sf2_stamp
     )
     
-    await db.clashes.insert_one(sf1.model_dump())
-    await db.clashes.insert_one(sf2.model_dump())
+    docs = [sf1.model_dump(), sf2.model_dump()]
+    await db.clashes.insert_many(docs)
+    await record_initial_snapshots(docs)
+    await change_versions.bump(tournament_id, "clashes")
+    live_hub.publish([tournament_topic(tournament_id)], "knockouts", {
+        "stage": "semifinal",
+        "clashes": [sf1.model_dump(), sf2.model_dump()]
+    })
     
     return {"message": "Semi-finals generated successfully", "sf1": sf1.clash_name, "sf2": sf2.clash_name}
 
 @api_router.post("/knockouts/generate-finals")
-async def generate_knockout_finals():
+async def generate_knockout_finals(tournament_id: str = Depends(tournament_scope)):
     """Generate final and third-place fixtures based on semi-final results"""
     # Get semi-finals
-    semis = await db.clashes.find({"stage": "semifinal"}, {"_id": 0}).to_list(10)
+    semis = await db.clashes.find({"tournament_id": tournament_id, "stage": "semifinal"}, {"_id": 0}).to_list(10)
     if len(semis) < 2:
         raise HTTPException(status_code=400, detail="Semi-finals not yet created")
     
@@ -607,7 +2503,9 @@ async def generate_knockout_finals():
             raise HTTPException(status_code=400, detail="Semi-finals not yet complete")
     
     # Check if finals already exist
-    existing_finals = await db.clashes.find({"stage": {"$in": ["final", "third_place"]}}, {"_id": 0}).to_list(10)
+    existing_finals = await db.clashes.find(
+        {"tournament_id": tournament_id, "stage": {"$in": ["final", "third_place"]}}, {"_id": 0}
+    ).to_list(10)
     if len(existing_finals) >= 2:
         raise HTTPException(status_code=400, detail="Finals already generated")
     
@@ -624,8 +2522,10 @@ async def generate_knockout_finals():
         raise HTTPException(status_code=400, detail="Semi-final winners not determined")
     
     # Get team names
-    teams = await db.teams.find({}, {"_id": 0}).to_list(100)
-    team_map = {t["id"]: t["name"] for t in teams}
+    teams = await team_loader.load_many([sf1_winner, sf2_winner, sf1_loser, sf2_loser])
+    team_map = {team_id: t["name"] for team_id, t in teams.items()}
+    
+    final_stamp, third_place_stamp = await change_stamps(tournament_id, 2)
     
     # Create Final: Winner SF1 vs Winner SF2
     final = Clash(
@@ -633,7 +2533,9 @@ async def generate_knockout_finals():
         team1_id=sf1_winner,
         team2_id=sf2_winner,
         stage="final",
-        status="upcoming"
+        status="upcoming",
+        tournament_id=tournament_id,
+        **final_stamp
     )
     
     # Create Third Place: Loser SF1 vs Loser SF2
@@ -642,42 +2544,504 @@ async def generate_knockout_finals():
         team1_id=sf1_loser,
         team2_id=sf2_loser,
         stage="third_place",
-        status="upcoming"
+        status="upcoming",
+        tournament_id=tournament_id,
+        **third_place_stamp
     )
     
-    await db.clashes.insert_one(final.model_dump())
-    await db.clashes.insert_one(third_place.model_dump())
+    docs = [final.model_dump(), third_place.model_dump()]
+    await db.clashes.insert_many(docs)
+    await record_initial_snapshots(docs)
+    await change_versions.bump(tournament_id, "clashes")
+    live_hub.publish([tournament_topic(tournament_id)], "knockouts", {
+        "stage": "final",
+        "clashes": [final.model_dump(), third_place.model_dump()]
+    })
     
     return {"message": "Finals generated successfully", "final": final.clash_name, "third_place": third_place.clash_name}
 
 @api_router.post("/notifications", response_model=Notification)
-async def create_notification(notification: NotificationCreate):
-    notif_obj = Notification(**notification.model_dump())
+async def create_notification(notification: NotificationCreate, tournament_id: str = Depends(tournament_scope)):
+    notif_obj = Notification(
+        **notification.model_dump(), tournament_id=tournament_id, **await change_stamp(tournament_id)
+    )
     doc = notif_obj.model_dump()
     await db.notifications.insert_one(doc)
+    await change_versions.bump(tournament_id, "notifications")
+    topics = [tournament_topic(tournament_id)]
+    if notif_obj.clash_id:
+        topics.append(clash_topic(notif_obj.clash_id))
+    live_hub.publish(topics, "notification", notif_obj.model_dump())
     return notif_obj
 
 @api_router.get("/notifications", response_model=List[Notification])
-async def get_notifications():
-    notifications = await db.notifications.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return notifications
+async def get_notifications(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
+    tournament_id: str = Depends(tournament_scope)
+):
+    not_modified = check_not_modified(request, response, tournament_id, ["notifications"])
+    if not_modified:
+        return not_modified
+    notifications = await fetch_page(db.notifications, {"tournament_id": tournament_id}, response, limit, after)
+    return json_response(dump_docs(notifications, Notification), response)
+
+@api_router.get("/changes")
+async def get_changes(request: Request, response: Response, since: int = Query(0, ge=0, le=SEQ_MAX),
+                      limit: int = Query(PAGE_LIMIT_MAX, ge=1, le=PAGE_LIMIT_MAX),
+                      tournament_id: str = Depends(tournament_scope)):
+    """Teams, players, clashes and notifications written after change_seq `since`, and ids deleted since.
+    
+    Clients load the lists once, then poll with since=<highest change_seq seen>, or the
+    `next` of the previous response; `more` means the next page is already waiting.
+    """
+    not_modified = check_not_modified(request, response, tournament_id, list(CHANGE_FEED_MODELS))
+    if not_modified:
+        return not_modified
+    
+    names = [*CHANGE_FEED_MODELS, "tombstones"]
+    results = await asyncio.gather(*(
+        db[name].find({"tournament_id": tournament_id, "change_seq": {"$gt": since}}, {"_id": 0})
+        .sort("change_seq", ASCENDING).limit(limit + 1).to_list(limit + 1)
+        for name in names
+    ))
+    changes = sorted(
+        ((name, doc) for name, docs in zip(names, results) for doc in docs),
+        key=lambda change: change[1]["change_seq"]
+    )
+    
+    body = {name: [] for name in CHANGE_FEED_MODELS}
+    body["deleted"] = {name: [] for name in CHANGE_FEED_MODELS}
+    settled = (datetime.now(timezone.utc) - timedelta(seconds=CHANGE_SETTLE_SECONDS)).isoformat()
+    cursor = since
+    pending = False
+    for name, doc in changes[:limit]:
+        if name == "tombstones":
+            body["deleted"][doc["collection"]].append(doc["id"])
+        else:
+            body[name].append(shape_doc(doc, CHANGE_FEED_MODELS[name]))
+        # An older seq may still be in flight behind a recent change, so the cursor stops
+        # short of it and the recent changes are sent again on the next poll
+        pending = pending or doc["updated_at"] > settled
+        if not pending:
+            cursor = doc["change_seq"]
+    body["next"] = cursor
+    # While the cursor is held back the client should wait rather than page
+    body["more"] = len(changes) > limit and not pending
+    if pending:
+        # Settling advances the cursor without a write, so a held-back page must not be revalidated
+        for header in ("ETag", "Last-Modified"):
+            del response.headers[header]
+    return json_response(orjson.dumps(body), response)
+
+@api_router.post("/admin/replay-scores")
+async def replay_scores(dry_run: bool = False, tournament_id: str = Depends(tournament_scope)):
+    """Rebuild a tournament's clash scores, then team and player stats, from the score log and repair any drift"""
+    scope = {"tournament_id": tournament_id}
+    clashes, teams, players = await asyncio.gather(
+        db.clashes.find(scope, {"_id": 0}).to_list(None),
+        db.teams.find(scope, {"_id": 0, "id": 1, **{field: 1 for field in TEAM_STAT_FIELDS}}).to_list(None),
+        db.players.find(scope, {"_id": 0, "id": 1, "matches_played": 1, "pairs_history": 1}).to_list(None)
+    )
+    logged = {"clash_id": {"$in": [clash["id"] for clash in clashes]}}
+    snapshots, events = await asyncio.gather(
+        db.score_snapshots.find(logged, {"_id": 0}).to_list(None),
+        db.score_events.find(logged, {"_id": 0}).to_list(None)
+    )
+    snapshots_by_clash: Dict[str, List[dict]] = {}
+    for snapshot in snapshots:
+        snapshots_by_clash.setdefault(snapshot["clash_id"], []).append(snapshot)
+    events_by_clash: Dict[str, List[dict]] = {}
+    for event in events:
+        events_by_clash.setdefault(event["clash_id"], []).append(event)
+    
+    drift = []
+    skipped = []
+    states = []
+    clash_updates = []
+    for clash in clashes:
+        version = clash.get("version", 0)
+        try:
+            state, reached = replay_clash(
+                clash, snapshots_by_clash.get(clash["id"], []), events_by_clash.get(clash["id"], [])
+            )
+            if reached < version:
+                raise ValueError(f"score events after {reached} are missing")
+        except ValueError as error:
+            # Without a complete history the stored state is the best there is
+            skipped.append({"clash_id": clash["id"], "reason": str(error)})
+            states.append((clash, clash_state(clash)))
+            continue
+        states.append((clash, state))
+        changed = {field: value for field, value in state.items() if clash.get(field) != value}
+        if changed:
+            drift.extend(
+                {"collection": "clashes", "id": clash["id"], "field": field, "stored": clash.get(field), "rebuilt": value}
+                for field, value in changed.items()
+            )
+            # Guarded on the version replayed so a commit racing the repair wins
+            clash_updates.append(({"id": clash["id"], "version": version}, changed))
+    
+    team_totals = {team["id"]: dict.fromkeys(TEAM_STAT_FIELDS, 0) for team in teams}
+    credited_scores = []
+    for clash, state in states:
+        credited_scores.extend(MatchScore(**score) for score in state.get("scores") or [])
+        if clash["stage"] != "league" or state["status"] != "completed" or not state["winner_id"]:
+            continue
+        games_won = {clash["team1_id"]: state["team1_games_won"], clash["team2_id"]: state["team2_games_won"]}
+        winner_id = state["winner_id"]
+        loser_id = clash["team1_id"] if winner_id == clash["team2_id"] else clash["team2_id"]
+        for team_id, opponent_id in ((winner_id, loser_id), (loser_id, winner_id)):
+            totals = team_totals.get(team_id)
+            if totals is None:
+                continue
+            totals["matches_played"] += 1
+            totals["matches_won" if team_id == winner_id else "matches_lost"] += 1
+            totals["points"] += 2 if team_id == winner_id else 0
+            totals["total_games_won"] += games_won[team_id]
+            totals["total_games_lost"] += games_won[opponent_id]
+    
+    team_updates = []
+    for team in teams:
+        totals = team_totals[team["id"]]
+        totals["point_difference"] = totals["total_games_won"] - totals["total_games_lost"]
+        changed = {field: value for field, value in totals.items() if team.get(field, 0) != value}
+        if changed:
+            drift.extend(
+                {"collection": "teams", "id": team["id"], "field": field, "stored": team.get(field, 0), "rebuilt": value}
+                for field, value in changed.items()
+            )
+            team_updates.append(({"id": team["id"]}, changed))
+    
+    matches_played, pairs = player_match_credits(credited_scores)
+    player_updates = []
+    for player in players:
+        changed = {}
+        if player.get("matches_played", 0) != matches_played.get(player["id"], 0):
+            changed["matches_played"] = matches_played.get(player["id"], 0)
+        if sorted(player.get("pairs_history") or []) != sorted(pairs.get(player["id"], [])):
+            changed["pairs_history"] = pairs.get(player["id"], [])
+        if changed:
+            drift.extend(
+                {"collection": "players", "id": player["id"], "field": field, "stored": player.get(field), "rebuilt": value}
+                for field, value in changed.items()
+            )
+            player_updates.append(({"id": player["id"]}, changed))
+    
+    if not dry_run:
+        stamps = iter(await change_stamps(
+            tournament_id, len(clash_updates) + len(team_updates) + len(player_updates)
+        ))
+        writes = [
+            collection.bulk_write([
+                UpdateOne(query, {"$set": {**changed, **next(stamps)}}) for query, changed in updates
+            ], ordered=False)
+            for collection, updates in ((db.clashes, clash_updates), (db.teams, team_updates), (db.players, player_updates))
+            if updates
+        ]
+        if writes:
+            await asyncio.gather(*writes)
+            await change_versions.bump(tournament_id, "clashes", "teams", "players")
+            live_hub.publish([tournament_topic(tournament_id)], "standings", {
+                "team_ids": sorted({item["id"] for item in drift if item["collection"] == "teams"})
+            })
+    
+    return {
+        "dry_run": dry_run,
+        "replayed": len(clashes) - len(skipped),
+        "skipped": skipped,
+        "repaired": {"clashes": len(clash_updates), "teams": len(team_updates), "players": len(player_updates)},
+        "drift": drift
+    }
+
+@api_router.get("/admin/index-report")
+async def get_index_report():
+    """Explain each route's query shape and report which indexes it uses"""
+    report = []
+    for route, collection, query, sort in ROUTE_QUERIES:
+        cursor = db[collection].find(query, {"_id": 0})
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        # Slot-based engine wraps the classic plan in queryPlan
+        stages = plan_stages(winning_plan.get("queryPlan", winning_plan))
+        report.append({
+            "route": route,
+            "collection": collection,
+            "indexes": [s["index"] for s in stages if s["index"]],
+            "stages": [s["stage"] for s in stages],
+            "collscan": any(s["stage"] == "COLLSCAN" for s in stages)
+        })
+    
+    existing = {}
+    for collection in INDEXES:
+        existing[collection] = sorted((await db[collection].index_information()).keys())
+    
+    return {
+        "routes": report,
+        "collscans": [r["route"] for r in report if r["collscan"]],
+        "indexes": existing
+    }
+
+class RequestMetricsMiddleware:
+    """Records per-route request counts, latency and in-flight requests.
+
+    Routes are labelled by their path template (/api/clashes/{clash_id}),
+    read from the scope after routing, so ids never become label values.
+    Streaming routes are only counted; their duration is the visit, not latency.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        started = time.perf_counter()
+        streaming = scope["path"] in STREAMING_PATHS
+        if not streaming:
+            http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            http_requests.inc((scope["method"], path, str(status)))
+            if not streaming:
+                http_in_flight.dec()
+                http_request_duration.observe((scope["method"], path), time.perf_counter() - started)
+
+class PhotoUploadLimitMiddleware:
+    """Refuses oversized photo uploads before the multipart body is parsed.
+
+    Starlette spools the whole form before the route runs, so spool_upload's
+    check alone only fires once an oversized body is already on disk. A declared
+    Content-Length over the limit is refused unread; a body sent without one is
+    counted as it arrives and cut off once it passes the limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "PUT" or not PHOTO_UPLOAD_PATH.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        limit = PHOTO_MAX_BYTES + PHOTO_FORM_OVERHEAD
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > limit:
+            error = photo_too_large()
+            response = JSONResponse(
+                {"detail": error.detail}, status_code=error.status_code, headers={"Connection": "close"}
+            )
+            await response(scope, receive, send)
+            return
+        received = 0
+        
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            if received > limit:
+                # Raised inside request.form(); FastAPI lets an HTTPException through unchanged
+                raise photo_too_large()
+            return message
+        
+        await self.app(scope, receive_limited, send)
+
+DB_CALL_BUDGET = int(os.environ.get('DB_CALL_BUDGET', 10))
+# Routes whose expected command count differs from the default, by "METHOD /path/template"
+DB_CALL_BUDGETS = {
+    # Commit reads and writes, the change sequence, the score event and periodic
+    # snapshot, plus claiming and completing an idempotency key
+    "PUT /api/clashes/{clash_id}/score": 9,
+    "PATCH /api/clashes/{clash_id}/matches/{match_number}": 7,
+    "POST /api/players": 4,
+    "POST /api/generate-fixtures": 5,
+    "GET /api/clashes/{clash_id}": 3,
+    # Read and update the clash, the change sequence, the new file, and deleting the
+    # previous original and renditions (files and chunks for each)
+    "PUT /api/clashes/{clash_id}/photo": 12,
+    # One explain per route shape and one listIndexes per collection
+    "GET /api/admin/index-report": len(ROUTE_QUERIES) + len(INDEXES),
+}
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))
+# Test runs set DB_BUDGET_STRICT=1 so a budget breach fails the request with a 500 instead of only logging
+DB_BUDGET_STRICT = os.environ.get('DB_BUDGET_STRICT', '').lower() in ("1", "true", "yes")
+DB_TRACE_ALL = os.environ.get('DB_TRACE', '').lower() in ("1", "true", "yes")
+
+class DbCallBudgetMiddleware:
+    """Collects the Mongo commands each request issues and checks them against its budget.
+
+    Every response carries X-DB-Calls and a Server-Timing db entry. Requests
+    over budget, or repeating one query shape N_PLUS_ONE_THRESHOLD times,
+    log a structured warning with the full trace, and under DB_BUDGET_STRICT
+    are answered with a 500 instead; a request sent with X-DB-Trace (or every
+    request, under DB_TRACE=1) logs its trace at info. The check runs when the
+    response starts, so streamed bodies and background tasks are not counted.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = RequestDbTrace()
+        rejected = False
+        
+        async def send_with_db_timing(message):
+            nonlocal rejected
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                breach = self.check(scope, trace)
+                if breach and DB_BUDGET_STRICT:
+                    rejected = True
+                    body = json.dumps({"detail": breach}).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [
+                            (b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode()),
+                            (b"x-db-calls", str(len(trace.calls)).encode())
+                        ]
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Calls", str(len(trace.calls)))
+                headers.append("Server-Timing", f"db;dur={trace.total_ms():.1f}")
+            await send(message)
+        
+        token = db_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_db_timing)
+        finally:
+            db_trace.reset(token)
+
+    def check(self, scope, trace: RequestDbTrace) -> Optional[str]:
+        """Log the trace if asked for or out of budget; returns the breach, if any"""
+        route = scope.get("route")
+        name = f"{scope['method']} {route.path if route is not None else scope['path']}"
+        budget = DB_CALL_BUDGETS.get(name, DB_CALL_BUDGET)
+        repeated = trace.repeated(N_PLUS_ONE_THRESHOLD)
+        over_budget = len(trace.calls) > budget
+        requested = DB_TRACE_ALL or any(key == b"x-db-trace" for key, _ in scope["headers"])
+        if not (over_budget or repeated or requested):
+            return None
+        
+        report = {
+            "route": name,
+            "db_calls": len(trace.calls),
+            "budget": budget,
+            "db_ms": round(trace.total_ms(), 2),
+            "repeated": repeated,
+            "trace": [{"query": shape, "ms": round(ms, 2), "outcome": outcome} for shape, ms, outcome in trace.calls]
+        }
+        if not (over_budget or repeated):
+            logger.info("db trace %s", json.dumps(report))
+            return None
+        logger.warning("db budget exceeded %s", json.dumps(report))
+        return (
+            f"{name} issued {len(trace.calls)} database calls (budget {budget})"
+            + (f", repeated: {repeated}" if repeated else "")
+        )
+
+def cache_metrics() -> List[str]:
+    standings = standings_cache.stats()
+    flight = single_flight.stats()
+    caches = {
+        "standings": (standings["hits"], standings["misses"]),
+        # Coalesced and TTL-served reads both skip the database
+        "single_flight": (flight["hits"] + flight["coalesced"], flight["executed"])
+    }
+    lines = ["# HELP cache_hits_total Reads served from an in-process cache.", "# TYPE cache_hits_total counter"]
+    lines += [f'cache_hits_total{{cache="{name}"}} {hits}' for name, (hits, _) in caches.items()]
+    lines += ["# HELP cache_misses_total Reads that went to the database.", "# TYPE cache_misses_total counter"]
+    lines += [f'cache_misses_total{{cache="{name}"}} {misses}' for name, (_, misses) in caches.items()]
+    lines += ["# HELP cache_hit_ratio Hits over lookups since start.", "# TYPE cache_hit_ratio gauge"]
+    lines += [
+        f'cache_hit_ratio{{cache="{name}"}} {hits / (hits + misses) if hits + misses else 0:.4f}'
+        for name, (hits, misses) in caches.items()
+    ]
+    loaders = {"teams": team_loader.stats(), "players": player_loader.stats()}
+    lines += ["# HELP batch_loader_loads_total Id lookups requested.", "# TYPE batch_loader_loads_total counter"]
+    lines += [f'batch_loader_loads_total{{loader="{name}"}} {s["loads"]}' for name, s in loaders.items()]
+    lines += ["# HELP batch_loader_batches_total $in queries issued.", "# TYPE batch_loader_batches_total counter"]
+    lines += [f'batch_loader_batches_total{{loader="{name}"}} {s["batches"]}' for name, s in loaders.items()]
+    bus = cluster_bus.stats()
+    lines += ["# HELP cluster_bus_connected Whether the cross-worker change stream is open.",
+              "# TYPE cluster_bus_connected gauge", f"cluster_bus_connected {int(bus['connected'])}"]
+    lines += ["# HELP cluster_bus_changes_total Version bumps seen on the change stream.",
+              "# TYPE cluster_bus_changes_total counter", f"cluster_bus_changes_total {bus['changes']}"]
+    lines += ["# HELP cluster_bus_relayed_total Live updates received from other workers.",
+              "# TYPE cluster_bus_relayed_total counter", f"cluster_bus_relayed_total {bus['relayed']}"]
+    lines += ["# HELP cluster_bus_echoes_total This worker's own live updates skipped on the change stream.",
+              "# TYPE cluster_bus_echoes_total counter", f"cluster_bus_echoes_total {bus['echoes']}"]
+    return lines
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    lines = ["# HELP live_subscribers Open server-sent event streams.", "# TYPE live_subscribers gauge"]
+    lines.append(f"live_subscribers {len(set().union(*live_hub.subscribers.values()))}")
+    for metric in (http_in_flight, http_requests, http_request_duration, mongo_commands, mongo_command_duration):
+        lines += metric.render()
+    lines += cache_metrics()
+    return Response("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4; charset=utf-8")
 
 app.include_router(api_router)
 
+app.add_middleware(PhotoUploadLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-DB-Calls"],
 )
 
+app.add_middleware(DbCallBudgetMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_db_indexes():
+    await ensure_indexes()
+    await assign_default_tournament()
+    await migrate_inline_photos()
+    await change_versions.load(*known_tournaments)
+    start_photo_pool()
+    if client is None:
+        db.start()
+    elif CLUSTER_BUS_ENABLED:
+        cluster_bus.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    await cluster_bus.stop()
+    if client is None:
+        db.close()
+    else:
+        client.close()
+    await stop_photo_pool()
@@ -0,0 +1,981 @@
+"""
+In-memory storage engine with the subset of Motor's collection API that
+server.py uses, selected with STORAGE_BACKEND=memory.
+
+Documents live in per-collection dicts with hash indexes on the leading
+field of every index server.py creates, so id lookups are a dict probe
+rather than a round trip. Query matching and aggregation pipelines reuse
+mongomock's evaluators, so filters behave like they do against Mongo.
+
+Durability is optional: with a snapshot directory every write appends the
+changed documents (and index definitions) to a numbered journal, and a
+periodic snapshot.json, written off the event loop, supersedes the journals
+before it. Startup loads the snapshot and replays the newer journals. GridFS
+file contents are kept as separate files under blobs/, not in documents.
+The directory is locked, so only one process can open it.
+
+watch() gives an in-process change stream over later writes, so code written
+against Mongo change streams can run on a single database shared in-process.
+"""
+import asyncio
+import fcntl
+import functools
+import io
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from bson import ObjectId, json_util
+from gridfs.errors import NoFile
+from mongomock.aggregate import process_pipeline
+from mongomock.filtering import BsonComparable, filter_applies
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "snapshot.json"
+LOCK_FILE = "lock"
+BLOB_DIR = "blobs"
+# journal.<generation>.jsonl; a snapshot of generation N covers every journal before N
+JOURNAL_NAME = re.compile(r"^journal\.(\d+)\.jsonl$")
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte"}
+
+def clone(value):
+    """Copy nested dicts/lists; leaves are immutable BSON values"""
+    if isinstance(value, dict):
+        return {k: clone(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [clone(v) for v in value]
+    return value
+
+def walk(doc: dict, path: str, create: bool = False):
+    """Return (container, last key) for a dotted path, or (None, None) if it does not exist"""
+    parts = path.split(".")
+    node = doc
+    for part in parts[:-1]:
+        if isinstance(node, list) and part.isdigit() and int(part) < len(node):
+            node = node[int(part)]
+        elif isinstance(node, dict):
+            if part not in node:
+                if not create:
+                    return None, None
+                node[part] = {}
+            node = node[part]
+        else:
+            return None, None
+    last = parts[-1]
+    if isinstance(node, list):
+        return (node, int(last)) if last.isdigit() and int(last) < len(node) else (None, None)
+    return (node, last) if isinstance(node, dict) else (None, None)
+
+def get_path(doc: dict, path: str):
+    node, key = walk(doc, path)
+    if node is None:
+        return None
+    if isinstance(node, list):
+        return node[key]
+    return node.get(key)
+
+def set_path(doc: dict, path: str, value):
+    node, key = walk(doc, path, create=True)
+    if node is None:
+        raise ValueError(f"Cannot set {path!r}")
+    node[key] = value
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return clone(doc)
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        result = {}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        for path in include:
+            head, _, rest = path.partition(".")
+            if head not in doc:
+                continue
+            if rest and isinstance(doc[head], dict):
+                result.setdefault(head, {}).update(project(doc[head], {"_id": 0, rest: 1}))
+            elif rest and isinstance(doc[head], list):
+                # Like Mongo, a path into an array projects each embedded document
+                previous = result.get(head, [{} for _ in doc[head]])
+                result[head] = [
+                    {**seen, **project(item, {"_id": 0, rest: 1})}
+                    for seen, item in zip(previous, doc[head]) if isinstance(item, dict)
+                ]
+            else:
+                result[head] = clone(doc[head])
+        return result
+    return {k: clone(v) for k, v in doc.items() if projection.get(k, 1)}
+
+def sort_docs(docs: List[dict], keys: List[tuple]) -> List[dict]:
+    # Stable sorts from the least significant key give mixed-direction ordering
+    for field, direction in reversed(keys):
+        docs.sort(key=lambda d: BsonComparable(get_path(d, field)), reverse=direction < 0)
+    return docs
+
+def pull_matches(condition, element) -> bool:
+    if isinstance(condition, dict) and not any(k.startswith("$") for k in condition):
+        return isinstance(element, dict) and filter_applies(condition, element)
+    return filter_applies({"v": condition}, {"v": element})
+
+def filtered_paths(doc: dict, path: str, array_filters: Optional[List[dict]]) -> List[str]:
+    """Expand each $[name] segment of an update path to the indexes its array filter selects"""
+    head, marker, rest = path.partition(".$[")
+    if not marker:
+        return [path]
+    name, _, tail = rest.partition("]")
+    conditions = [
+        (field, condition)
+        for array_filter in array_filters or []
+        for key, condition in array_filter.items()
+        for identifier, _, field in [key.partition(".")] if identifier == name
+    ]
+    items = get_path(doc, head)
+    if not isinstance(items, list):
+        return []
+    paths = []
+    for index, item in enumerate(items):
+        if all(pull_matches({field: condition} if field else condition, item) for field, condition in conditions):
+            paths.extend(filtered_paths(doc, f"{head}.{index}{tail}", array_filters))
+    return paths
+
+def apply_update(doc: dict, update, array_filters: Optional[List[dict]] = None, inserting: bool = False) -> dict:
+    """Return the updated copy of doc for an operator document or an update pipeline; $setOnInsert applies only when inserting"""
+    if isinstance(update, list):
+        updated = next(process_pipeline([clone(doc)], None, update, None))
+        updated["_id"] = doc["_id"]
+        return updated
+    doc = clone(doc)
+    for operator, fields in update.items():
+        if operator == "$setOnInsert" and not inserting:
+            continue
+        for path, value in (
+            (concrete, value) for path, value in fields.items()
+            for concrete in filtered_paths(doc, path, array_filters)
+        ):
+            if operator in ("$set", "$setOnInsert"):
+                set_path(doc, path, clone(value))
+            elif operator == "$unset":
+                node, key = walk(doc, path)
+                if isinstance(node, dict):
+                    node.pop(key, None)
+            elif operator == "$inc":
+                set_path(doc, path, (get_path(doc, path) or 0) + value)
+            elif operator in ("$push", "$addToSet"):
+                items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                current = get_path(doc, path)
+                if current is None:
+                    current = []
+                    set_path(doc, path, current)
+                for item in items:
+                    if operator == "$push" or item not in current:
+                        current.append(clone(item))
+            elif operator == "$pull":
+                current = get_path(doc, path)
+                if isinstance(current, list):
+                    current[:] = [item for item in current if not pull_matches(value, item)]
+            else:
+                raise NotImplementedError(f"{operator} is not supported by the memory backend")
+    return doc
+
+def gives_order(keys: List[tuple], sort_keys: List[tuple]) -> bool:
+    """Whether an index key, read forwards or backwards, starts with the sort"""
+    if len(sort_keys) > len(keys):
+        return False
+    pairs = list(zip(keys, sort_keys))
+    if any(key[0] != sort[0] for key, sort in pairs):
+        return False
+    return all(key[1] == sort[1] for key, sort in pairs) or all(key[1] == -sort[1] for key, sort in pairs)
+
+def index_key(value):
+    # Python treats True == 1, Mongo does not
+    return (isinstance(value, bool), value)
+
+def command(name: str):
+    """Report each call to the database listener, the way the driver reports commands"""
+    def decorate(method):
+        @functools.wraps(method)
+        async def run(self, *args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await method(self, *args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                spec = args[0] if args and isinstance(args[0], dict) else {}
+                self.database.notify(self.name, name, spec, time.perf_counter() - started, outcome)
+        return run
+    return decorate
+
+class HashIndex:
+    """Equality index on one top-level field; array values stay unindexed and are always candidates"""
+
+    def __init__(self, field: str, unique: bool = False):
+        self.field = field
+        self.unique = unique
+        self.entries: Dict[object, Dict[object, None]] = {}
+        self.loose: Dict[object, None] = {}
+
+    def add(self, key, doc: dict):
+        value = doc.get(self.field)
+        if isinstance(value, (list, dict)):
+            self.loose[key] = None
+            return
+        bucket = self.entries.setdefault(index_key(value), {})
+        if self.unique and bucket and key not in bucket:
+            raise DuplicateKeyError(f"E11000 duplicate key error: {self.field}: {value!r}")
+        bucket[key] = None
+
+    def remove(self, key, doc: dict):
+        value = doc.get(self.field)
+        if isinstance(value, (list, dict)):
+            self.loose.pop(key, None)
+            return
+        bucket = self.entries.get(index_key(value))
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self.entries[index_key(value)]
+
+    def size(self, values: list) -> int:
+        """Upper bound on lookup(values) without materialising it"""
+        return sum(len(self.entries.get(index_key(value), ())) for value in values) + len(self.loose)
+
+    def lookup(self, values: list) -> tuple:
+        """Keys whose value equals one of values, and keys holding arrays that still need matching"""
+        keys = {}
+        for value in values:
+            keys.update(self.entries.get(index_key(value), {}))
+        return list(keys), [key for key in self.loose if key not in keys]
+
+class UniqueKey:
+    """Unique constraint on a compound key; lookups go through the leading field's HashIndex"""
+
+    def __init__(self, fields: List[str]):
+        self.fields = fields
+        self.entries: Dict[tuple, object] = {}
+
+    def value(self, doc: dict) -> Optional[tuple]:
+        values = [doc.get(field) for field in self.fields]
+        if any(isinstance(value, (list, dict)) for value in values):
+            return None
+        return tuple(index_key(value) for value in values)
+
+    def add(self, key, doc: dict):
+        value = self.value(doc)
+        if value is None:
+            return
+        if self.entries.setdefault(value, key) != key:
+            duplicate = {field: doc.get(field) for field in self.fields}
+            raise DuplicateKeyError(f"E11000 duplicate key error: {duplicate!r}")
+
+    def remove(self, key, doc: dict):
+        value = self.value(doc)
+        if value is not None and self.entries.get(value) == key:
+            del self.entries[value]
+
+class MemoryCursor:
+    def __init__(self, collection: "MemoryCollection", query: dict, projection: Optional[dict]):
+        self.collection = collection
+        self.query = query or {}
+        self.projection = projection
+        self.sort_keys: List[tuple] = []
+        self.limit_count = 0
+
+    def sort(self, key_or_list, direction: Optional[int] = None) -> "MemoryCursor":
+        if isinstance(key_or_list, str):
+            self.sort_keys = [(key_or_list, direction or 1)]
+        else:
+            self.sort_keys = list(key_or_list)
+        return self
+
+    def limit(self, count: int) -> "MemoryCursor":
+        self.limit_count = count
+        return self
+
+    def documents(self) -> List[dict]:
+        started = time.perf_counter()
+        docs = self.collection.match(self.query)
+        if self.sort_keys:
+            docs = sort_docs(docs, self.sort_keys)
+        if self.limit_count:
+            docs = docs[:self.limit_count]
+        docs = [project(doc, self.projection) for doc in docs]
+        self.collection.database.notify(self.collection.name, "find", self.query, time.perf_counter() - started, "ok")
+        return docs
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        docs = self.documents()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.documents():
+            yield doc
+
+    async def explain(self) -> dict:
+        self.collection.database.notify(self.collection.name, "explain", self.query, 0.0, "ok")
+        index, ordered = self.collection.plan_for(self.query, self.sort_keys)
+        plan = {"stage": "IXSCAN", "indexName": index} if index else {"stage": "COLLSCAN"}
+        if index:
+            plan = {"stage": "FETCH", "inputStage": plan}
+        if self.sort_keys and not ordered:
+            plan = {"stage": "SORT", "inputStage": plan}
+        return {"queryPlanner": {"winningPlan": plan}}
+
+class AggregateCursor:
+    def __init__(self, docs: List[dict]):
+        self.docs = docs
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        return self.docs[:length] if length else self.docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+class MemoryCollection:
+    def __init__(self, database: "MemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self.docs: Dict[object, dict] = {}
+        self.order: Dict[object, int] = {}
+        self.sequence = 0
+        self.indexes: Dict[str, HashIndex] = {}
+        self.constraints: Dict[str, UniqueKey] = {}
+        self.index_specs: Dict[str, dict] = {}
+
+    # -- internals --
+
+    def plan_for(self, query: dict, sort_keys: List[tuple]) -> tuple:
+        """The index the query planner would pick, and whether it also returns the sort order.
+
+        Indexes are ranked by how long a prefix of their key the query can use:
+        equality fields, then the sort keys, then one range field. An index is
+        only usable if the query constrains its leading field or it gives the
+        sort order by itself.
+        """
+        equality = {
+            field for field, value in query.items()
+            if not field.startswith("$") and (not isinstance(value, dict) or set(value) == {"$in"})
+        }
+        ranged = {field for field, value in query.items() if isinstance(value, dict) and set(value) <= RANGE_OPERATORS}
+        best = None
+        for name, spec in self.index_specs.items():
+            keys = spec["key"]
+            used = 0
+            while used < len(keys) and keys[used][0] in equality:
+                used += 1
+            ordered = gives_order(keys[used:], sort_keys)
+            if ordered:
+                used += len(sort_keys)
+            if used < len(keys) and keys[used][0] in ranged:
+                used += 1
+            if used == 0:
+                continue
+            if best is None or (used, ordered) > best[0]:
+                best = ((used, ordered), name)
+        if best is None:
+            return None, False
+        return best[1], best[0][1]
+
+    def match(self, query: dict) -> List[dict]:
+        if not query:
+            return list(self.docs.values())
+        # Of the indexed equality conditions, scan the one with the fewest candidates;
+        # a leading tournament_id alone would otherwise select the whole tenant
+        best = None
+        for field, value in query.items():
+            index = self.indexes.get(field)
+            if index is None:
+                continue
+            if not isinstance(value, dict):
+                values = [value]
+            elif set(value) == {"$in"} and all(not isinstance(v, (list, dict)) for v in value["$in"]):
+                values = value["$in"]
+            else:
+                continue
+            size = index.size(values)
+            if best is None or size < best[0]:
+                best = size, index, values
+        if best is None:
+            return [doc for doc in self.docs.values() if filter_applies(query, doc)]
+        exact, loose = best[1].lookup(best[2])
+        if len(query) > 1:
+            # Other conditions still need checking on the indexed candidates
+            loose = exact + loose
+            exact = []
+        keys = exact + loose
+        if len(keys) > 1:
+            keys.sort(key=self.order.__getitem__)
+        loose = set(loose)
+        return [
+            self.docs[key] for key in keys
+            if key not in loose or filter_applies(query, self.docs[key])
+        ]
+
+    def add_index(self, name: str, spec: dict, journal: bool = True):
+        key = [tuple(field) for field in spec["key"]]
+        fields = [field for field, _ in key]
+        unique = spec.get("unique", False)
+        self.index_specs[name] = {"key": key, "unique": unique}
+        # Hash indexes serve equality on the leading field; compound keys only add sort order
+        if fields[0] not in self.indexes or (unique and len(fields) == 1):
+            self.indexes[fields[0]] = self.build(HashIndex(fields[0], unique=unique and len(fields) == 1))
+        if unique and len(fields) > 1:
+            self.constraints[name] = self.build(UniqueKey(fields))
+        if journal:
+            self.database.journal_index(self.name, name, self.index_specs[name])
+
+    def maintained(self) -> list:
+        return [*self.indexes.values(), *self.constraints.values()]
+
+    def build(self, index):
+        for key, doc in self.docs.items():
+            index.add(key, doc)
+        return index
+
+    def put(self, doc: dict, journal: bool = True):
+        key = doc["_id"]
+        previous = self.docs.get(key)
+        if previous is not None:
+            for index in self.maintained():
+                index.remove(key, previous)
+        added = []
+        try:
+            for index in self.maintained():
+                index.add(key, doc)
+                added.append(index)
+        except DuplicateKeyError:
+            for index in added:
+                index.remove(key, doc)
+            if previous is not None:
+                for index in self.maintained():
+                    index.add(key, previous)
+            raise
+        if previous is None:
+            self.sequence += 1
+            self.order[key] = self.sequence
+        self.docs[key] = doc
+        if journal:
+            self.database.journal_put(self.name, doc)
+        if self.database.streams:
+            self.database.emit_change(self.name, "insert" if previous is None else "update", key, doc)
+
+    def remove(self, key, journal: bool = True):
+        doc = self.docs.pop(key)
+        self.order.pop(key, None)
+        for index in self.maintained():
+            index.remove(key, doc)
+        if journal:
+            self.database.journal_delete(self.name, key)
+        if self.database.streams:
+            self.database.emit_change(self.name, "delete", key, None)
+        return doc
+
+    def insert(self, document: dict):
+        # Like pymongo, an _id is assigned on the caller's document
+        if "_id" not in document:
+            document["_id"] = ObjectId()
+        self.put(clone(document))
+        return document["_id"]
+
+    def update(self, query: dict, update, multi: bool, upsert: bool) -> dict:
+        matched = self.match(query)
+        if not multi:
+            matched = matched[:1]
+        modified = 0
+        for doc in matched:
+            updated = apply_update(doc, update)
+            if updated != doc:
+                self.put(updated)
+                modified += 1
+        result = {"n": len(matched), "nModified": modified}
+        if not matched and upsert:
+            seed = {k: clone(v) for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+            seed.setdefault("_id", ObjectId())
+            self.put(apply_update(seed, update, inserting=True))
+            result.update(n=1, upserted=seed["_id"])
+        return result
+
+    def delete(self, query: dict, multi: bool) -> int:
+        matched = self.match(query)
+        if not multi:
+            matched = matched[:1]
+        for doc in matched:
+            self.remove(doc["_id"])
+        return len(matched)
+
+    # -- Motor-compatible API --
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> MemoryCursor:
+        return MemoryCursor(self, query, projection)
+
+    @command("find")
+    async def find_one(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> Optional[dict]:
+        docs = self.match(query or {})
+        return project(docs[0], projection) if docs else None
+
+    @command("aggregate")
+    async def count_documents(self, query: dict) -> int:
+        return len(self.match(query))
+
+    @command("insert")
+    async def insert_one(self, document: dict) -> InsertOneResult:
+        return InsertOneResult(self.insert(document), True)
+
+    @command("insert")
+    async def insert_many(self, documents: List[dict], ordered: bool = True) -> InsertManyResult:
+        return InsertManyResult([self.insert(document) for document in documents], True)
+
+    @command("update")
+    async def update_one(self, query: dict, update, upsert: bool = False) -> UpdateResult:
+        return UpdateResult(self.update(query, update, False, upsert), True)
+
+    @command("update")
+    async def update_many(self, query: dict, update, upsert: bool = False) -> UpdateResult:
+        return UpdateResult(self.update(query, update, True, upsert), True)
+
+    @command("delete")
+    async def delete_one(self, query: dict) -> DeleteResult:
+        return DeleteResult({"n": self.delete(query, False)}, True)
+
+    @command("delete")
+    async def delete_many(self, query: dict) -> DeleteResult:
+        return DeleteResult({"n": self.delete(query, True)}, True)
+
+    @command("findAndModify")
+    async def find_one_and_delete(self, query: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        docs = self.match(query)
+        if not docs:
+            return None
+        return project(self.remove(docs[0]["_id"]), projection)
+
+    @command("findAndModify")
+    async def find_one_and_update(self, query: dict, update, projection: Optional[dict] = None,
+                                  upsert: bool = False,
+                                  return_document: bool = ReturnDocument.BEFORE,
+                                  array_filters: Optional[List[dict]] = None) -> Optional[dict]:
+        docs = self.match(query)
+        if not docs:
+            if not upsert:
+                return None
+            upserted = self.update(query, update, False, True)["upserted"]
+            return project(self.docs[upserted], projection) if return_document == ReturnDocument.AFTER else None
+        updated = apply_update(docs[0], update, array_filters)
+        if updated != docs[0]:
+            self.put(updated)
+        return project(updated if return_document == ReturnDocument.AFTER else docs[0], projection)
+
+    async def bulk_write(self, requests: list, ordered: bool = True) -> BulkWriteResult:
+        started = time.perf_counter()
+        totals = {"nInserted": 0, "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+        for index, request in enumerate(requests):
+            if isinstance(request, InsertOne):
+                self.insert(request._doc)
+                totals["nInserted"] += 1
+            elif isinstance(request, (UpdateOne, UpdateMany)):
+                result = self.update(request._filter, request._doc, isinstance(request, UpdateMany), request._upsert)
+                if "upserted" in result:
+                    totals["nUpserted"] += 1
+                    totals["upserted"].append({"index": index, "_id": result["upserted"]})
+                else:
+                    totals["nMatched"] += result["n"]
+                totals["nModified"] += result["nModified"]
+            elif isinstance(request, (DeleteOne, DeleteMany)):
+                totals["nRemoved"] += self.delete(request._filter, isinstance(request, DeleteMany))
+            else:
+                raise NotImplementedError(f"{type(request).__name__} is not supported by the memory backend")
+        if requests:
+            # The driver sends one command per run of same-type operations; one is close enough here
+            name = "insert" if isinstance(requests[0], InsertOne) else "delete" if isinstance(
+                requests[0], (DeleteOne, DeleteMany)) else "update"
+            spec = getattr(requests[0], "_filter", None) or {}
+            self.database.notify(self.name, name, spec, time.perf_counter() - started, "ok")
+        return BulkWriteResult(totals, True)
+
+    def aggregate(self, pipeline: List[dict]) -> AggregateCursor:
+        started = time.perf_counter()
+        docs = [clone(doc) for doc in self.docs.values()]
+        results = list(process_pipeline(docs, self.database.lookup_view, pipeline, None))
+        self.database.notify(self.name, "aggregate", {}, time.perf_counter() - started, "ok")
+        return AggregateCursor(results)
+
+    @command("createIndexes")
+    async def create_indexes(self, models: list) -> List[str]:
+        names = []
+        for model in models:
+            spec = model.document
+            self.add_index(spec["name"], {"key": list(spec["key"].items()), "unique": spec.get("unique", False)})
+            names.append(spec["name"])
+        return names
+
+    @command("listIndexes")
+    async def index_information(self) -> dict:
+        info = {"_id_": {"key": [("_id", 1)]}}
+        info.update({name: dict(spec) for name, spec in self.index_specs.items()})
+        return info
+
+class MemoryGridOut:
+    def __init__(self, file: dict, data: bytes):
+        self._id = file["_id"]
+        self.length = file["length"]
+        self.upload_date = file["uploadDate"]
+        self.metadata = file.get("metadata")
+        self.filename = file.get("filename")
+        self.buffer = io.BytesIO(data)
+
+    def seek(self, position: int):
+        self.buffer.seek(position)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.buffer.read(size)
+
+class MemoryGridFSBucket:
+    """GridFS bucket with one <bucket>.files document per file; contents stay out of the documents.
+
+    With a snapshot directory the bytes go to blobs/<file id>, otherwise they
+    are held in memory, so photos are never journaled or snapshotted as JSON.
+    """
+
+    def __init__(self, database: "MemoryDatabase", bucket_name: str = "fs"):
+        self.files = database[f"{bucket_name}.files"]
+        self.blob_dir = database.snapshot_dir / BLOB_DIR if database.snapshot_dir else None
+        self.blobs: Dict[ObjectId, bytes] = {}
+        if self.blob_dir:
+            self.blob_dir.mkdir(exist_ok=True)
+
+    def write_blob(self, file_id: ObjectId, source) -> int:
+        if self.blob_dir is None:
+            data = source if isinstance(source, bytes) else source.read()
+            self.blobs[file_id] = data
+            return len(data)
+        with open(self.blob_dir / str(file_id), "wb") as out:
+            if isinstance(source, bytes):
+                out.write(source)
+            else:
+                shutil.copyfileobj(source, out)
+            return out.tell()
+
+    def read_blob(self, file_id: ObjectId) -> bytes:
+        if self.blob_dir is None:
+            return self.blobs[file_id]
+        return (self.blob_dir / str(file_id)).read_bytes()
+
+    async def upload_from_stream(self, filename: str, source, chunk_size_bytes: Optional[int] = None,
+                                 metadata: Optional[dict] = None) -> ObjectId:
+        file_id = ObjectId()
+        length = await asyncio.to_thread(self.write_blob, file_id, source)
+        self.files.put({
+            "_id": file_id,
+            "filename": filename,
+            "length": length,
+            "uploadDate": datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0),
+            "metadata": metadata
+        })
+        return file_id
+
+    async def open_download_stream(self, file_id) -> MemoryGridOut:
+        file = self.files.docs.get(file_id)
+        if file is None:
+            raise NoFile(f"no file in gridfs with _id {file_id!r}")
+        return MemoryGridOut(file, await asyncio.to_thread(self.read_blob, file_id))
+
+    async def delete(self, file_id):
+        if file_id not in self.files.docs:
+            raise NoFile(f"no file in gridfs with _id {file_id!r}")
+        self.files.remove(file_id)
+        if self.blob_dir is None:
+            self.blobs.pop(file_id, None)
+        else:
+            (self.blob_dir / str(file_id)).unlink(missing_ok=True)
+
+class MemoryChangeStream:
+    """Changes made after the stream opened, filtered by the pipeline's $match stages.
+
+    fullDocument is the document as written, like updateLookup without the race.
+    There is no history, so resume_after is ignored and a reopened stream starts
+    from now.
+    """
+
+    def __init__(self, database: "MemoryDatabase", pipeline: Optional[list], max_await_time_ms: int):
+        self.database = database
+        self.filters = [stage["$match"] for stage in pipeline or [] if "$match" in stage]
+        self.max_await_seconds = max_await_time_ms / 1000
+        self.pending: asyncio.Queue = asyncio.Queue()
+        self.resume_token = None
+        self.alive = True
+
+    async def __aenter__(self) -> "MemoryChangeStream":
+        self.database.streams.add(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.alive = False
+        self.database.streams.discard(self)
+
+    def offer(self, change: dict):
+        if all(filter_applies(condition, change) for condition in self.filters):
+            self.pending.put_nowait(change)
+
+    async def try_next(self) -> Optional[dict]:
+        """The next change, or None if none arrives within max_await_time_ms"""
+        try:
+            change = await asyncio.wait_for(self.pending.get(), self.max_await_seconds)
+        except asyncio.TimeoutError:
+            return None
+        self.resume_token = change["_id"]
+        return change
+
+class MemoryDatabase:
+    """Collections by attribute or item access, with optional snapshot + journal persistence"""
+
+    def __init__(self, snapshot_dir: Optional[str] = None, snapshot_seconds: float = 60.0, listener=None):
+        self.collections: Dict[str, MemoryCollection] = {}
+        # listener(collection, command, filter, seconds, outcome) sees every operation, like a command listener
+        self.listener = listener
+        self.lookup_view = DatabaseView(self)
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self.snapshot_seconds = snapshot_seconds
+        self.journal = None
+        self.lock = None
+        self.generation = 0
+        self.written_generation = 0
+        self.snapshot_lock = threading.Lock()
+        self.dirty = False
+        self.snapshot_task: Optional[asyncio.Task] = None
+        self.streams: set = set()
+        self.change_count = 0
+        if self.snapshot_dir:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            self.acquire_lock()
+            self.load()
+            self.journal = open(self.journal_path(self.generation), "a", encoding="utf-8")
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        collection = self.collections.get(name)
+        if collection is None:
+            collection = self.collections[name] = MemoryCollection(self, name)
+        return collection
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def notify(self, collection: str, command_name: str, spec: dict, seconds: float, outcome: str):
+        if self.listener is not None:
+            self.listener(collection, command_name, spec, seconds, outcome)
+
+    # -- change streams --
+
+    def watch(self, pipeline: Optional[list] = None, full_document: Optional[str] = None,
+              resume_after=None, max_await_time_ms: int = 1000) -> MemoryChangeStream:
+        return MemoryChangeStream(self, pipeline, max_await_time_ms)
+
+    def emit_change(self, collection: str, operation: str, key, doc: Optional[dict]):
+        self.change_count += 1
+        change = {
+            "_id": {"_data": self.change_count},
+            "operationType": operation,
+            "ns": {"coll": collection},
+            "documentKey": {"_id": key}
+        }
+        if doc is not None:
+            change["fullDocument"] = clone(doc)
+        for stream in list(self.streams):
+            stream.offer(change)
+
+    # -- persistence --
+
+    def acquire_lock(self):
+        """Hold the directory for this process; a second process would fork the data and lose writes"""
+        self.lock = open(self.snapshot_dir / LOCK_FILE, "w")
+        try:
+            fcntl.flock(self.lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.lock.close()
+            self.lock = None
+            raise RuntimeError(
+                f"Memory store {self.snapshot_dir} is in use by another process; "
+                f"the memory backend supports a single worker"
+            )
+
+    def journal_path(self, generation: int) -> Path:
+        return self.snapshot_dir / f"journal.{generation}.jsonl"
+
+    def journals(self) -> List[tuple]:
+        found = []
+        for path in self.snapshot_dir.iterdir():
+            match = JOURNAL_NAME.match(path.name)
+            if match:
+                found.append((int(match.group(1)), path))
+        return sorted(found)
+
+    def journal_write(self, entry: dict):
+        if self.journal is not None:
+            self.journal.write(json_util.dumps(entry) + "\n")
+            self.journal.flush()
+            self.dirty = True
+
+    def journal_put(self, collection: str, doc: dict):
+        self.journal_write({"c": collection, "put": doc})
+
+    def journal_delete(self, collection: str, key):
+        self.journal_write({"c": collection, "del": key})
+
+    def journal_index(self, collection: str, name: str, spec: dict):
+        self.journal_write({"c": collection, "index": name, "spec": spec})
+
+    def replay(self, path: Path) -> int:
+        replayed = 0
+        with open(path, "rb+") as journal:
+            intact = 0
+            for line in iter(journal.readline, b""):
+                try:
+                    entry = json_util.loads(line)
+                except ValueError:
+                    # A crash can leave a torn last line; drop it so new entries start clean
+                    logger.warning(f"Truncating unreadable journal tail in {path}")
+                    journal.truncate(intact)
+                    break
+                collection = self[entry["c"]]
+                if "put" in entry:
+                    collection.put(entry["put"], journal=False)
+                elif "index" in entry:
+                    collection.add_index(entry["index"], entry["spec"], journal=False)
+                elif entry["del"] in collection.docs:
+                    collection.remove(entry["del"], journal=False)
+                intact += len(line)
+                replayed += 1
+        return replayed
+
+    def load(self):
+        snapshot_path = self.snapshot_dir / SNAPSHOT_FILE
+        generation = 0
+        if snapshot_path.exists():
+            snapshot = json_util.loads(snapshot_path.read_text(encoding="utf-8"))
+            generation = snapshot.get("generation", 0)
+            # Indexes first, so restored documents are checked against unique keys
+            for name, specs in snapshot.get("indexes", {}).items():
+                for index_name, spec in specs.items():
+                    self[name].add_index(index_name, spec, journal=False)
+            for name, docs in snapshot["collections"].items():
+                for doc in docs:
+                    self[name].put(doc, journal=False)
+        replayed = 0
+        self.generation = self.written_generation = generation
+        for journal_generation, path in self.journals():
+            if journal_generation < generation:
+                # Already in the snapshot; left behind by a crash before cleanup
+                path.unlink()
+                continue
+            replayed += self.replay(path)
+            self.generation = journal_generation
+        self.dirty = replayed > 0
+        logger.info(
+            f"Loaded memory store from {self.snapshot_dir}: "
+            f"{sum(len(c.docs) for c in self.collections.values())} documents, {replayed} journal entries"
+        )
+
+    def capture(self) -> dict:
+        """Freeze the current state for a snapshot and move new writes to the next journal.
+
+        Documents are replaced, never mutated, once stored, so the captured
+        lists can be serialized on another thread while writes continue.
+        """
+        self.generation += 1
+        payload = {
+            "generation": self.generation,
+            "indexes": {name: dict(c.index_specs) for name, c in self.collections.items() if c.index_specs},
+            "collections": {name: list(c.docs.values()) for name, c in self.collections.items()}
+        }
+        self.journal.close()
+        self.journal = open(self.journal_path(self.generation), "a", encoding="utf-8")
+        self.dirty = False
+        return payload
+
+    def write_snapshot(self, payload: dict):
+        """Write a captured state to snapshot.json atomically and drop the journals it covers"""
+        with self.snapshot_lock:
+            generation = payload["generation"]
+            if generation <= self.written_generation:
+                return
+            path = self.snapshot_dir / SNAPSHOT_FILE
+            temp = path.with_suffix(".tmp")
+            with open(temp, "w", encoding="utf-8") as out:
+                out.write(json_util.dumps(payload))
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(temp, path)
+            self.written_generation = generation
+            for journal_generation, journal_path in self.journals():
+                if journal_generation < generation:
+                    journal_path.unlink()
+
+    def snapshot(self):
+        if self.snapshot_dir is not None:
+            self.write_snapshot(self.capture())
+
+    async def snapshot_periodically(self):
+        while True:
+            await asyncio.sleep(self.snapshot_seconds)
+            if self.dirty:
+                try:
+                    await asyncio.to_thread(self.write_snapshot, self.capture())
+                except OSError as e:
+                    # The journals it would have replaced are kept, so nothing is lost
+                    self.dirty = True
+                    logger.error(f"Memory store snapshot failed: {e}")
+
+    def start(self):
+        if self.snapshot_dir and self.snapshot_task is None:
+            self.snapshot_task = asyncio.ensure_future(self.snapshot_periodically())
+
+    def close(self):
+        if self.snapshot_task is not None:
+            self.snapshot_task.cancel()
+            self.snapshot_task = None
+        if self.journal is not None:
+            if self.dirty:
+                self.snapshot()
+            self.journal.close()
+            self.journal = None
+        if self.lock is not None:
+            fcntl.flock(self.lock, fcntl.LOCK_UN)
+            self.lock.close()
+            self.lock = None
+
+class DatabaseView:
+    """Synchronous find() per collection, as mongomock's $lookup stage expects"""
+
+    def __init__(self, database: MemoryDatabase):
+        self.database = database
+
+    def get_collection(self, name: str) -> "CollectionView":
+        return CollectionView(self.database[name])
+
+class CollectionView:
+    def __init__(self, collection: MemoryCollection):
+        self.collection = collection
+
+    def find(self, query: dict) -> List[dict]:
+        return [clone(doc) for doc in self.collection.match(query)]
@@ -0,0 +1,47 @@
+// Helpers for pages that follow the /live event stream.
+//
+// Events carry what changed, so pages merge them into what they already hold
+// rather than refetching; a refetch from every open page on every event would
+// land on the server all at once.
+
+const REFETCH_JITTER_MS = 3000;
+
+// Merge a clash_score or match_score payload into a list of clashes. Returns
+// the same list when the clash is not in it.
+export function mergeClashEvent(clashes, type, payload) {
+  const { clash_id, score, ...diff } = payload;
+  if (!clashes.some(c => c.id === clash_id)) return clashes;
+  return clashes.map(c => {
+    if (c.id !== clash_id) return c;
+    if (type !== 'match_score') return { ...c, ...diff };
+    const scores = c.scores || [];
+    const merged = scores.some(s => s.match_number === score.match_number)
+      ? scores.map(s => (s.match_number === score.match_number ? score : s))
+      : [...scores, score];
+    return { ...c, ...diff, scores: merged };
+  });
+}
+
+// Insert or replace clashes by id, keeping the order of the ones already held.
+export function upsertClashes(clashes, incoming) {
+  const byId = new Map(incoming.map(c => [c.id, c]));
+  const kept = clashes.map(c => (byId.has(c.id) ? { ...c, ...byId.get(c.id) } : c));
+  const known = new Set(clashes.map(c => c.id));
+  return [...kept, ...incoming.filter(c => !known.has(c.id))];
+}
+
+// Wrap a fetch for events that carry too little to merge. Calls within one
+// window share a single fetch, started after a random delay so open pages
+// spread their requests out instead of arriving together.
+export function jittered(fetch) {
+  let timer = null;
+  const schedule = () => {
+    if (timer) return;
+    timer = setTimeout(() => {
+      timer = null;
+      fetch();
+    }, Math.random() * REFETCH_JITTER_MS);
+  };
+  schedule.cancel = () => clearTimeout(timer);
+  return schedule;
+}
@@ -0,0 +1,41 @@
+import axios from 'axios';
+
+const RETRY_DELAYS_MS = [500, 1500, 3000];
+
+// Score writes retry network failures under one Idempotency-Key so a save
+// that reached the server before the connection dropped is applied once.
+
+// PUT a clash score. expected_version makes the server reject the save if
+// someone else scored the clash since it was loaded.
+export async function submitClashScore(api, clash, body) {
+  return withRetries((headers) => axios.put(
+    `${api}/clashes/${clash.id}/score`,
+    { ...body, expected_version: clash.version ?? 0 },
+    { headers }
+  ));
+}
+
+// Add (or with negative points, take back) points in one set of one match.
+// Cheap enough to send on every rally; completing the match still goes
+// through submitClashScore.
+export async function addMatchPoints(api, clashId, matchNumber, team, setNumber = 1, points = 1) {
+  return withRetries((headers) => axios.patch(
+    `${api}/clashes/${clashId}/matches/${matchNumber}`,
+    { team, set_number: setNumber, points },
+    { headers }
+  ));
+}
+
+async function withRetries(send) {
+  const headers = { 'Idempotency-Key': crypto.randomUUID() };
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await send(headers);
+    } catch (error) {
+      if (error.response || attempt >= RETRY_DELAYS_MS.length) {
+        throw error;
+      }
+      await new Promise((resolve) => setTimeout(resolve, RETRY_DELAYS_MS[attempt]));
+    }
+  }
+}
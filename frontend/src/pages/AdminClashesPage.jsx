@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { motion } from 'framer-motion';
-import { Plus, Edit, Trash2, Bell, Lock, Trophy, CheckCircle, Users } from 'lucide-react';
+import { Plus, Minus, Edit, Trash2, Bell, Lock, Trophy, CheckCircle, Users } from 'lucide-react';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
 import { Card, CardContent } from '../components/ui/card';
@@ -10,6 +10,7 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '.
 import { Textarea } from '../components/ui/textarea';
 import { toast } from 'sonner';
 import axios from 'axios';
+import { submitClashScore, addMatchPoints } from '../lib/scoring';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -249,6 +250,51 @@ export default function AdminClashesPage() {
     setScoreForm({ ...scoreForm, scores: updated });
   };
   
+  // Rally-by-rally scoring: each tap is saved straight away, and the dialog
+  // takes the new version so the final Save is not rejected as stale
+  const addPoint = async (matchIdx, team, points) => {
+    const matchNumber = scoreForm.scores[matchIdx].match_number ?? matchIdx + 1;
+    try {
+      const { data } = await addMatchPoints(API, editingClash.id, matchNumber, team, 1, points);
+      setEditingClash((clash) => ({ ...clash, version: data.version }));
+      setScoreForm((form) => ({
+        ...form,
+        status: 'live',
+        scores: form.scores.map((score, idx) => idx === matchIdx
+          ? { ...score, team1_set1: data.score.team1_set1, team2_set1: data.score.team2_set1 }
+          : score)
+      }));
+    } catch (error) {
+      console.error('Error adding point:', error);
+      toast.error(error.response?.data?.detail || 'Failed to add point');
+    }
+  };
+  
+  const renderPointButtons = (matchIdx, team, score, disabled, gameComplete) => (
+    <div className="grid grid-cols-2 gap-2">
+      <Button
+        type="button"
+        size="sm"
+        variant="outline"
+        onClick={() => addPoint(matchIdx, team, -1)}
+        disabled={disabled || !score[`team${team}_set1`]}
+        data-testid={`game-${matchIdx + 1}-team${team}-minus`}
+      >
+        <Minus className="h-4 w-4" />
+      </Button>
+      <Button
+        type="button"
+        size="sm"
+        variant="outline"
+        onClick={() => addPoint(matchIdx, team, 1)}
+        disabled={disabled || gameComplete}
+        data-testid={`game-${matchIdx + 1}-team${team}-plus`}
+      >
+        <Plus className="h-4 w-4" />
+      </Button>
+    </div>
+  );
+  
   const handleUpdateScore = async (e) => {
     e.preventDefault();
     
@@ -271,7 +317,7 @@ export default function AdminClashesPage() {
     });
     
     try {
-      const response = await axios.put(`${API}/clashes/${editingClash.id}/score`, {
+      const response = await submitClashScore(API, editingClash, {
         clash_id: editingClash.id,
         scores: updatedScores,
         team1_games_won: team1Wins,
@@ -822,6 +868,7 @@ export default function AdminClashesPage() {
                               }`}
                               data-testid={`game-${idx + 1}-team1-score`}
                             />
+                            {renderPointButtons(idx, 1, score, editingClash.is_locked || clashAlreadyWon || !allPlayersSelected, isGameComplete)}
                           </div>
                           
                           <div className="text-center">
@@ -844,6 +891,7 @@ export default function AdminClashesPage() {
                               }`}
                               data-testid={`game-${idx + 1}-team2-score`}
                             />
+                            {renderPointButtons(idx, 2, score, editingClash.is_locked || clashAlreadyWon || !allPlayersSelected, isGameComplete)}
                           </div>
                         </div>
                         
@@ -9,6 +9,7 @@ import { Dialog, DialogContent, DialogHeader, DialogTitle } from '../components/
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../components/ui/select';
 import { toast } from 'sonner';
 import axios from 'axios';
+import { submitClashScore } from '../lib/scoring';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -40,26 +41,14 @@ export default function AdminKnockoutsPage() {
 
   const fetchData = async () => {
     try {
-      const [poolXStatusRes, poolYStatusRes, poolXTeamsRes, poolYTeamsRes, clashesRes, teamsRes, playersRes] = await Promise.all([
-        axios.get(`${API}/pool-status/X`),
-        axios.get(`${API}/pool-status/Y`),
-        axios.get(`${API}/leaderboard?pool=X`),
-        axios.get(`${API}/leaderboard?pool=Y`),
-        axios.get(`${API}/clashes`),
-        axios.get(`${API}/teams`),
-        axios.get(`${API}/players`)
-      ]);
-      setPoolXStatus(poolXStatusRes.data);
-      setPoolYStatus(poolYStatusRes.data);
-      setPoolXTeams(poolXTeamsRes.data);
-      setPoolYTeams(poolYTeamsRes.data);
-      setTeams(teamsRes.data);
-      setPlayers(playersRes.data);
-      
-      const knockouts = clashesRes.data.filter(c => 
-        ['semifinal', 'final', 'third_place'].includes(c.stage)
-      );
-      setKnockoutClashes(knockouts);
+      const { data } = await axios.get(`${API}/views/admin/knockouts`);
+      setPoolXStatus(data.pool_status.X);
+      setPoolYStatus(data.pool_status.Y);
+      setPoolXTeams(data.standings.X);
+      setPoolYTeams(data.standings.Y);
+      setTeams(data.teams);
+      setPlayers(data.players);
+      setKnockoutClashes(data.knockout_clashes);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
@@ -236,7 +225,7 @@ export default function AdminKnockoutsPage() {
     });
     
     try {
-      await axios.put(`${API}/clashes/${editingClash.id}/score`, {
+      await submitClashScore(API, editingClash, {
         clash_id: editingClash.id,
         scores: updatedScores,
         team1_games_won: team1Wins,
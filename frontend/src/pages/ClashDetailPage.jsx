@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import { ArrowLeft, Trophy, Image as ImageIcon, Clock } from 'lucide-react';
@@ -16,27 +16,51 @@ export default function ClashDetailPage() {
   const [teams, setTeams] = useState({ team1: null, team2: null });
   const [players, setPlayers] = useState([]);
   const [loading, setLoading] = useState(true);
+  const knownPlayerIds = useRef(new Set());
   
   useEffect(() => {
     fetchClashDetails();
-    const interval = setInterval(fetchClashDetails, 15000);
-    return () => clearInterval(interval);
+    const interval = setInterval(fetchClashDetails, 120000);
+    const source = new EventSource(`${API}/live?clash_id=${id}`);
+    source.addEventListener('clash_score', (event) => {
+      const { clash_id, ...diff } = JSON.parse(event.data);
+      if (clash_id === id) {
+        setClash(prev => (prev ? { ...prev, ...diff } : prev));
+        // Newly picked players are not in the expanded roster yet
+        const referenced = (diff.scores || []).flatMap(s => [
+          s.team1_player1_id, s.team1_player2_id, s.team2_player1_id, s.team2_player2_id
+        ]).filter(Boolean);
+        if (referenced.some(pid => !knownPlayerIds.current.has(pid))) {
+          fetchClashDetails();
+        }
+      }
+    });
+    source.addEventListener('match_score', (event) => {
+      const { clash_id, score, ...diff } = JSON.parse(event.data);
+      if (clash_id === id) {
+        setClash(prev => {
+          if (!prev) return prev;
+          const scores = prev.scores.some(s => s.match_number === score.match_number)
+            ? prev.scores.map(s => (s.match_number === score.match_number ? score : s))
+            : [...prev.scores, score];
+          return { ...prev, ...diff, scores };
+        });
+      }
+    });
+    return () => {
+      clearInterval(interval);
+      source.close();
+    };
   }, [id]);
   
   const fetchClashDetails = async () => {
     try {
-      const [clashRes, playersRes] = await Promise.all([
-        axios.get(`${API}/clashes/${id}`),
-        axios.get(`${API}/players`)
-      ]);
-      setClash(clashRes.data);
-      setPlayers(playersRes.data);
-      
-      const [team1Res, team2Res] = await Promise.all([
-        axios.get(`${API}/teams/${clashRes.data.team1_id}`),
-        axios.get(`${API}/teams/${clashRes.data.team2_id}`)
-      ]);
-      setTeams({ team1: team1Res.data, team2: team2Res.data });
+      const { data } = await axios.get(`${API}/clashes/${id}?expand=teams,players`);
+      const { team1, team2, players: clashPlayers, ...clashData } = data;
+      setClash(clashData);
+      setPlayers(clashPlayers);
+      knownPlayerIds.current = new Set(clashPlayers.map(p => p.id));
+      setTeams({ team1, team2 });
     } catch (error) {
       console.error('Error fetching clash details:', error);
     } finally {
@@ -261,7 +285,7 @@ export default function ClashDetailPage() {
               </CardHeader>
               <CardContent>
                 <img
-                  src={clash.photo_url}
+                  src={clash.photo_url.startsWith('/') ? `${BACKEND_URL}${clash.photo_url}` : clash.photo_url}
                   alt="Clash"
                   className="w-full rounded-lg"
                   data-testid="clash-photo"
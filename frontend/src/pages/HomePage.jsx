@@ -1,39 +1,71 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { motion } from 'framer-motion';
 import { Link } from 'react-router-dom';
 import { Calendar, Trophy, Users, Zap, ArrowRight } from 'lucide-react';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import axios from 'axios';
+import { jittered, mergeClashEvent } from '../lib/live';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
 export default function HomePage() {
-  const [liveClashes, setLiveClashes] = useState([]);
-  const [upcomingClashes, setUpcomingClashes] = useState([]);
+  const [clashes, setClashes] = useState({ live: [], upcoming: [] });
   const [topTeams, setTopTeams] = useState([]);
   const [notifications, setNotifications] = useState([]);
   const [loading, setLoading] = useState(true);
+  const clashesRef = useRef(clashes);
+  clashesRef.current = clashes;
+  const { live: liveClashes, upcoming: upcomingClashes } = clashes;
   
   useEffect(() => {
     fetchData();
-    const interval = setInterval(fetchData, 30000);
-    return () => clearInterval(interval);
+    // Live updates are merged in place; the slow poll only covers a dropped stream
+    const interval = setInterval(fetchData, 120000);
+    const refetch = jittered(fetchData);
+    const applyClashEvent = (type) => (event) => {
+      const payload = JSON.parse(event.data);
+      const { live, upcoming } = clashesRef.current;
+      const wasUpcoming = upcoming.some(c => c.id === payload.clash_id);
+      if (!wasUpcoming && !live.some(c => c.id === payload.clash_id)) {
+        // A clash past the first few upcoming ones went live
+        if (payload.status === 'live') refetch();
+        return;
+      }
+      setClashes(prev => {
+        const merged = mergeClashEvent([...prev.live, ...prev.upcoming], type, payload);
+        return {
+          live: merged.filter(c => c.status === 'live'),
+          upcoming: merged.filter(c => c.status === 'upcoming')
+        };
+      });
+      // The next upcoming clash is not on the page yet
+      if (wasUpcoming && payload.status && payload.status !== 'upcoming') refetch();
+    };
+    const source = new EventSource(`${API}/live`);
+    source.addEventListener('clash_score', applyClashEvent('clash_score'));
+    source.addEventListener('match_score', applyClashEvent('match_score'));
+    // Top teams need the recomputed standings, which the event does not carry
+    source.addEventListener('standings', refetch);
+    source.addEventListener('notification', (event) => {
+      const notification = JSON.parse(event.data);
+      setNotifications(prev => [notification, ...prev.filter(n => n.id !== notification.id)].slice(0, 5));
+    });
+    return () => {
+      clearInterval(interval);
+      refetch.cancel();
+      source.close();
+    };
   }, []);
   
   const fetchData = async () => {
     try {
-      const [clashesRes, teamsRes, notifsRes] = await Promise.all([
-        axios.get(`${API}/clashes`),
-        axios.get(`${API}/leaderboard`),
-        axios.get(`${API}/notifications`)
-      ]);
+      const { data } = await axios.get(`${API}/views/home`);
       
-      setLiveClashes(clashesRes.data.filter(m => m.status === 'live'));
-      setUpcomingClashes(clashesRes.data.filter(m => m.status === 'upcoming').slice(0, 3));
-      setTopTeams(teamsRes.data.slice(0, 4));
-      setNotifications(notifsRes.data.slice(0, 5));
+      setClashes({ live: data.live_clashes, upcoming: data.upcoming_clashes });
+      setTopTeams(data.top_teams);
+      setNotifications(data.notifications);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
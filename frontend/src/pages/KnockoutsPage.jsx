@@ -4,6 +4,7 @@ import { Trophy, Zap, Clock, CheckCircle, Swords, Crown, Medal } from 'lucide-re
 import { Card, CardContent } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import axios from 'axios';
+import { jittered, mergeClashEvent, upsertClashes } from '../lib/live';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -21,31 +22,38 @@ export default function KnockoutsPage() {
 
   useEffect(() => {
     fetchData();
-    const interval = setInterval(fetchData, 30000);
-    return () => clearInterval(interval);
+    // Live updates are merged in place; the slow poll only covers a dropped stream
+    const interval = setInterval(fetchData, 120000);
+    const refetch = jittered(fetchData);
+    const applyClashEvent = (type) => (event) => {
+      const payload = JSON.parse(event.data);
+      setKnockoutClashes(prev => mergeClashEvent(prev, type, payload));
+    };
+    const source = new EventSource(`${API}/live`);
+    source.addEventListener('clash_score', applyClashEvent('clash_score'));
+    source.addEventListener('match_score', applyClashEvent('match_score'));
+    // Pool standings and completion are recomputed server side
+    source.addEventListener('standings', refetch);
+    source.addEventListener('knockouts', (event) => {
+      const { clashes } = JSON.parse(event.data);
+      setKnockoutClashes(prev => upsertClashes(prev, clashes));
+    });
+    return () => {
+      clearInterval(interval);
+      refetch.cancel();
+      source.close();
+    };
   }, []);
 
   const fetchData = async () => {
     try {
-      const [poolXStatusRes, poolYStatusRes, poolXTeamsRes, poolYTeamsRes, clashesRes, teamsRes] = await Promise.all([
-        axios.get(`${API}/pool-status/X`),
-        axios.get(`${API}/pool-status/Y`),
-        axios.get(`${API}/leaderboard?pool=X`),
-        axios.get(`${API}/leaderboard?pool=Y`),
-        axios.get(`${API}/clashes`),
-        axios.get(`${API}/teams`)
-      ]);
-      setPoolXStatus(poolXStatusRes.data);
-      setPoolYStatus(poolYStatusRes.data);
-      setPoolXTeams(poolXTeamsRes.data);
-      setPoolYTeams(poolYTeamsRes.data);
-      setTeams(teamsRes.data);
-      
-      // Filter knockout clashes (semifinal, final, third_place)
-      const knockouts = clashesRes.data.filter(c => 
-        ['semifinal', 'final', 'third_place'].includes(c.stage)
-      );
-      setKnockoutClashes(knockouts);
+      const { data } = await axios.get(`${API}/views/knockouts`);
+      setPoolXStatus(data.pool_status.X);
+      setPoolYStatus(data.pool_status.Y);
+      setPoolXTeams(data.standings.X);
+      setPoolYTeams(data.standings.Y);
+      setTeams(data.teams);
+      setKnockoutClashes(data.knockout_clashes);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
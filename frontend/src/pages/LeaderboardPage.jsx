@@ -4,6 +4,7 @@ import { Trophy, TrendingUp, Medal, CheckCircle } from 'lucide-react';
 import { Card, CardContent } from '../components/ui/card';
 import { Tabs, TabsContent, TabsList, TabsTrigger } from '../components/ui/tabs';
 import axios from 'axios';
+import { jittered } from '../lib/live';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -18,8 +19,16 @@ export default function LeaderboardPage() {
   
   useEffect(() => {
     fetchLeaderboard();
-    const interval = setInterval(fetchLeaderboard, 30000);
-    return () => clearInterval(interval);
+    const interval = setInterval(fetchLeaderboard, 120000);
+    // The event names the teams that moved but not their new positions
+    const refetch = jittered(fetchLeaderboard);
+    const source = new EventSource(`${API}/live`);
+    source.addEventListener('standings', refetch);
+    return () => {
+      clearInterval(interval);
+      refetch.cancel();
+      source.close();
+    };
   }, []);
   
   const fetchLeaderboard = async () => {
@@ -0,0 +1,14 @@
+"""
+In-process tests import the backend directly; they run it on the memory
+storage engine so no Mongo server is needed. The HTTP tests in
+test_backend_api.py are unaffected and still target REACT_APP_BACKEND_URL.
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test")
@@ -6,9 +6,38 @@ import pytest
 import requests
 import os
 import uuid
+import time
+import json
+import base64
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
 
+
+@pytest.fixture
+def test_clash():
+    """Create two teams and a clash between them"""
+    teams = []
+    for pool_number in (6, 7):
+        response = requests.post(f"{BASE_URL}/api/teams", json={
+            "name": f"TEST_ClashTeam_{uuid.uuid4().hex[:8]}",
+            "pool": "Y",
+            "pool_number": pool_number
+        })
+        teams.append(response.json())
+    response = requests.post(f"{BASE_URL}/api/clashes", json={
+        "clash_name": "TEST clash",
+        "team1_id": teams[0]["id"],
+        "team2_id": teams[1]["id"],
+        "stage": "league"
+    })
+    clash = response.json()
+    yield clash
+    # Cleanup
+    requests.delete(f"{BASE_URL}/api/clashes/{clash['id']}")
+    for team in teams:
+        requests.delete(f"{BASE_URL}/api/teams/{team['id']}")
+
+
 class TestAdminLogin:
     """Admin authentication tests"""
     
@@ -295,5 +324,714 @@ class TestPlayerLimits:
         assert len(response.json()) == 8
 
 
+class TestConditionalGet:
+    """ETag / If-None-Match tests for read endpoints"""
+    
+    def test_unchanged_teams_return_304(self):
+        """Test that repeating a request with its ETag returns 304"""
+        response = requests.get(f"{BASE_URL}/api/teams")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        
+        cached_response = requests.get(f"{BASE_URL}/api/teams", headers={"If-None-Match": etag})
+        assert cached_response.status_code == 304
+    
+    def test_write_invalidates_etag(self):
+        """Test that creating a team changes the teams ETag"""
+        etag = requests.get(f"{BASE_URL}/api/teams").headers["ETag"]
+        create_response = requests.post(f"{BASE_URL}/api/teams", json={
+            "name": f"TEST_Team_{uuid.uuid4().hex[:8]}",
+            "pool": "Y",
+            "pool_number": 7
+        })
+        assert create_response.status_code == 200
+        
+        response = requests.get(f"{BASE_URL}/api/teams", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        
+        # Cleanup
+        requests.delete(f"{BASE_URL}/api/teams/{create_response.json()['id']}")
+
+
+class TestStandingsCache:
+    """Cached leaderboard invalidation tests"""
+    
+    def test_score_commit_refreshes_cached_standings(self):
+        """Test that a cached leaderboard reflects a clash completed after it was cached"""
+        tournament = requests.post(f"{BASE_URL}/api/tournaments", json={"name": "TEST_Standings"}).json()
+        headers = {"X-Tournament-Id": tournament["id"]}
+        teams = [
+            requests.post(f"{BASE_URL}/api/teams", json={
+                "name": f"TEST_Standings_{number}", "pool": "X", "pool_number": number
+            }, headers=headers).json()
+            for number in (1, 2)
+        ]
+        clash = requests.post(f"{BASE_URL}/api/clashes", json={
+            "clash_name": "TEST standings clash", "team1_id": teams[0]["id"], "team2_id": teams[1]["id"],
+            "stage": "league"
+        }, headers=headers).json()
+        
+        leaderboard_url = f"{BASE_URL}/api/leaderboard"
+        before = requests.get(leaderboard_url, params={"pool": "X"}, headers=headers).json()
+        assert [team["points"] for team in before] == [0, 0]
+        misses = requests.get(f"{BASE_URL}/api/cache-stats").json()["standings"]["misses"]
+        
+        response = requests.put(f"{BASE_URL}/api/clashes/{clash['id']}/score", json={
+            "clash_id": clash["id"],
+            "scores": [
+                {"match_number": number, "team1_set1": 10, "team2_set1": 21, "completed": True}
+                for number in (1, 2, 3)
+            ],
+            "team1_games_won": 0,
+            "team2_games_won": 3,
+            "status": "completed",
+            "expected_version": clash["version"]
+        }, headers=headers)
+        assert response.json()["winner_id"] == teams[1]["id"]
+        
+        after = requests.get(leaderboard_url, params={"pool": "X"}, headers=headers).json()
+        assert [(team["id"], team["points"]) for team in after] == [(teams[1]["id"], 2), (teams[0]["id"], 0)]
+        assert requests.get(f"{BASE_URL}/api/cache-stats").json()["standings"]["misses"] == misses + 1
+
+
+class TestClashPhotos:
+    """Clash photo upload and streaming tests"""
+    
+    def test_photo_is_served_by_url(self, test_clash):
+        """Test that an uploaded photo is referenced by URL and supports ranges"""
+        photo_data = bytes(range(256)) * 4
+        files = {"photo": ("court.png", photo_data, "image/png")}
+        response = requests.put(f"{BASE_URL}/api/clashes/{test_clash['id']}/photo", files=files)
+        assert response.status_code == 200
+        photo_url = response.json()["photo_url"]
+        assert photo_url.startswith(f"/api/clashes/{test_clash['id']}/photo")
+        
+        clash = requests.get(f"{BASE_URL}/api/clashes/{test_clash['id']}").json()
+        assert clash["photo_url"] == photo_url
+        
+        full_response = requests.get(f"{BASE_URL}{photo_url}")
+        assert full_response.status_code == 200
+        assert full_response.content == photo_data
+        assert full_response.headers["content-type"] == "image/png"
+        
+        range_response = requests.get(f"{BASE_URL}{photo_url}", headers={"Range": "bytes=10-19"})
+        assert range_response.status_code == 206
+        assert range_response.content == photo_data[10:20]
+        assert range_response.headers["content-range"] == f"bytes 10-19/{len(photo_data)}"
+    
+    def test_only_versioned_urls_are_immutable(self, test_clash):
+        """Test that a photo URL without the current file id must revalidate"""
+        files = {"photo": ("court.png", b"\x89PNG" + b"x" * 64, "image/png")}
+        photo_url = requests.put(f"{BASE_URL}/api/clashes/{test_clash['id']}/photo", files=files).json()["photo_url"]
+        
+        versioned = requests.get(f"{BASE_URL}{photo_url}")
+        assert "immutable" in versioned.headers["cache-control"]
+        
+        for query in ("size=original", "size=original&v=stale"):
+            response = requests.get(f"{BASE_URL}/api/clashes/{test_clash['id']}/photo?{query}")
+            assert response.headers["cache-control"] == "no-cache"
+            assert response.headers["etag"] == versioned.headers["etag"]
+
+
+class TestClashExpansion:
+    """expand= tests for clash detail"""
+    
+    def test_clash_expand_teams(self, test_clash):
+        """Test that expand=teams embeds both teams in the clash detail"""
+        response = requests.get(f"{BASE_URL}/api/clashes/{test_clash['id']}", params={"expand": "teams,players"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["team1"]["id"] == test_clash["team1_id"]
+        assert data["team2"]["id"] == test_clash["team2_id"]
+        assert data["players"] == []
+    
+    def test_unknown_expansion_rejected(self, test_clash):
+        """Test that an unknown expansion returns 400"""
+        response = requests.get(f"{BASE_URL}/api/clashes/{test_clash['id']}", params={"expand": "venue"})
+        assert response.status_code == 400
+
+
+class TestScoreCommits:
+    """Versioned, idempotent score submission tests"""
+
+    def score_body(self, clash, expected_version):
+        return {
+            "clash_id": clash["id"],
+            "scores": [{"match_number": 1, "team1_set1": 11, "team2_set1": 7}],
+            "team1_games_won": 0,
+            "team2_games_won": 0,
+            "status": "live",
+            "expected_version": expected_version
+        }
+
+    def test_retry_with_same_key_is_replayed(self, test_clash):
+        """Test that resending a submission with its Idempotency-Key does not apply it twice"""
+        url = f"{BASE_URL}/api/clashes/{test_clash['id']}/score"
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+        body = self.score_body(test_clash, test_clash["version"])
+        first = requests.put(url, json=body, headers=headers)
+        assert first.status_code == 200
+        assert first.json()["version"] == test_clash["version"] + 1
+
+        retry = requests.put(url, json=body, headers=headers)
+        assert retry.status_code == 200
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotency-Replayed"] == "true"
+
+        clash = requests.get(f"{BASE_URL}/api/clashes/{test_clash['id']}").json()
+        assert clash["version"] == test_clash["version"] + 1
+
+    def test_key_reused_on_another_route_is_refused(self, test_clash):
+        """Test that a key used for PUT /score and then PATCH /matches does not replay the score response"""
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+        score = requests.put(f"{BASE_URL}/api/clashes/{test_clash['id']}/score",
+                             json=self.score_body(test_clash, test_clash["version"]), headers=headers)
+        assert score.status_code == 200
+
+        points = requests.patch(f"{BASE_URL}/api/clashes/{test_clash['id']}/matches/1",
+                                json={"team": 1}, headers=headers)
+        assert points.status_code == 422
+        assert "Idempotency-Replayed" not in points.headers
+
+        clash = requests.get(f"{BASE_URL}/api/clashes/{test_clash['id']}").json()
+        assert clash["version"] == score.json()["version"]
+        assert clash["scores"][0]["team1_set1"] == 11
+
+    def test_completed_clash_credits_standings_once(self, test_clash):
+        """Test that completing a clash credits team and player stats, and re-commits do not double-count"""
+        url = f"{BASE_URL}/api/clashes/{test_clash['id']}/score"
+        lineup = {}
+        for side, team_id in ((1, test_clash["team1_id"]), (2, test_clash["team2_id"])):
+            for slot in (1, 2):
+                player = requests.post(f"{BASE_URL}/api/players", json={
+                    "name": f"TEST_Stats_{side}{slot}", "team_id": team_id
+                }).json()
+                lineup[f"team{side}_player{slot}_id"] = player["id"]
+        
+        def match(number, team1_points, team2_points):
+            return {"match_number": number, "team1_set1": team1_points, "team2_set1": team2_points,
+                    "completed": True, **lineup}
+        
+        def matches_played():
+            return [
+                requests.get(f"{BASE_URL}/api/players/{pid}").json()["matches_played"]
+                for pid in lineup.values()
+            ]
+        
+        body = self.score_body(test_clash, test_clash["version"])
+        body["scores"] = [match(1, 21, 10), match(2, 21, 15)]
+        assert requests.put(url, json=body).status_code == 200
+        assert matches_played() == [2, 2, 2, 2]
+        
+        body["expected_version"] += 1
+        assert requests.put(url, json=body).status_code == 200
+        assert matches_played() == [2, 2, 2, 2]
+        
+        body["expected_version"] += 1
+        body["scores"].append(match(3, 21, 19))
+        response = requests.put(url, json=body)
+        assert response.json()["is_locked"] is True
+        assert matches_played() == [3, 3, 3, 3]
+        
+        winner = requests.get(f"{BASE_URL}/api/teams/{test_clash['team1_id']}").json()
+        loser = requests.get(f"{BASE_URL}/api/teams/{test_clash['team2_id']}").json()
+        assert (winner["points"], winner["point_difference"], winner["matches_played"]) == (2, 3, 1)
+        assert (loser["points"], loser["point_difference"], loser["matches_played"]) == (0, -3, 1)
+        assert requests.put(url, json={**body, "expected_version": body["expected_version"] + 1}).status_code == 400
+        assert requests.get(f"{BASE_URL}/api/teams/{test_clash['team1_id']}").json()["points"] == 2
+
+    def test_stale_version_rejected(self, test_clash):
+        """Test that a submission based on an old version returns 409"""
+        url = f"{BASE_URL}/api/clashes/{test_clash['id']}/score"
+        assert requests.put(url, json=self.score_body(test_clash, test_clash["version"])).status_code == 200
+        response = requests.put(url, json=self.score_body(test_clash, test_clash["version"]))
+        assert response.status_code == 409
+
+    def test_match_points_increment(self, test_clash):
+        """Test that PATCHing points adds to one set of one match and bumps the version"""
+        url = f"{BASE_URL}/api/clashes/{test_clash['id']}/matches/2"
+        for team in (1, 1, 2):
+            response = requests.patch(url, json={"team": team})
+            assert response.status_code == 200
+        data = response.json()
+        assert data["version"] == test_clash["version"] + 3
+        assert data["score"]["match_number"] == 2
+        assert (data["score"]["team1_set1"], data["score"]["team2_set1"]) == (2, 1)
+
+        response = requests.patch(url, json={"team": 2, "points": -1})
+        assert response.status_code == 200
+        assert response.json()["score"]["team2_set1"] == 0
+
+        clash = requests.get(f"{BASE_URL}/api/clashes/{test_clash['id']}").json()
+        assert clash["status"] == "live"
+        assert clash["version"] == test_clash["version"] + 4
+
+    def test_match_points_rejected_below_zero(self, test_clash):
+        """Test that taking back more points than were scored fails"""
+        url = f"{BASE_URL}/api/clashes/{test_clash['id']}/matches/1"
+        assert requests.patch(url, json={"team": 1}).status_code == 200
+        response = requests.patch(url, json={"team": 1, "points": -2})
+        assert response.status_code == 409
+
+    def test_match_points_rejected_after_completion(self, test_clash):
+        """Test that a completed match no longer takes point updates"""
+        url = f"{BASE_URL}/api/clashes/{test_clash['id']}/score"
+        body = self.score_body(test_clash, test_clash["version"])
+        body["scores"][0].update({"team1_set1": 21, "completed": True})
+        assert requests.put(url, json=body).status_code == 200
+        response = requests.patch(f"{BASE_URL}/api/clashes/{test_clash['id']}/matches/1", json={"team": 2})
+        assert response.status_code == 409
+
+    def test_match_points_rejections_explained(self, test_clash):
+        """Test that a point update matching nothing reports why"""
+        missing = requests.patch(f"{BASE_URL}/api/clashes/missing/matches/1", json={"team": 1})
+        assert missing.status_code == 404
+        url = f"{BASE_URL}/api/clashes/{test_clash['id']}/matches/3"
+        response = requests.patch(url, json={"team": 1, "set_number": 2})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "League matches are a single set"
+
+    def test_score_events_feed(self, test_clash):
+        """Test that every score change is logged and the feed resumes from a seq"""
+        base = f"{BASE_URL}/api/clashes/{test_clash['id']}"
+        for team in (1, 2, 1):
+            assert requests.patch(f"{base}/matches/1", json={"team": team}).status_code == 200
+        body = self.score_body(test_clash, test_clash["version"] + 3)
+        assert requests.put(f"{base}/score", json=body).status_code == 200
+
+        events = requests.get(f"{base}/events").json()
+        assert [e["seq"] for e in events] == [1, 2, 3, 4]
+        assert [e["type"] for e in events] == ["points", "points", "points", "commit"]
+        assert events[0]["data"] == {"match_number": 1, "field": "team1_set1", "points": 1}
+
+        later = requests.get(f"{base}/events", params={"since": 2}).json()
+        assert [e["seq"] for e in later] == [3, 4]
+
+    def test_replay_rebuilds_state(self, test_clash):
+        """Test that replaying the log reproduces the stored clash and any earlier version"""
+        base = f"{BASE_URL}/api/clashes/{test_clash['id']}"
+        for team in (1, 1, 2):
+            assert requests.patch(f"{base}/matches/2", json={"team": team}).status_code == 200
+
+        clash = requests.get(base).json()
+        replay = requests.get(f"{base}/replay").json()
+        assert replay["seq"] == clash["version"] == 3
+        assert replay["scores"] == clash["scores"]
+        assert replay["status"] == clash["status"]
+
+        earlier = requests.get(f"{base}/replay", params={"seq": 1}).json()
+        match = next(s for s in earlier["scores"] if s["match_number"] == 2)
+        assert (match["team1_set1"], match["team2_set1"]) == (1, 0)
+
+        assert requests.get(f"{base}/replay", params={"seq": 99}).status_code == 404
+
+
+class TestPagination:
+    """Keyset pagination tests for list endpoints"""
+    
+    def test_clash_pages_cover_full_list(self):
+        """Test that following X-Next-Cursor returns every clash exactly once"""
+        all_clashes = requests.get(f"{BASE_URL}/api/clashes").json()
+        
+        paged_ids = []
+        params = {"limit": 3}
+        while True:
+            response = requests.get(f"{BASE_URL}/api/clashes", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 3
+            paged_ids.extend(c["id"] for c in page)
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if not next_cursor:
+                break
+            params["after"] = next_cursor
+        
+        assert paged_ids == [c["id"] for c in all_clashes]
+    
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = requests.get(f"{BASE_URL}/api/clashes", params={"after": "not-a-cursor"})
+        assert response.status_code == 400
+    
+    def test_cursor_with_non_string_keys_rejected(self):
+        """Test that a well-formed cursor carrying operators or numbers is rejected, not queried"""
+        for keys in ([{"$gt": ""}, "id"], ["2024-01-01", 5], {"a": 1, "b": 2}):
+            cursor = base64.urlsafe_b64encode(json.dumps(keys).encode()).decode()
+            response = requests.get(f"{BASE_URL}/api/clashes", params={"after": cursor})
+            assert response.status_code == 400
+            assert response.json()["detail"] == "Invalid cursor"
+
+
+class TestChangeFeed:
+    """/api/changes incremental sync tests"""
+    
+    def test_changes_since_returns_only_later_writes(self):
+        """Test that only documents written after the given change_seq are returned"""
+        first = requests.post(f"{BASE_URL}/api/teams", json={
+            "name": f"TEST_Feed_{uuid.uuid4().hex[:8]}", "pool": "X", "pool_number": 1
+        }).json()
+        second = requests.post(f"{BASE_URL}/api/teams", json={
+            "name": f"TEST_Feed_{uuid.uuid4().hex[:8]}", "pool": "X", "pool_number": 2
+        }).json()
+        assert second["change_seq"] > first["change_seq"]
+        
+        response = requests.get(f"{BASE_URL}/api/changes", params={"since": first["change_seq"]})
+        assert response.status_code == 200
+        team_ids = [t["id"] for t in response.json()["teams"]]
+        assert second["id"] in team_ids
+        assert first["id"] not in team_ids
+        
+        for team in (first, second):
+            requests.delete(f"{BASE_URL}/api/teams/{team['id']}")
+    
+    def test_delete_leaves_tombstone(self):
+        """Test that deleting a team and its players is reported as deletions"""
+        team = requests.post(f"{BASE_URL}/api/teams", json={
+            "name": f"TEST_Feed_{uuid.uuid4().hex[:8]}", "pool": "Y", "pool_number": 1
+        }).json()
+        player = requests.post(f"{BASE_URL}/api/players", json={
+            "name": "TEST_Feed_Player", "team_id": team["id"]
+        }).json()
+        assert requests.delete(f"{BASE_URL}/api/teams/{team['id']}").status_code == 200
+        
+        data = requests.get(f"{BASE_URL}/api/changes", params={"since": player["change_seq"]}).json()
+        assert team["id"] in data["deleted"]["teams"]
+        assert player["id"] in data["deleted"]["players"]
+        assert team["id"] not in [t["id"] for t in data["teams"]]
+    
+    def test_unsettled_page_has_no_etag(self):
+        """Test that a page holding its cursor back behind a fresh write cannot be revalidated"""
+        team = requests.post(f"{BASE_URL}/api/teams", json={
+            "name": f"TEST_Feed_{uuid.uuid4().hex[:8]}", "pool": "X", "pool_number": 1
+        }).json()
+        response = requests.get(f"{BASE_URL}/api/changes", params={"since": team["change_seq"] - 1})
+        assert team["id"] in [t["id"] for t in response.json()["teams"]]
+        assert response.json()["next"] < team["change_seq"]
+        assert "etag" not in response.headers
+        requests.delete(f"{BASE_URL}/api/teams/{team['id']}")
+    
+    def test_sequences_are_per_tournament(self):
+        """Test that each tournament numbers its changes from its own counter"""
+        tournament = requests.post(f"{BASE_URL}/api/tournaments", json={"name": "TEST_Feed Tournament"}).json()
+        team = requests.post(
+            f"{BASE_URL}/api/teams",
+            json={"name": f"TEST_Feed_{uuid.uuid4().hex[:8]}", "pool": "X", "pool_number": 1},
+            headers={"X-Tournament-Id": tournament["id"]}
+        ).json()
+        assert team["change_seq"] == 1
+    
+    def test_out_of_range_cursor_rejected(self):
+        """Test that a cursor beyond int64 is a validation error rather than a server error"""
+        for path in ("/api/changes", "/api/clashes/missing/events"):
+            response = requests.get(f"{BASE_URL}{path}", params={"since": 10**30})
+            assert response.status_code == 422
+
+
+class TestTournaments:
+    """Tournament partitioning tests"""
+    
+    def test_teams_are_isolated_per_tournament(self):
+        """Test that a team created in one tournament is not visible in another"""
+        first = requests.post(f"{BASE_URL}/api/tournaments", json={"name": "TEST_Tournament A"}).json()
+        second = requests.post(f"{BASE_URL}/api/tournaments", json={"name": "TEST_Tournament B"}).json()
+        team = requests.post(
+            f"{BASE_URL}/api/teams",
+            json={"name": f"TEST_Tenant_{uuid.uuid4().hex[:8]}", "pool": "X", "pool_number": 1},
+            headers={"X-Tournament-Id": first["id"]}
+        ).json()
+        assert team["tournament_id"] == first["id"]
+        
+        first_teams = requests.get(f"{BASE_URL}/api/teams", headers={"X-Tournament-Id": first["id"]}).json()
+        second_teams = requests.get(f"{BASE_URL}/api/teams", params={"tournament_id": second["id"]}).json()
+        default_teams = requests.get(f"{BASE_URL}/api/teams").json()
+        assert [t["id"] for t in first_teams] == [team["id"]]
+        assert second_teams == []
+        assert team["id"] not in [t["id"] for t in default_teams]
+        
+        other = requests.get(f"{BASE_URL}/api/teams/{team['id']}", headers={"X-Tournament-Id": second["id"]})
+        assert other.status_code == 404
+        leaderboard = requests.get(
+            f"{BASE_URL}/api/leaderboard", params={"pool": "X"}, headers={"X-Tournament-Id": second["id"]}
+        ).json()
+        assert leaderboard == []
+        
+        requests.delete(f"{BASE_URL}/api/teams/{team['id']}", headers={"X-Tournament-Id": first["id"]})
+    
+    def test_unknown_tournament_not_found(self):
+        """Test that requests naming an unknown tournament return 404"""
+        response = requests.get(f"{BASE_URL}/api/teams", headers={"X-Tournament-Id": "no-such-tournament"})
+        assert response.status_code == 404
+    
+    def test_duplicate_tournament_id_rejected(self):
+        """Test that creating a tournament with an existing id returns 409"""
+        tournament_id = f"test-{uuid.uuid4().hex[:8]}"
+        assert requests.post(f"{BASE_URL}/api/tournaments", json={"name": "TEST", "id": tournament_id}).status_code == 200
+        assert requests.post(f"{BASE_URL}/api/tournaments", json={"name": "TEST", "id": tournament_id}).status_code == 409
+
+
+class TestSparseFields:
+    """fields= projection tests"""
+    
+    def test_teams_fields_are_trimmed(self):
+        """Test that only the requested fields (plus id) are returned"""
+        response = requests.get(f"{BASE_URL}/api/teams", params={"fields": "name,points"})
+        assert response.status_code == 200
+        for team in response.json():
+            assert set(team.keys()) == {"id", "name", "points"}
+    
+    def test_unknown_field_rejected(self):
+        """Test that an unknown field name returns 400"""
+        response = requests.get(f"{BASE_URL}/api/clashes", params={"fields": "not_a_field"})
+        assert response.status_code == 400
+
+
+class TestBatchLookup:
+    """ids= batch lookup tests"""
+    
+    def test_get_teams_by_ids(self):
+        """Test that ids= returns the requested teams in order and skips unknown ids"""
+        created = []
+        for _ in range(2):
+            response = requests.post(f"{BASE_URL}/api/teams", json={
+                "name": f"TEST_BatchTeam_{uuid.uuid4().hex[:8]}",
+                "pool": "Y",
+                "pool_number": 7
+            })
+            created.append(response.json())
+        
+        ids = ",".join([created[1]["id"], "nonexistent-id-12345", created[0]["id"]])
+        response = requests.get(f"{BASE_URL}/api/teams", params={"ids": ids})
+        assert response.status_code == 200
+        assert [t["id"] for t in response.json()] == [created[1]["id"], created[0]["id"]]
+        
+        # Cleanup
+        for team in created:
+            requests.delete(f"{BASE_URL}/api/teams/{team['id']}")
+    
+    def test_ids_from_another_tournament_are_not_returned(self):
+        """Test that ids= on /teams and /players only finds documents in the request's tournament"""
+        tournament = requests.post(f"{BASE_URL}/api/tournaments", json={"name": "TEST_BatchScope"}).json()
+        headers = {"X-Tournament-Id": tournament["id"]}
+        team = requests.post(f"{BASE_URL}/api/teams", json={
+            "name": f"TEST_BatchScope_{uuid.uuid4().hex[:8]}", "pool": "X", "pool_number": 1
+        }, headers=headers).json()
+        player = requests.post(f"{BASE_URL}/api/players", json={
+            "name": "TEST_BatchScope_Player", "team_id": team["id"]
+        }, headers=headers).json()
+        
+        for path, doc in (("teams", team), ("players", player)):
+            own = requests.get(f"{BASE_URL}/api/{path}", params={"ids": doc["id"]}, headers=headers)
+            assert [d["id"] for d in own.json()] == [doc["id"]]
+            other = requests.get(f"{BASE_URL}/api/{path}", params={"ids": doc["id"]})
+            assert other.status_code == 200
+            assert other.json() == []
+
+
+class TestLiveUpdates:
+    """Server-sent live update stream tests"""
+    
+    def test_live_stream_opens(self):
+        """Test that the live stream responds with an event stream"""
+        with requests.get(f"{BASE_URL}/api/live", stream=True, timeout=10) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            first_line = next(response.iter_lines(decode_unicode=True))
+            assert first_line.startswith("retry:")
+
+
+PEER_URL = os.environ.get('BACKEND_PEER_URL', '').rstrip('/')
+
+
+@pytest.mark.skipif(not PEER_URL, reason="BACKEND_PEER_URL not set")
+class TestClusterBus:
+    """Cross-worker invalidation tests.
+    
+    Needs a second backend process on the same database, behind BACKEND_PEER_URL,
+    and a replica set for change streams; a single node is enough:
+    mongod --replSet rs0, then rs.initiate() in mongosh.
+    """
+    
+    def wait_for(self, check, seconds=5):
+        deadline = time.time() + seconds
+        while time.time() < deadline:
+            if check():
+                return True
+            time.sleep(0.1)
+        return False
+    
+    def test_write_on_one_worker_invalidates_the_other(self):
+        """Test that a peer's cached team list is revalidated after a write elsewhere"""
+        etag = requests.get(f"{PEER_URL}/api/teams").headers["ETag"]
+        team = requests.post(f"{BASE_URL}/api/teams", json={
+            "name": f"TEST_Cluster_{uuid.uuid4().hex[:8]}", "pool": "X", "pool_number": 1
+        }).json()
+        
+        def refreshed():
+            response = requests.get(f"{PEER_URL}/api/teams", headers={"If-None-Match": etag})
+            return response.status_code == 200 and team["id"] in [t["id"] for t in response.json()]
+        
+        assert self.wait_for(refreshed)
+        requests.delete(f"{BASE_URL}/api/teams/{team['id']}")
+    
+    def test_live_update_reaches_the_other_worker(self):
+        """Test that a notification posted to one worker streams from the other"""
+        with requests.get(f"{PEER_URL}/api/live", stream=True, timeout=10) as stream:
+            lines = stream.iter_lines(decode_unicode=True)
+            next(lines)
+            requests.post(f"{BASE_URL}/api/notifications", json={"title": "TEST_Cluster", "message": "relay"})
+            assert any(line == "event: notification" for line in lines)
+
+
+class TestPoolStatus:
+    """/api/pool-status completion tests"""
+    
+    def test_counts_league_clashes_within_each_pool(self):
+        """Test that each pool counts its own league clashes and completes when all are locked"""
+        tournament = requests.post(f"{BASE_URL}/api/tournaments", json={"name": "TEST_PoolStatus"}).json()
+        headers = {"X-Tournament-Id": tournament["id"]}
+        teams = {
+            (pool, number): requests.post(f"{BASE_URL}/api/teams", json={
+                "name": f"TEST_Pool_{pool}{number}", "pool": pool, "pool_number": number
+            }, headers=headers).json()["id"]
+            for pool in ("X", "Y") for number in (1, 2)
+        }
+        
+        def clash(first, second):
+            return requests.post(f"{BASE_URL}/api/clashes", json={
+                "clash_name": "TEST pool clash", "team1_id": teams[first], "team2_id": teams[second],
+                "stage": "league"
+            }, headers=headers).json()
+        
+        def complete(created):
+            response = requests.put(f"{BASE_URL}/api/clashes/{created['id']}/score", json={
+                "clash_id": created["id"],
+                "scores": [
+                    {"match_number": number, "team1_set1": 21, "team2_set1": 15, "completed": True}
+                    for number in (1, 2, 3)
+                ],
+                "team1_games_won": 3,
+                "team2_games_won": 0,
+                "status": "completed",
+                "expected_version": created["version"]
+            }, headers=headers)
+            assert response.json()["is_locked"] is True
+        
+        complete(clash(("X", 1), ("X", 2)))
+        clash(("X", 1), ("X", 2))
+        complete(clash(("Y", 1), ("Y", 2)))
+        # A clash across pools belongs to neither
+        clash(("X", 1), ("Y", 1))
+        
+        statuses = requests.get(f"{BASE_URL}/api/pool-status", headers=headers).json()
+        assert statuses["X"] == {"pool": "X", "total_clashes": 2, "completed_clashes": 1, "is_complete": False}
+        assert statuses["Y"] == {"pool": "Y", "total_clashes": 1, "completed_clashes": 1, "is_complete": True}
+        assert requests.get(f"{BASE_URL}/api/pool-status/Y", headers=headers).json() == statuses["Y"]
+
+
+class TestPageViews:
+    """/api/views/* bundle tests"""
+    
+    @pytest.fixture
+    def tournament(self):
+        """A fresh tournament with two teams per pool, a live clash and a notification"""
+        tournament = requests.post(f"{BASE_URL}/api/tournaments", json={"name": "TEST_Views"}).json()
+        headers = {"X-Tournament-Id": tournament["id"]}
+        teams = [
+            requests.post(f"{BASE_URL}/api/teams", json={
+                "name": f"TEST_View_{pool}{number}", "pool": pool, "pool_number": number
+            }, headers=headers).json()
+            for pool in ("X", "Y") for number in (1, 2)
+        ]
+        clash = requests.post(f"{BASE_URL}/api/clashes", json={
+            "clash_name": "TEST view clash", "team1_id": teams[0]["id"], "team2_id": teams[1]["id"],
+            "stage": "league"
+        }, headers=headers).json()
+        requests.patch(f"{BASE_URL}/api/clashes/{clash['id']}/matches/1", json={"team": 1}, headers=headers)
+        requests.post(f"{BASE_URL}/api/notifications", json={
+            "title": "TEST", "message": "TEST view notification"
+        }, headers=headers)
+        return headers
+    
+    def get(self, path, headers, **params):
+        response = requests.get(f"{BASE_URL}/api/{path}", params=params, headers=headers)
+        assert response.status_code == 200
+        return response.json()
+    
+    def test_home_view_matches_endpoints(self, tournament):
+        """Test that the home bundle holds what the separate endpoints return"""
+        view = self.get("views/home", tournament)
+        live = self.get("clashes", tournament, status="live")
+        assert len(live) == 1
+        assert [c["id"] for c in view["live_clashes"]] == [c["id"] for c in live]
+        assert view["live_clashes"][0]["version"] == live[0]["version"]
+        assert view["top_teams"] == self.get("leaderboard", tournament)[:4]
+        assert view["notifications"] == self.get("notifications", tournament)[:5]
+    
+    def test_knockouts_view_matches_endpoints(self, tournament):
+        """Test that the knockouts bundle holds what the separate endpoints return"""
+        view = self.get("views/knockouts", tournament)
+        for pool in ("X", "Y"):
+            assert view["standings"][pool] == self.get("leaderboard", tournament, pool=pool)
+            assert view["pool_status"][pool] == self.get(f"pool-status/{pool}", tournament)
+        teams = self.get("teams", tournament)
+        assert sorted(t["id"] for t in view["teams"]) == sorted(t["id"] for t in teams)
+        assert view["knockout_clashes"] == []
+        assert "players" not in view
+
+
+class TestIndexReport:
+    """/api/admin/index-report tests"""
+    
+    def test_no_route_query_scans_a_collection(self):
+        """Test that every explained route query is served, and sorted, by an index"""
+        response = requests.get(f"{BASE_URL}/api/admin/index-report")
+        assert response.status_code == 200
+        report = response.json()
+        assert report["collscans"] == []
+        for route in report["routes"]:
+            assert route["indexes"], route["route"]
+            assert "COLLSCAN" not in route["stages"]
+            # The index must cover the sort too, not just the leading field
+            assert "SORT" not in route["stages"], route["route"]
+        assert "id_unique" in report["indexes"]["teams"]
+
+
+class TestMetrics:
+    """Prometheus metrics endpoint tests"""
+
+    def test_metrics_label_routes_by_template(self):
+        """Test that requests are counted under their route template"""
+        requests.get(f"{BASE_URL}/api/teams/nonexistent-id-12345")
+        response = requests.get(f"{BASE_URL}/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'route="/api/teams/{team_id}",status="404"' in response.text
+        assert "nonexistent-id-12345" not in response.text
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+
+    def test_live_streams_are_not_in_flight_requests(self):
+        """Test that an open /api/live stream is counted as a subscriber, not a slow request"""
+        with requests.get(f"{BASE_URL}/api/live", stream=True, timeout=5) as stream:
+            # Keep the iterator: closing it would close the stream
+            chunks = stream.iter_content(chunk_size=None)
+            next(chunks)
+            metrics = requests.get(f"{BASE_URL}/metrics").text
+        assert "http_requests_in_flight 1" in metrics.splitlines()
+        assert "live_subscribers 1" in metrics.splitlines()
+        assert 'http_request_duration_seconds_count{method="GET",route="/api/live"}' not in metrics
+
+
+class TestDbCallBudget:
+    """Per-request database call accounting tests"""
+
+    def test_responses_report_db_calls(self):
+        """Test that responses carry the number of database calls they made"""
+        response = requests.get(f"{BASE_URL}/api/teams/nonexistent-id-12345")
+        assert response.status_code == 404
+        assert int(response.headers["X-DB-Calls"]) == 1
+        assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,110 @@
+"""
+Cluster bus tests: two buses in one process share a memory database, standing
+in for two workers on one replica set.
+"""
+import asyncio
+
+from pymongo.errors import OperationFailure
+
+import server
+from storage import MemoryDatabase
+
+
+class Worker:
+    def __init__(self, database):
+        self.versions = server.ChangeVersions(database)
+        self.hub = server.LiveHub()
+        self.bus = server.ClusterBus(database, self.versions, self.hub)
+
+    def etag(self, tournament_id="t"):
+        return self.versions.etag(tournament_id, ["teams"])
+
+
+async def settle(*workers):
+    """Wait until every bus has its stream open and has drained what is pending"""
+    for _ in range(50):
+        await asyncio.sleep(0.02)
+        if all(worker.bus.connected for worker in workers):
+            break
+    await asyncio.sleep(0.1)
+
+
+async def run_pair(scenario):
+    database = MemoryDatabase()
+    first, second = Worker(database), Worker(database)
+    first.bus.start()
+    second.bus.start()
+    try:
+        await settle(first, second)
+        await scenario(database, first, second)
+    finally:
+        await first.bus.stop()
+        await second.bus.stop()
+
+
+class TestClusterBus:
+    """Cross-worker invalidation and relay, in-process"""
+
+    def test_bump_gives_every_worker_the_same_etag(self, monkeypatch):
+        """Test that a write counted by one worker moves the other worker to the same ETag"""
+        monkeypatch.setattr(server, "CLUSTER_AWAIT_MS", 20)
+
+        async def scenario(database, first, second):
+            before = second.etag()
+            await first.versions.bump("t", "teams")
+            await settle(first, second)
+            assert second.etag() != before
+            assert second.etag() == first.etag()
+            assert second.etag("other") == first.etag("other")
+
+        asyncio.run(run_pair(scenario))
+
+    def test_restarted_worker_keeps_the_etag_but_a_reset_database_does_not(self):
+        """Test that a new process serves the stored ETag, and a fresh database a different one"""
+        async def bumped(database):
+            worker = Worker(database)
+            await worker.versions.bump("t", "teams")
+            return worker.etag()
+
+        async def run():
+            database = MemoryDatabase()
+            served = await bumped(database)
+            restarted = Worker(database)
+            await restarted.versions.load("t")
+            return served, restarted.etag(), await bumped(MemoryDatabase())
+
+        served, restarted, reset = asyncio.run(run())
+        assert restarted == served
+        assert reset != served
+
+    def test_live_updates_reach_only_the_other_worker(self, monkeypatch):
+        """Test that a forwarded live update is delivered by the peer and not echoed back"""
+        monkeypatch.setattr(server, "CLUSTER_AWAIT_MS", 20)
+
+        async def scenario(database, first, second):
+            own = first.hub.subscribe(["tournament:t"])
+            peer = second.hub.subscribe(["tournament:t"])
+            first.bus.forward(["tournament:t"], "event: ping\ndata: {}\n\n")
+            await settle(first, second)
+            assert peer.get_nowait() == "event: ping\ndata: {}\n\n"
+            assert own.empty()
+            assert (first.bus.echoes, second.bus.relayed) == (1, 1)
+
+        asyncio.run(run_pair(scenario))
+
+    def test_unsupported_change_streams_stop_relaying(self):
+        """Test that a standalone server turns the bus off instead of filling live_events"""
+        class Standalone:
+            def watch(self, *args, **kwargs):
+                raise OperationFailure("not a replica set", code=server.CHANGE_STREAMS_UNSUPPORTED)
+
+        async def run():
+            worker = Worker(Standalone())
+            worker.bus.start()
+            await asyncio.sleep(0.05)
+            assert worker.bus.outbox is None
+            assert worker.bus.tasks == []
+            worker.bus.forward(["tournament:t"], "event: ping\ndata: {}\n\n")
+            await worker.bus.stop()
+
+        asyncio.run(run())
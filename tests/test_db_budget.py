@@ -0,0 +1,40 @@
+"""
+Database call budget tests, run in-process so the budget can be changed per test.
+"""
+import asyncio
+
+import httpx
+
+import server
+
+
+async def get(path: str) -> httpx.Response:
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(path)
+
+
+class TestStrictBudget:
+    """DB_BUDGET_STRICT behaviour"""
+
+    def test_breach_fails_the_request(self, monkeypatch):
+        """Test that a request over budget is answered with a 500 naming the breach"""
+        monkeypatch.setattr(server, "DB_BUDGET_STRICT", True)
+        monkeypatch.setattr(server, "DB_CALL_BUDGET", 0)
+        response = asyncio.run(get("/api/teams"))
+        assert response.status_code == 500
+        assert "budget 0" in response.json()["detail"]
+        assert response.headers["X-DB-Calls"] == "1"
+
+    def test_within_budget_passes(self, monkeypatch):
+        """Test that the same request within budget is served normally"""
+        monkeypatch.setattr(server, "DB_BUDGET_STRICT", True)
+        response = asyncio.run(get("/api/teams"))
+        assert response.status_code == 200
+        assert response.headers["X-DB-Calls"] == "1"
+
+    def test_breach_only_logged_when_not_strict(self, monkeypatch):
+        """Test that without strict mode a breach is reported but the response is kept"""
+        monkeypatch.setattr(server, "DB_BUDGET_STRICT", False)
+        monkeypatch.setattr(server, "DB_CALL_BUDGET", 0)
+        assert asyncio.run(get("/api/teams")).status_code == 200
@@ -0,0 +1,90 @@
+"""
+Photo rendition tests, run in-process against the worker pool the app starts.
+"""
+import asyncio
+import io
+import tempfile
+
+import httpx
+from PIL import Image
+
+import server
+
+
+def png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def put_photo(**kwargs) -> httpx.Response:
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.put("/api/clashes/photo-clash/photo", **kwargs)
+
+
+class TestPhotoUploadLimit:
+    """Oversized uploads are refused before the multipart body is parsed"""
+
+    def test_declared_length_over_limit_is_refused(self, monkeypatch):
+        """Test that a Content-Length over the limit gets a 413 without the form being read"""
+        monkeypatch.setattr(server, "PHOTO_MAX_BYTES", 1024)
+        monkeypatch.setattr(server, "PHOTO_FORM_OVERHEAD", 256)
+        files = {"photo": ("court.png", b"x" * 4096, "image/png")}
+        response = asyncio.run(put_photo(files=files))
+        assert response.status_code == 413
+        assert "limit" in response.json()["detail"]
+
+    def test_undeclared_body_is_cut_off_at_the_limit(self, monkeypatch):
+        """Test that a chunked body is refused once it passes the limit, before the rest is sent"""
+        monkeypatch.setattr(server, "PHOTO_MAX_BYTES", 1024)
+        monkeypatch.setattr(server, "PHOTO_FORM_OVERHEAD", 256)
+        sent = []
+
+        async def body():
+            yield b"--b\r\nContent-Disposition: form-data; name=\"photo\"; filename=\"a.png\"\r\n\r\n"
+            for _ in range(100):
+                sent.append(1)
+                yield b"x" * 512
+
+        response = asyncio.run(put_photo(
+            content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"}
+        ))
+        assert response.status_code == 413
+        assert len(sent) < 100
+
+
+class TestPhotoRenditions:
+    """Background rendering of uploaded clash photos"""
+
+    def test_valid_image_gets_renditions(self):
+        """Test that an uploaded image is downscaled in a worker and attached to its clash"""
+        data = png(1600, 1200)
+
+        async def run():
+            server.start_photo_pool()
+            try:
+                original_id = await server.store_clash_photo("photo-clash", data, "image/png")
+                await server.db.clashes.insert_one({
+                    "id": "photo-clash", "tournament_id": server.DEFAULT_TOURNAMENT_ID,
+                    "photo_file_id": str(original_id)
+                })
+                with tempfile.NamedTemporaryFile(delete=False) as spool:
+                    spool.write(data)
+                await server.build_photo_renditions(
+                    server.DEFAULT_TOURNAMENT_ID, "photo-clash", original_id, spool.name
+                )
+                clash = await server.db.clashes.find_one({"id": "photo-clash"})
+                sizes = {}
+                for size, file_id in clash["photo_renditions"].items():
+                    grid_out = await server.photo_bucket.open_download_stream(server.ObjectId(file_id))
+                    with Image.open(io.BytesIO(await grid_out.read())) as image:
+                        sizes[size] = (image.format, image.size)
+                return clash, sizes
+            finally:
+                await server.stop_photo_pool()
+
+        clash, sizes = asyncio.run(run())
+        assert sizes == {"thumb": ("JPEG", (320, 240)), "display": ("JPEG", (1280, 960))}
+        assert f"v={clash['photo_renditions']['display']}" in clash["photo_url"]
+        assert server.photo_pool is None
@@ -0,0 +1,114 @@
+"""
+Read coalescing tests, run in-process against SingleFlight directly and
+through the app.
+"""
+import asyncio
+
+import httpx
+
+import server
+
+
+class TestSingleFlight:
+    """Concurrent identical reads share one load"""
+
+    def test_concurrent_reads_load_once(self):
+        """Test that a burst of identical reads reaches the database once and all get its result"""
+        loads = []
+
+        async def load():
+            loads.append(1)
+            await asyncio.sleep(0.05)
+            return b"[]"
+
+        async def run():
+            flight = server.SingleFlight(ttl=0)
+            results = await asyncio.gather(*(flight.run(("teams", "", '"v1"'), load) for _ in range(20)))
+            return flight, results
+
+        flight, results = asyncio.run(run())
+        assert len(loads) == 1
+        assert results == [b"[]"] * 20
+        assert (flight.executed, flight.coalesced) == (1, 19)
+
+    def test_new_etag_is_a_new_read(self):
+        """Test that a read after a write, under the new ETag, does not get the old result"""
+        async def run():
+            flight = server.SingleFlight(ttl=60)
+            first = await flight.run(("teams", "", '"v1"'), lambda: asyncio.sleep(0, b"old"))
+            cached = await flight.run(("teams", "", '"v1"'), lambda: asyncio.sleep(0, b"unused"))
+            fresh = await flight.run(("teams", "", '"v2"'), lambda: asyncio.sleep(0, b"new"))
+            return first, cached, fresh, flight
+
+        first, cached, fresh, flight = asyncio.run(run())
+        assert (first, cached, fresh) == (b"old", b"old", b"new")
+        assert (flight.executed, flight.hits) == (2, 1)
+
+    def test_failure_reaches_every_waiter_and_is_not_kept(self):
+        """Test that a failed load fails all coalesced readers and the next read retries"""
+        async def failing():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("database unavailable")
+
+        async def run():
+            flight = server.SingleFlight(ttl=60)
+            results = await asyncio.gather(
+                *(flight.run(("teams",), failing) for _ in range(5)), return_exceptions=True
+            )
+            retried = await flight.run(("teams",), lambda: asyncio.sleep(0, b"[]"))
+            return results, retried
+
+        results, retried = asyncio.run(run())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert retried == b"[]"
+
+    def test_cancelled_leader_does_not_cancel_waiters(self):
+        """Test that readers coalesced on a cancelled load retry it, once between them"""
+        loads = []
+
+        async def load():
+            loads.append(1)
+            await asyncio.sleep(0.05)
+            return b"[]"
+
+        async def run():
+            flight = server.SingleFlight(ttl=0)
+            leader = asyncio.ensure_future(flight.run(("teams",), load))
+            await asyncio.sleep(0)
+            waiters = asyncio.gather(*(flight.run(("teams",), load) for _ in range(5)))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await waiters, leader.cancelled()
+
+        results, leader_cancelled = asyncio.run(run())
+        assert leader_cancelled
+        assert results == [b"[]"] * 5
+        assert len(loads) == 2
+
+
+class TestCoalescedViews:
+    """Page view bundles go through single_flight like the other hot reads"""
+
+    def test_burst_of_view_reads_loads_once(self, monkeypatch):
+        """Test that concurrent identical /views/home reads run its queries once and get one body"""
+        calls = []
+        find_clashes = server.find_clashes
+
+        async def slow_find_clashes(*args, **kwargs):
+            calls.append(args)
+            await asyncio.sleep(0.05)
+            return await find_clashes(*args, **kwargs)
+
+        monkeypatch.setattr(server, "find_clashes", slow_find_clashes)
+        monkeypatch.setattr(server, "single_flight", server.SingleFlight(ttl=0))
+
+        async def run():
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(*(client.get("/api/views/home") for _ in range(10)))
+
+        responses = asyncio.run(run())
+        assert [r.status_code for r in responses] == [200] * 10
+        assert len({r.content for r in responses}) == 1
+        assert len(calls) == 2
+        assert (server.single_flight.executed, server.single_flight.coalesced) == (1, 9)
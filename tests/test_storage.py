@@ -0,0 +1,168 @@
+"""
+Memory storage engine tests: journal replay, snapshots, torn journal tails,
+the directory lock, blob files and explain plans.
+"""
+import asyncio
+import json
+
+import pytest
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+from storage import MemoryDatabase, MemoryGridFSBucket, SNAPSHOT_FILE, BLOB_DIR
+
+
+def crash(db):
+    """Drop the process's hold on the directory without the snapshot close() takes"""
+    db.journal.close()
+    db.lock.close()
+
+
+async def seed(db):
+    await db.teams.create_indexes([IndexModel([("id", ASCENDING)], unique=True, name="id_unique")])
+    await db.teams.insert_many([{"id": "a", "name": "A"}, {"id": "b", "name": "B"}])
+    await db.teams.update_one({"id": "a"}, {"$set": {"name": "A2"}})
+    await db.teams.delete_one({"id": "b"})
+
+
+class TestMemoryPersistence:
+    """Snapshot directory round trips"""
+
+    def test_journal_replay(self, tmp_path):
+        """Test that writes since the last snapshot are replayed from the journal"""
+        db = MemoryDatabase(str(tmp_path))
+        asyncio.run(seed(db))
+        crash(db)
+
+        reloaded = MemoryDatabase(str(tmp_path))
+        teams = asyncio.run(reloaded.teams.find({}, {"_id": 0}).to_list(None))
+        assert teams == [{"id": "a", "name": "A2"}]
+        reloaded.close()
+
+    def test_snapshot_and_reload_keep_indexes(self, tmp_path):
+        """Test that a reload restores documents and enforces unique indexes before ensure_indexes runs"""
+        db = MemoryDatabase(str(tmp_path))
+        asyncio.run(seed(db))
+        db.snapshot()
+        asyncio.run(db.teams.insert_one({"id": "c", "name": "C"}))
+        db.close()
+        assert not (tmp_path / "journal.0.jsonl").exists()
+
+        reloaded = MemoryDatabase(str(tmp_path))
+        ids = [t["id"] for t in asyncio.run(reloaded.teams.find({}).to_list(None))]
+        assert ids == ["a", "c"]
+        assert "id_unique" in asyncio.run(reloaded.teams.index_information())
+        with pytest.raises(DuplicateKeyError):
+            asyncio.run(reloaded.teams.insert_one({"id": "a", "name": "Duplicate"}))
+        reloaded.close()
+
+    def test_periodic_snapshot_runs_off_the_loop(self, tmp_path):
+        """Test that the background snapshot writes snapshot.json and replaces the journal"""
+        async def run():
+            db = MemoryDatabase(str(tmp_path), snapshot_seconds=0.01)
+            db.start()
+            await db.teams.insert_one({"id": "a"})
+            await asyncio.sleep(0.2)
+            assert not db.dirty
+            crash(db)
+            db.snapshot_task.cancel()
+
+        asyncio.run(run())
+        snapshot = json.loads((tmp_path / SNAPSHOT_FILE).read_text())
+        assert [doc["id"] for doc in snapshot["collections"]["teams"]] == ["a"]
+
+    def test_torn_journal_tail_truncated(self, tmp_path):
+        """Test that a half-written last journal line is dropped and later writes still replay"""
+        db = MemoryDatabase(str(tmp_path))
+        asyncio.run(seed(db))
+        crash(db)
+        journal = tmp_path / "journal.0.jsonl"
+        intact = journal.read_bytes()
+        with open(journal, "ab") as out:
+            out.write(b'{"c": "teams", "put": {"id": "to')
+
+        reloaded = MemoryDatabase(str(tmp_path))
+        assert journal.read_bytes() == intact
+        asyncio.run(reloaded.teams.insert_one({"id": "d"}))
+        crash(reloaded)
+
+        again = MemoryDatabase(str(tmp_path))
+        assert [t["id"] for t in asyncio.run(again.teams.find({}).to_list(None))] == ["a", "d"]
+        again.close()
+
+    def test_second_process_refused(self, tmp_path):
+        """Test that a directory already held by a store cannot be opened again"""
+        db = MemoryDatabase(str(tmp_path))
+        with pytest.raises(RuntimeError):
+            MemoryDatabase(str(tmp_path))
+        db.close()
+        MemoryDatabase(str(tmp_path)).close()
+
+    def test_blobs_stored_outside_documents(self, tmp_path):
+        """Test that GridFS contents go to blob files and never into the snapshot"""
+        db = MemoryDatabase(str(tmp_path))
+        bucket = MemoryGridFSBucket(db, bucket_name="photos")
+        data = b"\xff\xd8" + b"x" * 4096
+
+        async def run():
+            file_id = await bucket.upload_from_stream("photo", data, metadata={"size": "original"})
+            grid_out = await bucket.open_download_stream(file_id)
+            assert await grid_out.read() == data
+            return file_id
+
+        file_id = asyncio.run(run())
+        assert (tmp_path / BLOB_DIR / str(file_id)).read_bytes() == data
+        db.snapshot()
+        assert "xxxx" not in (tmp_path / SNAPSHOT_FILE).read_text()
+        asyncio.run(bucket.delete(file_id))
+        assert not (tmp_path / BLOB_DIR / str(file_id)).exists()
+        db.close()
+
+
+async def explain_stages(db, query, sort=None):
+    cursor = db.clashes.find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    plan = (await cursor.explain())["queryPlanner"]["winningPlan"]
+    stages = []
+    while plan:
+        stages.append((plan["stage"], plan.get("indexName")))
+        plan = plan.get("inputStage")
+    return stages
+
+
+class TestMemoryExplain:
+    """explain() reports plans the way Mongo's planner would choose them"""
+
+    def test_sort_needs_the_full_index_prefix(self):
+        """Test that a leading-field index alone leaves an in-memory SORT, and a compound one removes it"""
+        newest = [("created_at", DESCENDING), ("id", DESCENDING)]
+
+        async def run():
+            db = MemoryDatabase()
+            await db.clashes.create_indexes([IndexModel([("tournament_id", ASCENDING)], name="tournament")])
+            partial = await explain_stages(db, {"tournament_id": "t", "stage": "league"}, newest)
+            await db.clashes.create_indexes([IndexModel(
+                [("tournament_id", ASCENDING), ("stage", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                name="tournament_stage_created_at_id"
+            )])
+            full = await explain_stages(db, {"tournament_id": "t", "stage": "league"}, newest)
+            reversed_sort = await explain_stages(db, {"tournament_id": "t", "stage": "league"},
+                                                 [("created_at", ASCENDING), ("id", ASCENDING)])
+            return partial, full, reversed_sort
+
+        partial, full, reversed_sort = asyncio.run(run())
+        assert partial == [("SORT", None), ("FETCH", None), ("IXSCAN", "tournament")]
+        assert full == [("FETCH", None), ("IXSCAN", "tournament_stage_created_at_id")]
+        assert reversed_sort == full
+
+    def test_unindexed_leading_field_is_a_collection_scan(self):
+        """Test that an index is not used when the query skips its leading field"""
+        async def run():
+            db = MemoryDatabase()
+            await db.clashes.create_indexes([IndexModel(
+                [("tournament_id", ASCENDING), ("stage", ASCENDING)], name="tournament_stage"
+            )])
+            return await explain_stages(db, {"stage": "league"})
+
+        assert asyncio.run(run()) == [("COLLSCAN", None)]